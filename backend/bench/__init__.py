@@ -0,0 +1,3 @@
+from .profiles import generate_profiles, iter_profiles
+
+__all__ = ["generate_profiles", "iter_profiles"]
@@ -0,0 +1,155 @@
+"""Benchmark de catálogo grande: importación y recomendación con N ejercicios.
+
+Siembra una base SQLite temporal con db/seed.py, mide el pipeline, importa
+N ejercicios sintéticos (variantes de los del catálogo inicial, en CSV) con
+db/importer.py y vuelve a medir:
+
+    python -m bench.catalog_scale                 # 50.000 ejercicios
+    python -m bench.catalog_scale --rows 100000 --save scale.json
+
+Las etapas llevan el tamaño del catálogo entre corchetes para comparar ambos.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, Iterator
+from .pipeline import compare, format_report, measure
+
+DEFAULT_ROWS = 50_000
+CSV_CHUNK_ROWS = 1000
+
+
+def synthetic_csv(rows: int) -> Iterator[bytes]:
+    # CSV generado por partes, como se leería de un fichero
+    from db.seed import EXERCISE_COLUMNS, EXERCISES
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXERCISE_COLUMNS)
+    for i in range(rows):
+        name, muscle_group, equipment, difficulty, description = EXERCISES[i % len(EXERCISES)]
+        writer.writerow((f"{name} (variante {i})", muscle_group, equipment, difficulty, description))
+        if i % CSV_CHUNK_ROWS == CSV_CHUNK_ROWS - 1:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _catalog_stages(label: str, profiles, engine, catalog_runs: int) -> Dict[str, Dict[str, float]]:
+    from db import ReadSessionLocal
+    from engine.catalog import ExerciseCatalog
+
+    db = ReadSessionLocal()
+    try:
+        catalog = ExerciseCatalog.from_db(db)
+        runs = [()] * catalog_runs
+        stages = {
+            f"catalog_build[{label}]": measure(runs, lambda: ExerciseCatalog.from_db(db)),
+            f"end_to_end[{label}]": measure([(u,) for u in profiles],
+                                            lambda u: engine.get_recommendations(u, catalog)),
+        }
+    finally:
+        db.close()
+    # Página filtrada de GET /api/exercises sin caché (snapshot nuevo en cada llamada)
+    stages[f"exercises_page[{label}]"] = measure(
+        [(ExerciseCatalog(catalog.exercises),) for _ in range(catalog_runs)],
+        lambda snapshot: snapshot.exercises_page("gym", "pecho", "intermediate", 0, 100),
+    )
+    return stages
+
+
+def run_benchmark(rows: int = DEFAULT_ROWS, profile_count: int = 300, catalog_runs: int = 5,
+                  seed: int = 0) -> Dict:
+    # Importados aquí: db crea su engine con DATABASE_URL al importarse
+    from sqlalchemy import text
+    from db import engine as db_engine, init_db
+    from db.importer import import_exercises
+    from engine.clips_engine import ClipsEngine
+    from .profiles import generate_profiles
+
+    base_rows = init_db()
+    profiles = generate_profiles(profile_count, seed)
+    engine = ClipsEngine()
+    stages = _catalog_stages(str(base_rows), profiles, engine, catalog_runs)
+
+    stats = import_exercises(synthetic_csv(rows), "csv")
+    total = base_rows + stats.inserted
+    stages.update(_catalog_stages(str(total), profiles, engine, catalog_runs))
+
+    with db_engine.connect() as conn:
+        plan = conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM exercises "
+            "WHERE equipment = 'gym' AND muscle_group = 'pecho' AND difficulty = 'intermediate'"
+        )).all()
+    return {
+        "meta": {
+            "rows": rows,
+            "catalog_size": total,
+            "profiles": profile_count,
+            "import": {
+                "read": stats.read,
+                "inserted": stats.inserted,
+                "updated": stats.updated,
+                "invalid": stats.invalid,
+                "seconds": round(stats.elapsed, 3),
+                "rows_per_second": round(stats.rows_per_second),
+            },
+            "filter_query_plan": [row[-1] for row in plan],
+        },
+        "stages": stages,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de importación y recomendación con un catálogo grande")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="ejercicios sintéticos a importar")
+    parser.add_argument("--profiles", type=int, default=300, help="perfiles sintéticos de end_to_end")
+    parser.add_argument("--catalog-runs", type=int, default=5, help="repeticiones de la carga del catálogo")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", metavar="JSON", help="guardar el resultado como línea base")
+    parser.add_argument("--compare", metavar="JSON", help="comparar con una línea base guardada")
+    parser.add_argument("--threshold", type=float, default=0.3,
+                        help="empeoramiento relativo tolerado al comparar (0.3 = 30%%)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'scale.db')}"
+        start = time.perf_counter()
+        result = run_benchmark(args.rows, args.profiles, args.catalog_runs, args.seed)
+        from db import engine as db_engine, read_engine
+        db_engine.dispose()
+        read_engine.dispose()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    imported = result["meta"]["import"]
+    print(f"Importación: {imported['read']} filas en {imported['seconds']} s "
+          f"({imported['rows_per_second']} filas/s)")
+    print(f"Plan de la consulta filtrada: {'; '.join(result['meta']['filter_query_plan'])}")
+    print(format_report(result, baseline))
+    print(f"Total: {time.perf_counter() - start:.1f} s")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Línea base guardada en {args.save}")
+
+    if baseline is not None:
+        regressions = compare(result, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESIÓN {line}")
+        if regressions:
+            return 1
+        print("Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""Prueba de carga en bucle cerrado contra la API.
+
+Cada nivel de concurrencia C mantiene C clientes que envían
+POST /api/recommendations uno tras otro durante --duration segundos, con
+perfiles de bench/profiles.py (todos los splits, equipamientos y lesiones).
+Se mide throughput, latencia p50/p95/p99 y tasa de error por nivel:
+
+    python -m bench.loadtest                                  # main:app en proceso (ASGI)
+    python -m bench.loadtest --workers 1,2,4                  # uvicorn local por cada nº de workers
+    python -m bench.loadtest --url http://127.0.0.1:8000      # servidor ya arrancado
+    python -m bench.loadtest --concurrency 1,4,16 --save carga.json
+    python -m bench.loadtest --compare carga.json             # código 1 si hay regresión
+
+Por defecto cada petición lleva un nombre distinto, así que ninguna sale de
+la caché de recomendaciones; con --cache-hits se repite el mismo conjunto
+de perfiles. Sin DATABASE_URL se usa una base SQLite temporal.
+Necesita httpx (pip install -r requirements-dev.txt).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+DEFAULT_CONCURRENCY = (1, 2, 4, 8, 16, 32)
+REQUEST_TIMEOUT = 30.0
+SERVER_START_TIMEOUT = 60.0
+# Regresiones: caída de throughput o subida de p95 por encima del umbral
+COMPARED_METRICS = {"throughput_rps": -1, "p95_ms": 1}
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class RequestBodies:
+    """Cuerpos JSON de las peticiones, repartidos por turno entre los clientes."""
+
+    def __init__(self, count: int, seed: int, cache_hits: bool):
+        from .profiles import generate_profiles
+        self.profiles = [p.model_dump(mode="json") for p in generate_profiles(count, seed)]
+        self.encoded = [json.dumps(p).encode() for p in self.profiles]
+        self.cache_hits = cache_hits
+        self.sent = 0
+
+    def next(self) -> bytes:
+        i = self.sent
+        self.sent += 1
+        if self.cache_hits:
+            return self.encoded[i % len(self.encoded)]
+        return json.dumps(dict(self.profiles[i % len(self.profiles)], nombre=f"load-{i}")).encode()
+
+
+async def run_step(client, bodies: RequestBodies, concurrency: int, duration: float,
+                   warmup: float) -> Dict:
+    # Bucle cerrado: cada cliente espera su respuesta antes de enviar la siguiente.
+    # Solo cuentan las peticiones que empiezan tras el calentamiento
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    headers = {"Content-Type": "application/json"}
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+
+    async def worker():
+        while True:
+            sent = time.perf_counter()
+            if sent >= deadline:
+                return
+            try:
+                response = await client.post("/api/recommendations", content=bodies.next(), headers=headers)
+                status = str(response.status_code)
+            except Exception as e:
+                status = type(e).__name__
+            if sent >= measure_from:
+                latencies.append(time.perf_counter() - sent)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - measure_from
+    latencies.sort()
+    requests = len(latencies)
+    errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "throughput_rps": round(requests / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+async def run_steps(client, bodies: RequestBodies, levels: Sequence[int], duration: float,
+                    warmup: float, label: str) -> List[Dict]:
+    steps = []
+    for concurrency in levels:
+        step = await run_step(client, bodies, concurrency, duration, warmup)
+        steps.append(step)
+        print(format_step(label, step), flush=True)
+    return steps
+
+
+async def run_asgi(bodies: RequestBodies, levels: Sequence[int], duration: float, warmup: float) -> List[Dict]:
+    # main:app en este proceso, con sus eventos de arranque y parada. Cliente y
+    # servidor comparten event loop: el throughput incluye el coste del cliente
+    import httpx
+    from main import app
+
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest",
+                                     timeout=REQUEST_TIMEOUT) as client:
+            return await run_steps(client, bodies, levels, duration, warmup, "asgi")
+    finally:
+        await app.router.shutdown()
+
+
+async def run_http(url: str, bodies: RequestBodies, levels: Sequence[int], duration: float,
+                   warmup: float, label: str) -> List[Dict]:
+    import httpx
+
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=REQUEST_TIMEOUT) as client:
+        return await run_steps(client, bodies, levels, duration, warmup, label)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int) -> "tuple[subprocess.Popen, str]":
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+    )
+    url = f"http://127.0.0.1:{port}"
+    _wait_ready(process, url)
+    return process, url
+
+
+def _wait_ready(process: subprocess.Popen, url: str) -> None:
+    import httpx
+
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn terminó al arrancar (código {process.returncode})")
+        try:
+            if httpx.get(f"{url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"uvicorn no respondió en {SERVER_START_TIMEOUT:.0f} s")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def run_loadtest(levels: Sequence[int], duration: float, warmup: float, workers: Sequence[int] = (),
+                 url: Optional[str] = None, profile_count: int = 1000, seed: int = 0,
+                 cache_hits: bool = False) -> Dict:
+    runs = []
+    if url:
+        bodies = RequestBodies(profile_count, seed, cache_hits)
+        runs.append({"target": url, "workers": None,
+                     "steps": asyncio.run(run_http(url, bodies, levels, duration, warmup, url))})
+    elif workers:
+        # La base se siembra antes: varios workers arrancando a la vez compiten por ella
+        from db import engine as db_engine, init_db
+        init_db()
+        db_engine.dispose()
+        for count in workers:
+            process, server_url = start_server(count)
+            try:
+                bodies = RequestBodies(profile_count, seed, cache_hits)
+                steps = asyncio.run(run_http(server_url, bodies, levels, duration, warmup, f"{count} workers"))
+            finally:
+                stop_server(process)
+            runs.append({"target": "uvicorn", "workers": count, "steps": steps})
+    else:
+        bodies = RequestBodies(profile_count, seed, cache_hits)
+        runs.append({"target": "asgi", "workers": None,
+                     "steps": asyncio.run(run_asgi(bodies, levels, duration, warmup))})
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "duration": duration,
+            "warmup": warmup,
+            "profiles": profile_count,
+            "seed": seed,
+            "cache_hits": cache_hits,
+            "execution_mode": os.getenv("ENGINE_EXECUTION_MODE", "thread"),
+        },
+        "runs": runs,
+    }
+
+
+def _step_key(run: Dict, step: Dict) -> str:
+    workers = run["workers"]
+    return f"{run['target'] if workers is None else f'{workers} workers'} c={step['concurrency']}"
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Niveles cuyo throughput cae o cuyo p95 sube más que threshold (fracción)."""
+    base_steps = {_step_key(run, step): step for run in baseline["runs"] for step in run["steps"]}
+    regressions = []
+    for run in current["runs"]:
+        for step in run["steps"]:
+            key = _step_key(run, step)
+            base = base_steps.get(key)
+            if base is None:
+                continue
+            for metric, direction in COMPARED_METRICS.items():
+                old, new = base.get(metric), step.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old * direction
+                if change > threshold:
+                    regressions.append(f"{key} {metric}: {old} -> {new} ({(new - old) / old:+.0%})")
+            if step["error_rate"] > base["error_rate"] + 0.01:
+                regressions.append(f"{key} error_rate: {base['error_rate']} -> {step['error_rate']}")
+    return regressions
+
+
+def format_step(label: str, step: Dict) -> str:
+    return (f"{label:<14}{step['concurrency']:>6}{step['requests']:>9}{step['throughput_rps']:>10.1f}"
+            f"{step['p50_ms']:>9.1f}{step['p95_ms']:>9.1f}{step['p99_ms']:>9.1f}{step['error_rate']:>9.2%}")
+
+
+def _int_list(value: str) -> List[int]:
+    try:
+        levels = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError("lista de enteros separados por comas")
+    if not levels or min(levels) < 1:
+        raise argparse.ArgumentTypeError("los valores deben ser >= 1")
+    return levels
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga en bucle cerrado de POST /api/recommendations")
+    parser.add_argument("--concurrency", type=_int_list, default=list(DEFAULT_CONCURRENCY),
+                        help="niveles de concurrencia, p. ej. 1,4,16")
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos medidos por nivel")
+    parser.add_argument("--warmup", type=float, default=2.0, help="segundos sin medir al empezar cada nivel")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--workers", type=_int_list,
+                        help="arrancar uvicorn en local con cada nº de workers (por defecto, ASGI en proceso)")
+    target.add_argument("--url", help="servidor ya arrancado")
+    parser.add_argument("--profiles", type=int, default=1000, help="perfiles sintéticos distintos")
+    parser.add_argument("--cache-hits", action="store_true", help="repetir perfiles (aciertos de caché)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", metavar="JSON", help="guardar el resultado")
+    parser.add_argument("--compare", metavar="JSON", help="comparar con un resultado guardado")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="empeoramiento relativo tolerado al comparar (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        parser.error("bench.loadtest necesita httpx: pip install -r requirements-dev.txt")
+
+    print(f"{'destino':<14}{'conc.':>6}{'pet.':>9}{'pet./s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errores':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Base temporal salvo que se indique otra (uvicorn la hereda del entorno)
+        if not args.url and "DATABASE_URL" not in os.environ:
+            os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'loadtest.db')}"
+        result = run_loadtest(args.concurrency, args.duration, args.warmup, args.workers or (),
+                              args.url, args.profiles, args.seed, args.cache_hits)
+        if "db" in sys.modules:
+            from db import engine as db_engine, read_engine
+            db_engine.dispose()
+            read_engine.dispose()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Resultado guardado en {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESIÓN {line}")
+        if regressions:
+            return 1
+        print("Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""Micro-benchmark por etapas del pipeline de recomendación.
+
+Mide tiempo y memoria asignada de cada etapa (entorno CLIPS, carga de reglas
+como texto y desde la imagen binaria, reglas, extracción de resultados, consulta de ejercicios, generación de cada
+split, prescripción de un ejercicio y serialización) contra una base SQLite
+temporal sembrada con db/seed.py:
+
+    python -m bench.pipeline                        # informe
+    python -m bench.pipeline --save baseline.json   # guardar línea base
+    python -m bench.pipeline --compare baseline.json
+
+Con --compare el código de salida es 1 si alguna etapa empeora más que
+--threshold respecto a la línea base.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from importlib import metadata
+from typing import Callable, Dict, List, Optional, Sequence
+
+# Llamadas por etapa medidas con tracemalloc (lo ralentiza todo, por eso aparte)
+ALLOC_SAMPLES = 200
+# Métricas comparadas con la línea base y diferencia absoluta mínima para
+# contar como regresión (por debajo es ruido de medida)
+COMPARED_METRICS = {"median_us": 5.0, "peak_bytes": 1024}
+
+
+def measure(calls: Sequence, fn: Callable, setup: Optional[Callable] = None) -> Dict[str, float]:
+    """Mide fn(*args) para cada args de calls; setup(*args) se ejecuta antes sin medir."""
+    gc.collect()
+    times = []
+    for args in calls:
+        if setup is not None:
+            setup(*args)
+        start = time.perf_counter_ns()
+        fn(*args)
+        times.append(time.perf_counter_ns() - start)
+
+    allocated = []
+    peaks = []
+    tracemalloc.start()
+    try:
+        for args in calls[:ALLOC_SAMPLES]:
+            if setup is not None:
+                setup(*args)
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            fn(*args)
+            current, peak = tracemalloc.get_traced_memory()
+            allocated.append(current - before)
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+
+    times.sort()
+    return {
+        "calls": len(times),
+        "mean_us": round(statistics.fmean(times) / 1000, 2),
+        "median_us": round(statistics.median(times) / 1000, 2),
+        "p95_us": round(times[min(len(times) - 1, int(len(times) * 0.95))] / 1000, 2),
+        "min_us": round(times[0] / 1000, 2),
+        # Memoria retenida y pico por llamada (medias)
+        "alloc_bytes": round(statistics.fmean(allocated)),
+        "peak_bytes": round(statistics.fmean(peaks)),
+    }
+
+
+def run_benchmarks(profile_count: int = 300, engine_runs: int = 30, seed: int = 0) -> Dict:
+    # Importados aquí: db crea su engine con DATABASE_URL al importarse
+    import clips
+    from db import ReadSessionLocal, init_db
+    from engine.catalog import ExerciseCatalog
+    from engine.clips_engine import ClipsEngine, IO_CONSTRUCTS, RULES_PATH, lesion_info, plan_seed, regenerate_day
+    from engine.days import exercise_rec
+    from engine.prescriptions import plan_prescriptions
+    from engine.rules_image import image_path
+    from models.exercise import Exercise
+    from .profiles import generate_profiles
+
+    init_db()
+    profiles = generate_profiles(profile_count, seed)
+    engine = ClipsEngine()
+    db = ReadSessionLocal()
+    try:
+        catalog = ExerciseCatalog.from_db(db)
+        stages: Dict[str, Dict[str, float]] = {}
+        rebuilds = [()] * engine_runs
+        per_profile = [(u,) for u in profiles]
+
+        stages["environment"] = measure(rebuilds, clips.Environment)
+        fresh = []
+        stages["rules_load"] = measure(
+            rebuilds,
+            lambda: fresh[-1].load(RULES_PATH),
+            setup=lambda: fresh.append(clips.Environment()),
+        )
+        image = image_path(RULES_PATH, IO_CONSTRUCTS)
+        if os.path.exists(image):
+            stages["rules_image_load"] = measure(
+                rebuilds,
+                lambda: fresh[-1].load(image, binary=True),
+                setup=lambda: fresh.append(clips.Environment()),
+            )
+        fresh.clear()
+        stages["engine_init"] = measure(rebuilds, ClipsEngine)
+
+        stages["rules_run"] = measure(per_profile, engine._run_rules)
+        stages["fact_extraction"] = measure(per_profile, lambda u: engine._collect_output(), setup=engine._run_rules)
+
+        stages["exercise_query"] = measure(rebuilds, lambda: db.query(Exercise).all())
+        stages["catalog_build"] = measure(rebuilds, lambda: ExerciseCatalog.from_db(db))
+
+        # Un grupo de perfiles por split, según lo que decidan las reglas
+        by_split: Dict[str, List] = {}
+        for u in profiles:
+            engine._run_rules(u)
+            split = engine._collect_output()[2]
+            by_split.setdefault(split, []).append(
+                (u, split, catalog, lesion_info(u), random.Random(plan_seed(u)))
+            )
+        for split, calls in sorted(by_split.items()):
+            stages[f"plan[{split}]"] = measure(calls, engine._generate_workout_plan)
+
+        records = catalog.exercises
+        rec_calls = []
+        for i, u in enumerate(profiles):
+            record = records[i % len(records)]
+            rec_calls.append((record, record.muscle_group,
+                              plan_prescriptions(u.nivel_fitness, lesion_info(u))))
+        stages["exercise_rec"] = measure(rec_calls, exercise_rec)
+
+        recommendations = [(engine.get_recommendations(u, catalog),) for u in profiles]
+        stages["serialize"] = measure(recommendations, lambda rec: rec.model_dump_json())
+        # Un solo día del plan, sin reglas (POST /api/recommendations/day)
+        day_calls = [(u, rec.plan_entrenamiento, i % len(rec.plan_entrenamiento), catalog)
+                     for i, (u, (rec,)) in enumerate(zip(profiles, recommendations))]
+        stages["regenerate_day"] = measure(day_calls, regenerate_day)
+        stages["end_to_end"] = measure(per_profile, lambda u: engine.get_recommendations(u, catalog))
+    finally:
+        db.close()
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "clipspy": metadata.version("clipspy"),
+            "platform": platform.platform(),
+            "profiles": profile_count,
+            "engine_runs": engine_runs,
+            "seed": seed,
+            "catalog_version": catalog.version,
+            "splits": {split: len(calls) for split, calls in sorted(by_split.items())},
+        },
+        "stages": stages,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Etapas que empeoran más que threshold (fracción) en alguna métrica comparada."""
+    regressions = []
+    for name, stage in current["stages"].items():
+        base = baseline["stages"].get(name)
+        if base is None:
+            continue
+        for metric, min_delta in COMPARED_METRICS.items():
+            old, new = base.get(metric), stage.get(metric)
+            if not old or new is None or new - old < min_delta:
+                continue
+            change = (new - old) / old
+            if change > threshold:
+                regressions.append(f"{name} {metric}: {old} -> {new} (+{change:.0%})")
+    return regressions
+
+
+def format_report(result: Dict, baseline: Optional[Dict] = None) -> str:
+    header = f"{'etapa':<28}{'llamadas':>9}{'mediana µs':>12}{'p95 µs':>11}{'asignado B':>12}{'pico B':>10}"
+    if baseline:
+        header += f"{'base µs':>11}{'Δ':>8}"
+    lines = [header]
+    for name, stage in result["stages"].items():
+        line = (f"{name:<28}{stage['calls']:>9}{stage['median_us']:>12.2f}{stage['p95_us']:>11.2f}"
+                f"{stage['alloc_bytes']:>12}{stage['peak_bytes']:>10}")
+        base = (baseline or {}).get("stages", {}).get(name)
+        if base:
+            change = (stage["median_us"] - base["median_us"]) / base["median_us"] if base["median_us"] else 0.0
+            line += f"{base['median_us']:>11.2f}{change:>+8.0%}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark por etapas del pipeline de recomendación")
+    parser.add_argument("--profiles", type=int, default=300, help="perfiles sintéticos por etapa")
+    parser.add_argument("--engine-runs", type=int, default=30,
+                        help="repeticiones de las etapas costosas (entorno, reglas, consultas)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", metavar="JSON", help="guardar el resultado como línea base")
+    parser.add_argument("--compare", metavar="JSON", help="comparar con una línea base guardada")
+    parser.add_argument("--threshold", type=float, default=0.3,
+                        help="empeoramiento relativo tolerado al comparar (0.3 = 30%%)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Base temporal: no toca la base de desarrollo
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        result = run_benchmarks(args.profiles, args.engine_runs, args.seed)
+        from db import engine as db_engine
+        db_engine.dispose()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print(format_report(result, baseline))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Línea base guardada en {args.save}")
+
+    if baseline is not None:
+        regressions = compare(result, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESIÓN {line}")
+        if regressions:
+            return 1
+        print("Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import random
+from typing import Iterator, List, Optional, Tuple
+from schemas import UserInput
+
+SEXOS = ("masculino", "femenino")
+NIVELES = ("novato", "intermedio", "avanzado")
+OBJETIVOS = ("ganar_musculo", "perder_grasa", "mantenimiento")
+EQUIPAMIENTOS = ("gimnasio_completo", "peso_corporal", "entrenamiento_casa")
+# 1-3 días: Full Body, 4: Upper/Lower, 5-7: Push/Pull/Legs
+FRECUENCIAS = (1, 2, 3, 4, 5, 6, 7)
+# Combinaciones que ofrece el formulario (tipo, zona); None = sin lesión
+LESIONES: Tuple[Optional[Tuple[str, str]], ...] = (
+    None,
+    ("ninguna", "ninguna"),
+    ("desgarro", "biceps"),
+    ("desgarro", "triceps"),
+    ("desgarro", "pectoral"),
+    ("desgarro", "dorsales"),
+    ("desgarro", "deltoides"),
+    ("desgarro", "cuadriceps"),
+    ("desgarro", "femorales"),
+    ("desgarro", "gemelos"),
+    ("molestia", "hombro"),
+    ("dolor", "codo"),
+    ("molestia", "muneca"),
+    ("dolor", "cadera"),
+    ("lesion", "rodilla"),
+    ("quiebre", "tobillo"),
+    ("fisura", "espalda_baja"),
+)
+
+
+def iter_profiles(count: int, seed: int = 0) -> Iterator[UserInput]:
+    """Perfiles sintéticos reproducibles.
+
+    Cada dimensión categórica recorre todos sus valores de forma cíclica, así
+    que con count >= len(LESIONES) aparecen todos los splits, equipamientos,
+    niveles y zonas de lesión; edad, peso y altura son aleatorios.
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        lesion = LESIONES[i % len(LESIONES)]
+        yield UserInput(
+            nombre=f"bench-{i}",
+            edad=rng.randint(16, 75),
+            sexo=SEXOS[i % len(SEXOS)],
+            peso=round(rng.uniform(45, 130), 1),
+            altura=round(rng.uniform(150, 200), 1),
+            nivel_fitness=NIVELES[i % len(NIVELES)],
+            objetivo=OBJETIVOS[(i // len(NIVELES)) % len(OBJETIVOS)],
+            frecuencia_semanal=FRECUENCIAS[i % len(FRECUENCIAS)],
+            acceso_equipamiento=EQUIPAMIENTOS[(i // len(FRECUENCIAS)) % len(EQUIPAMIENTOS)],
+            lesion={"tipo": lesion[0], "zona": lesion[1]} if lesion else None,
+        )
+
+
+def generate_profiles(count: int, seed: int = 0) -> List[UserInput]:
+    return list(iter_profiles(count, seed))
@@ -0,0 +1,239 @@
+"""Recomendaciones en lote, sin pasar por la API (replanificación nocturna).
+
+    python bulk.py socios.jsonl recomendaciones.jsonl [--format csv|jsonl] [--workers 8] [--chunk-size 200]
+
+Lee perfiles de un CSV o JSONL (mismo formato que la subida) y los reparte
+por bloques entre procesos worker, cada uno con su ClipsEngine y el
+catálogo ya cargados. La salida es NDJSON, una línea por perfil y en el
+orden de entrada, igual que POST /api/recommendations/upload.
+
+Tras escribir cada bloque se guarda un checkpoint (salida + ".checkpoint")
+con los perfiles y bytes ya escritos: si el proceso se interrumpe, volver a
+lanzar el mismo comando continúa donde se quedó (--restart empieza de cero).
+Al terminar el checkpoint se borra.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Deque, Iterator, List, Optional, Tuple
+from db.importer import read_chunks
+from engine.executor import PROCESS_WORKERS, init_worker, run_in_worker
+from schemas import BatchItemResult, ParsedRow, RowParser, detect_format, parse_user_input
+
+logger = logging.getLogger(__name__)
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "200"))
+# Bloques enviados por worker sin esperar a que se escriban (acota la memoria)
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+PROGRESS_INTERVAL = 1.0  # segundos entre líneas de progreso
+
+
+class BulkStats:
+    __slots__ = ("rows", "errors", "skipped", "elapsed")
+
+    def __init__(self):
+        self.rows = 0
+        self.errors = 0
+        self.skipped = 0  # ya procesados en una ejecución anterior
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        resumed = f", {self.skipped} ya hechas antes" if self.skipped else ""
+        return (f"{self.rows} filas ({self.errors} con error{resumed}) en {self.elapsed:.1f} s: "
+                f"{self.rows_per_second:.0f} filas/s")
+
+
+def _init_bulk_worker(parent: int) -> None:
+    init_worker()
+    # Si el proceso principal muere sin cerrar el pool (kill -9), el worker
+    # se quedaría esperando trabajo: terminar con él
+    def watch_parent():
+        while os.getppid() == parent:
+            time.sleep(1)
+        os._exit(1)
+    threading.Thread(target=watch_parent, daemon=True).start()
+
+
+def _evaluate_chunk(rows: List[ParsedRow]) -> Tuple[bytes, int]:
+    # En el worker: una línea BatchItemResult por fila
+    lines = []
+    errors = 0
+    for row in rows:
+        try:
+            recommendation, _ = run_in_worker(parse_user_input(row))
+            result = BatchItemResult(index=row.index, recommendation=recommendation)
+        except Exception as e:
+            errors += 1
+            result = BatchItemResult(index=row.index, error=str(e))
+        lines.append(result.model_dump_json())
+    return ("\n".join(lines) + "\n").encode(), errors
+
+
+def _chunks(rows: Iterator[ParsedRow], size: int) -> Iterator[List[ParsedRow]]:
+    chunk: List[ParsedRow] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _iter_rows(path: str, row_format: str, skip: int) -> Iterator[ParsedRow]:
+    parser = RowParser(row_format)
+    for chunk in read_chunks(path):
+        for row in parser.feed(chunk):
+            if row.index >= skip:
+                yield row
+    for row in parser.close():
+        if row.index >= skip:
+            yield row
+
+
+class Checkpoint:
+    """Progreso de una ejecución: filas de entrada y bytes de salida ya escritos."""
+
+    def __init__(self, path: str, input_path: str):
+        self.path = path
+        stat = os.stat(input_path)
+        # Identifica la entrada: si cambia, el checkpoint no vale
+        self.source = {"input": os.path.abspath(input_path), "size": stat.st_size, "mtime": stat.st_mtime}
+        self.rows = 0
+        self.output_bytes = 0
+
+    def load(self) -> bool:
+        # False si no hay checkpoint; ValueError si es de otra entrada
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        if data.get("source") != self.source:
+            raise ValueError(f"{self.path} corresponde a otra entrada; usar --restart para empezar de cero")
+        self.rows = data["rows"]
+        self.output_bytes = data["output_bytes"]
+        return True
+
+    def save(self) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"source": self.source, "rows": self.rows, "output_bytes": self.output_bytes}, f)
+        os.replace(tmp, self.path)
+
+    def remove(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def run_bulk(input_path: str, output_path: str, row_format: str, workers: int = PROCESS_WORKERS,
+             chunk_size: int = BULK_CHUNK_SIZE, checkpoint_path: Optional[str] = None,
+             restart: bool = False) -> BulkStats:
+    stats = BulkStats()
+    checkpoint = Checkpoint(checkpoint_path or output_path + ".checkpoint", input_path)
+    resumed = not restart and checkpoint.load()
+    if resumed and not os.path.exists(output_path):
+        raise ValueError(f"Hay checkpoint pero no existe {output_path}; usar --restart para empezar de cero")
+    if resumed:
+        stats.skipped = checkpoint.rows
+        logger.info("Continuando tras %d filas", checkpoint.rows)
+    else:
+        checkpoint.remove()
+
+    # Lo escrito después del último checkpoint se descarta
+    output = open(output_path, "r+b" if resumed else "wb")
+    output.truncate(checkpoint.output_bytes)
+    output.seek(checkpoint.output_bytes)
+
+    workers = max(1, workers)
+    start = reported = time.perf_counter()
+    pending: Deque[Tuple[Future, int]] = deque()
+    processes = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_bulk_worker,
+        initargs=(os.getpid(),),
+    )
+
+    def write_next() -> None:
+        # Los bloques se escriben en orden de entrada; el checkpoint solo
+        # avanza con lo que ya está en disco
+        nonlocal reported
+        future, count = pending.popleft()
+        data, errors = future.result()
+        output.write(data)
+        output.flush()
+        os.fsync(output.fileno())
+        checkpoint.rows += count
+        checkpoint.output_bytes += len(data)
+        checkpoint.save()
+        stats.rows += count
+        stats.errors += errors
+        now = time.perf_counter()
+        if now - reported >= PROGRESS_INTERVAL:
+            reported = now
+            logger.info("%d filas, %.0f filas/s", checkpoint.rows, stats.rows / (now - start))
+
+    try:
+        for chunk in _chunks(_iter_rows(input_path, row_format, checkpoint.rows), chunk_size):
+            if len(pending) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                write_next()
+            pending.append((processes.submit(_evaluate_chunk, chunk), len(chunk)))
+        while pending:
+            write_next()
+    finally:
+        for future, _ in pending:
+            future.cancel()
+        processes.shutdown(wait=True, cancel_futures=True)
+        output.close()
+    checkpoint.remove()
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Recomendaciones en lote desde un fichero de perfiles")
+    parser.add_argument("input", help="fichero CSV (con cabecera) o JSONL de perfiles")
+    parser.add_argument("output", help="fichero NDJSON de salida")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="por defecto, según la extensión")
+    parser.add_argument("--workers", type=int, default=PROCESS_WORKERS, help="procesos worker")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE, help="perfiles por bloque")
+    parser.add_argument("--checkpoint", help="fichero de checkpoint (por defecto, salida + .checkpoint)")
+    parser.add_argument("--restart", action="store_true", help="ignorar el checkpoint y empezar de cero")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    row_format = args.format or detect_format(args.input)
+    if row_format is None:
+        parser.error("no se reconoce el formato; indicar --format")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size debe ser al menos 1")
+    # Los workers leen el catálogo de la base: crearla antes de arrancarlos
+    from db import init_db
+    init_db()
+    try:
+        stats = run_bulk(args.input, args.output, row_format, args.workers, args.chunk_size,
+                         args.checkpoint, args.restart)
+    except ValueError as e:
+        parser.error(str(e))
+    except (BrokenProcessPool, KeyboardInterrupt):
+        print("Interrumpido; volver a lanzar el mismo comando para continuar", file=sys.stderr)
+        return 1
+    print(f"Procesadas {stats.summary()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
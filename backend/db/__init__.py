@@ -1,5 +1,5 @@
-from .database import get_db, engine, SessionLocal
-from .seed import init_db
+from .database import get_db, engine, read_engine, SessionLocal, ReadSessionLocal
+from .seed import create_schema, init_db
 
-__all__ = ["get_db", "engine", "SessionLocal", "init_db"]
+__all__ = ["get_db", "engine", "read_engine", "SessionLocal", "ReadSessionLocal", "create_schema", "init_db"]
 
@@ -1,20 +1,83 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from models.exercise import Base
 
 # Database setup
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./fitness_expert.db")
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+
+# Perfil de SQLite: "read_mostly" (WAL, mmap, caché grande y sesiones de
+# lectura con query_only) o "default" (configuración de SQLite sin tocar)
+DB_PROFILE = os.getenv("DB_PROFILE", "read_mostly")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # bytes
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", str(64 * 1024)))  # KiB por conexión
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # ms
+# Conexiones del pool de lectura: una por hilo del threadpool que consulte a la vez
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "16"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "16"))
+
+_url = make_url(SQLALCHEMY_DATABASE_URL)
+_is_sqlite = _url.get_backend_name() == "sqlite"
+_is_sqlite_file = _is_sqlite and _url.database not in (None, "", ":memory:")
+_read_mostly = DB_PROFILE == "read_mostly" and _is_sqlite_file
+
+
+def _engine_options(pool: bool):
+    options = {}
+    if _is_sqlite:
+        options["connect_args"] = {"check_same_thread": False}
+    if pool and _read_mostly:
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+    return options
+
+
+def _sqlite_pragmas(read_only: bool):
+    pragmas = [
+        f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT}",
+        f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}",
+        # Negativo = KiB en lugar de páginas
+        f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # WAL es persistente en el fichero: lectores concurrentes sin bloquear al escritor
+        pragmas += ["PRAGMA journal_mode = WAL", "PRAGMA synchronous = NORMAL"]
+    return pragmas
+
+
+def _apply_pragmas(target_engine, read_only: bool) -> None:
+    pragmas = _sqlite_pragmas(read_only)
+
+    @event.listens_for(target_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+# Escritura: creación de tablas y carga de datos
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options(pool=False))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Lectura: consultas de las peticiones (catálogo). Con el perfil read_mostly
+# usa su propio pool y conexiones en solo lectura; si no, el mismo engine.
+if _read_mostly:
+    read_engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options(pool=True))
+    _apply_pragmas(engine, read_only=False)
+    _apply_pragmas(read_engine, read_only=True)
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 # Export Base for use in seed.py
-__all__ = ["engine", "SessionLocal", "get_db", "Base"]
+__all__ = ["engine", "read_engine", "SessionLocal", "ReadSessionLocal", "get_db", "Base"]
 
 def get_db():
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
         yield db
     finally:
         db.close()
-
@@ -0,0 +1,179 @@
+"""Importación de ejercicios desde CSV o JSONL (catálogos grandes).
+
+    python -m db.importer ejercicios.csv [--format csv|jsonl] [--batch-size 1000]
+
+El fichero se lee por partes y se hace upsert por lotes, un lote por
+transacción: un ejercicio con el mismo nombre y equipamiento que uno
+existente lo actualiza y si no se inserta. Las filas inválidas se cuentan
+sin detener la importación. En una base nueva solo se crean las tablas: el
+catálogo inicial de db/seed.py no se siembra, así que la tabla queda solo con
+lo importado. Con el servidor en marcha, recargar después el catálogo con
+POST /api/catalog/refresh (cabecera X-Admin-Token con el valor de
+ADMIN_TOKEN).
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import bindparam, insert, select, update
+from models.exercise import Exercise
+from schemas.rows import ParsedRow, RowParser, detect_format
+from .database import engine
+from .seed import EXERCISE_COLUMNS, create_schema
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+READ_CHUNK_SIZE = 64 * 1024
+EQUIPMENT = ("gym", "bodyweight", "home")
+DIFFICULTIES = ("beginner", "intermediate", "advanced")
+PROGRESS_INTERVAL = 1.0  # segundos entre líneas de progreso
+# Errores de fila que se guardan para el informe (el resto solo se cuenta)
+MAX_REPORTED_ERRORS = 20
+
+ExerciseKey = Tuple[str, str]  # (name, equipment)
+
+
+class ImportStats:
+    __slots__ = ("read", "inserted", "updated", "duplicates", "invalid", "errors", "elapsed")
+
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.updated = 0
+        self.duplicates = 0  # repetidas dentro del mismo lote (gana la última)
+        self.invalid = 0
+        self.errors: List[str] = []
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.read} filas ({self.inserted} nuevas, {self.updated} actualizadas, "
+                f"{self.duplicates} repetidas, {self.invalid} inválidas) en {self.elapsed:.2f} s: "
+                f"{self.rows_per_second:.0f} filas/s")
+
+
+def exercise_values(row: ParsedRow) -> Dict[str, Optional[str]]:
+    # ValueError con el mensaje si la fila no es un ejercicio válido
+    if row.error is not None:
+        raise ValueError(row.error)
+    record = row.record
+    values: Dict[str, Optional[str]] = {}
+    for column in EXERCISE_COLUMNS:
+        value = record.get(column)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{column}: debe ser texto")
+        value = value.strip() if value else None
+        if value is None and column != "description":
+            raise ValueError(f"{column}: campo obligatorio")
+        values[column] = value
+    if values["equipment"] not in EQUIPMENT:
+        raise ValueError(f"equipment: debe ser uno de {', '.join(EQUIPMENT)}")
+    if values["difficulty"] not in DIFFICULTIES:
+        raise ValueError(f"difficulty: debe ser uno de {', '.join(DIFFICULTIES)}")
+    return values
+
+
+def iter_rows(chunks: Iterable[bytes], row_format: str) -> Iterator[ParsedRow]:
+    parser = RowParser(row_format)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def read_chunks(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _existing_keys() -> Dict[ExerciseKey, int]:
+    # La tabla no tiene restricción única: la deduplicación se hace aquí.
+    # Si ya hay repetidos, se actualiza el de id más bajo
+    keys: Dict[ExerciseKey, int] = {}
+    with engine.connect() as conn:
+        rows = conn.execute(select(Exercise.id, Exercise.name, Exercise.equipment).order_by(Exercise.id.desc()))
+        for exercise_id, name, equipment in rows:
+            keys[(name, equipment)] = exercise_id
+    return keys
+
+
+def _flush(batch: Dict[ExerciseKey, Dict], existing: Dict[ExerciseKey, int], stats: ImportStats) -> None:
+    inserts = [values for key, values in batch.items() if key not in existing]
+    updates = [dict(values, _id=existing[key]) for key, values in batch.items() if key in existing]
+    with engine.begin() as conn:
+        if inserts:
+            result = conn.execute(
+                insert(Exercise).returning(Exercise.id, Exercise.name, Exercise.equipment), inserts
+            )
+            for exercise_id, name, equipment in result:
+                existing[(name, equipment)] = exercise_id
+        if updates:
+            conn.execute(update(Exercise).where(Exercise.id == bindparam("_id")), updates)
+    stats.inserted += len(inserts)
+    stats.updated += len(updates)
+
+
+def import_exercises(chunks: Iterable[bytes], row_format: str,
+                     batch_size: int = IMPORT_BATCH_SIZE) -> ImportStats:
+    stats = ImportStats()
+    start = reported = time.perf_counter()
+    existing = _existing_keys()
+    batch: Dict[ExerciseKey, Dict] = {}
+    for row in iter_rows(chunks, row_format):
+        stats.read += 1
+        try:
+            values = exercise_values(row)
+        except ValueError as e:
+            stats.invalid += 1
+            if len(stats.errors) < MAX_REPORTED_ERRORS:
+                stats.errors.append(f"fila {row.index}: {e}")
+            continue
+        key = (values["name"], values["equipment"])
+        if key in batch:
+            stats.duplicates += 1
+        batch[key] = values
+        if len(batch) >= batch_size:
+            _flush(batch, existing, stats)
+            batch = {}
+            now = time.perf_counter()
+            if now - reported >= PROGRESS_INTERVAL:
+                reported = now
+                logger.info("%d filas, %.0f filas/s", stats.read, stats.read / (now - start))
+    if batch:
+        _flush(batch, existing, stats)
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Importar ejercicios desde CSV o JSONL")
+    parser.add_argument("path", help="fichero CSV (con cabecera) o JSONL")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="por defecto, según la extensión")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="filas por transacción")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    row_format = args.format or detect_format(args.path)
+    if row_format is None:
+        parser.error("no se reconoce el formato; indicar --format")
+    create_schema()
+    stats = import_exercises(read_chunks(args.path), row_format, args.batch_size)
+    for error in stats.errors:
+        print(error)
+    if stats.invalid > len(stats.errors):
+        print(f"... y {stats.invalid - len(stats.errors)} filas inválidas más")
+    print(f"Importadas {stats.summary()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,113 @@
+import logging
 import os
+import time
+from sqlalchemy import insert, select
 from models.exercise import Exercise
-from .database import engine, SessionLocal, Base
+from .database import engine, Base
 
-def init_db():
-    # Crear directorio si no existe (para Docker)
+logger = logging.getLogger(__name__)
+
+# Catálogo inicial: (name, muscle_group, equipment, difficulty, description)
+EXERCISES = [
+    # Pecho - Gym
+    ("Press de Banca", "pecho", "gym", "intermediate", "Press con barra"),
+    ("Press de Banca con Mancuernas", "pecho", "gym", "intermediate", "Press con mancuernas"),
+    ("Press Inclinado con Barra", "pecho", "gym", "intermediate", "Press inclinado"),
+    ("Aperturas con Mancuernas", "pecho", "gym", "beginner", "Chest flyes"),
+    # Pecho - Peso Corporal/Casa
+    ("Flexiones", "pecho", "bodyweight", "beginner", "Flexiones de brazos"),
+    ("Flexiones Diamante", "pecho", "bodyweight", "intermediate", "Diamond push-ups"),
+    ("Flexiones Inclinadas", "pecho", "bodyweight", "beginner", "Incline push-ups"),
+    ("Flexiones Declinadas", "pecho", "bodyweight", "advanced", "Decline push-ups"),
+    ("Flexiones con Palmada", "pecho", "bodyweight", "advanced", "Plyometric push-ups"),
+    ("Flexiones Arquero", "pecho", "bodyweight", "intermediate", "Archer push-ups"),
+    
+    # Espalda - Gym
+    ("Remo con Barra", "espalda", "gym", "intermediate", "Remo horizontal"),
+    ("Remo con Mancuernas", "espalda", "gym", "intermediate", "Dumbbell row"),
+    ("Dominadas", "espalda", "gym", "advanced", "Pull-ups"),
+    ("Peso Muerto", "espalda", "gym", "advanced", "Deadlift"),
+    ("Jalones al Pecho", "espalda", "gym", "beginner", "Lat pulldown"),
+    ("Remo T", "espalda", "gym", "intermediate", "T-bar row"),
+    # Espalda - Peso Corporal/Casa
+    ("Dominadas en Barra", "espalda", "bodyweight", "advanced", "Pull-ups en barra"),
+    ("Dominadas Asistidas", "espalda", "bodyweight", "intermediate", "Assisted pull-ups"),
+    ("Remo Invertido", "espalda", "bodyweight", "beginner", "Inverted row"),
+    ("Superman", "espalda", "bodyweight", "beginner", "Superman exercise"),
+    ("Remo con Silla", "espalda", "home", "beginner", "Chair row"),
+    ("Remo con Toalla", "espalda", "home", "intermediate", "Towel row"),
+    
+    # Piernas - Gym
+    ("Sentadillas", "piernas", "gym", "intermediate", "Squats con barra"),
+    ("Peso muerto Rumano", "piernas", "gym", "intermediate", "Romanian Deadlift"),
+    ("Sentadillas con Mancuernas", "piernas", "gym", "intermediate", "Goblet squats"),
+    ("Prensa", "piernas", "gym", "beginner", "Leg press"),
+    ("Sentadillas Búlgara", "piernas", "gym", "intermediate", "Bulgarian split squat"),
+    ("Zancadas", "piernas", "gym", "intermediate", "Lunges"),
+    ("Extensiones de Cuádriceps", "piernas", "gym", "beginner", "Leg extension"),
+    ("Curl de Femoral", "piernas", "gym", "beginner", "Leg curl"),
+    # Piernas - Peso Corporal/Casa
+    ("Sentadillas al Aire", "piernas", "bodyweight", "beginner", "Bodyweight squats"),
+    ("Pistol Squats", "piernas", "bodyweight", "advanced", "Single leg squats"),
+    ("Sentadillas con Salto", "piernas", "bodyweight", "intermediate", "Jump squats"),
+    ("Zancadas al Aire", "piernas", "bodyweight", "beginner", "Bodyweight lunges"),
+    ("Sentadillas Búlgara al Aire", "piernas", "bodyweight", "intermediate", "Bulgarian split squat sin peso"),
+    ("Sentadillas Sumo", "piernas", "bodyweight", "beginner", "Sumo squats"),
+    ("Elevación de Talones", "piernas", "bodyweight", "beginner", "Calf raises"),
+    ("Curl Nórdico", "piernas", "bodyweight", "advanced", "Nordic curl"),
+    ("Wall Sit", "piernas", "bodyweight", "intermediate", "Isometric wall sit"),
+    
+    # Hombros - Gym
+    ("Press Militar", "hombros", "gym", "intermediate", "Military press"),
+    ("Elevaciones Laterales", "hombros", "gym", "beginner", "Lateral raises"),
+    ("Press con Mancuernas", "hombros", "gym", "beginner", "Dumbbell press"),
+    ("Face Pulls", "hombros", "gym", "beginner", "Face pulls"),
+    ("Elevaciones Frontales", "hombros", "gym", "beginner", "Front raises"),
+    # Hombros - Peso Corporal/Casa
+    ("Flexiones Pino", "hombros", "bodyweight", "advanced", "Handstand push-ups"),
+    ("Flexiones Pike", "hombros", "bodyweight", "intermediate", "Pike push-ups"),
+    ("Elevaciones Laterales con Botellas", "hombros", "home", "beginner", "Lateral raises con peso casero"),
+    ("Plancha Lateral", "hombros", "bodyweight", "intermediate", "Side plank"),
+    
+    # Brazos - Gym
+    ("Curl con Barra", "brazos", "gym", "beginner", "Barbell curl"),
+    ("Curl con Mancuernas", "brazos", "gym", "beginner", "Dumbbell curl"),
+    ("Extensiones de Tríceps", "brazos", "gym", "beginner", "Tricep extensions"),
+    ("Curl Martillo", "brazos", "gym", "beginner", "Hammer curl"),
+    ("Curl Concentrado", "brazos", "gym", "beginner", "Concentration curl"),
+    # Brazos - Peso Corporal/Casa
+    ("Fondos", "brazos", "bodyweight", "intermediate", "Dips"),
+    ("Fondos con Sillas", "brazos", "home", "intermediate", "Chair dips"),
+    ("Flexiones Cerradas", "brazos", "bodyweight", "intermediate", "Close grip push-ups"),
+    ("Curl con Toalla", "brazos", "home", "beginner", "Towel curl"),
+    ("Extensiones de Tríceps con Silla", "brazos", "home", "beginner", "Tricep dips con silla"),
+    ("Flexiones de Tríceps", "brazos", "bodyweight", "intermediate", "Tricep push-ups"),
+    ("Curl Isométrico", "brazos", "bodyweight", "intermediate", "Isometric bicep hold"),
+    
+    # Core - Gym
+    ("Rueda Abdominal", "core", "home", "advanced", "Ab wheel"),
+    # Core - Peso Corporal/Casa
+    ("Plancha", "core", "bodyweight", "beginner", "Plank"),
+    ("Plancha Lateral", "core", "bodyweight", "intermediate", "Side plank"),
+    ("Crunches", "core", "bodyweight", "beginner", "Abdominales"),
+    ("Elevación de Piernas", "core", "bodyweight", "intermediate", "Leg raises"),
+    ("Mountain Climbers", "core", "bodyweight", "intermediate", "Escaladores"),
+    ("Russian Twist", "core", "bodyweight", "intermediate", "Giros rusos"),
+    ("Bicicleta", "core", "bodyweight", "beginner", "Bicycle crunches"),
+    ("Plancha con Elevación de Pierna", "core", "bodyweight", "intermediate", "Plank leg raise"),
+    ("V-Ups", "core", "bodyweight", "advanced", "V-sit ups"),
+    ("L-Sit", "core", "bodyweight", "advanced", "L-sit hold"),
+]
+
+EXERCISE_COLUMNS = ("name", "muscle_group", "equipment", "difficulty", "description")
+
+def init_db() -> int:
+    # Esquema y catálogo inicial si la tabla está vacía
+    create_schema()
+    return seed_exercises()
+
+def create_schema() -> None:
+    # Tablas e índices, sin datos. Crear directorio si no existe (para Docker)
     db_path = str(engine.url).replace("sqlite:///", "")
     if "/" in db_path:
         db_dir = "/".join(db_path.split("/")[:-1])
@@ -11,106 +115,18 @@ def init_db():
             os.makedirs(db_dir, exist_ok=True)
     
     Base.metadata.create_all(bind=engine)
-    db = SessionLocal()
-    
-    # Check if exercises already exist
-    if db.query(Exercise).first():
-        db.close()
-        return
-    
-    # Seed exercises
-    exercises = [
-        # Pecho - Gym
-        Exercise(name="Press de Banca", muscle_group="pecho", equipment="gym", difficulty="intermediate", description="Press con barra"),
-        Exercise(name="Press de Banca con Mancuernas", muscle_group="pecho", equipment="gym", difficulty="intermediate", description="Press con mancuernas"),
-        Exercise(name="Press Inclinado con Barra", muscle_group="pecho", equipment="gym", difficulty="intermediate", description="Press inclinado"),
-        Exercise(name="Aperturas con Mancuernas", muscle_group="pecho", equipment="gym", difficulty="beginner", description="Chest flyes"),
-        # Pecho - Peso Corporal/Casa
-        Exercise(name="Flexiones", muscle_group="pecho", equipment="bodyweight", difficulty="beginner", description="Flexiones de brazos"),
-        Exercise(name="Flexiones Diamante", muscle_group="pecho", equipment="bodyweight", difficulty="intermediate", description="Diamond push-ups"),
-        Exercise(name="Flexiones Inclinadas", muscle_group="pecho", equipment="bodyweight", difficulty="beginner", description="Incline push-ups"),
-        Exercise(name="Flexiones Declinadas", muscle_group="pecho", equipment="bodyweight", difficulty="advanced", description="Decline push-ups"),
-        Exercise(name="Flexiones con Palmada", muscle_group="pecho", equipment="bodyweight", difficulty="advanced", description="Plyometric push-ups"),
-        Exercise(name="Flexiones Arquero", muscle_group="pecho", equipment="bodyweight", difficulty="intermediate", description="Archer push-ups"),
-        
-        # Espalda - Gym
-        Exercise(name="Remo con Barra", muscle_group="espalda", equipment="gym", difficulty="intermediate", description="Remo horizontal"),
-        Exercise(name="Remo con Mancuernas", muscle_group="espalda", equipment="gym", difficulty="intermediate", description="Dumbbell row"),
-        Exercise(name="Dominadas", muscle_group="espalda", equipment="gym", difficulty="advanced", description="Pull-ups"),
-        Exercise(name="Peso Muerto", muscle_group="espalda", equipment="gym", difficulty="advanced", description="Deadlift"),
-        Exercise(name="Jalones al Pecho", muscle_group="espalda", equipment="gym", difficulty="beginner", description="Lat pulldown"),
-        Exercise(name="Remo T", muscle_group="espalda", equipment="gym", difficulty="intermediate", description="T-bar row"),
-        # Espalda - Peso Corporal/Casa
-        Exercise(name="Dominadas en Barra", muscle_group="espalda", equipment="bodyweight", difficulty="advanced", description="Pull-ups en barra"),
-        Exercise(name="Dominadas Asistidas", muscle_group="espalda", equipment="bodyweight", difficulty="intermediate", description="Assisted pull-ups"),
-        Exercise(name="Remo Invertido", muscle_group="espalda", equipment="bodyweight", difficulty="beginner", description="Inverted row"),
-        Exercise(name="Superman", muscle_group="espalda", equipment="bodyweight", difficulty="beginner", description="Superman exercise"),
-        Exercise(name="Remo con Silla", muscle_group="espalda", equipment="home", difficulty="beginner", description="Chair row"),
-        Exercise(name="Remo con Toalla", muscle_group="espalda", equipment="home", difficulty="intermediate", description="Towel row"),
-        
-        # Piernas - Gym
-        Exercise(name="Sentadillas", muscle_group="piernas", equipment="gym", difficulty="intermediate", description="Squats con barra"),
-        Exercise(name="Peso muerto Rumano", muscle_group="piernas", equipment="gym", difficulty="intermediate", description="Romanian Deadlift"),
-        Exercise(name="Sentadillas con Mancuernas", muscle_group="piernas", equipment="gym", difficulty="intermediate", description="Goblet squats"),
-        Exercise(name="Prensa", muscle_group="piernas", equipment="gym", difficulty="beginner", description="Leg press"),
-        Exercise(name="Sentadillas Búlgara", muscle_group="piernas", equipment="gym", difficulty="intermediate", description="Bulgarian split squat"),
-        Exercise(name="Zancadas", muscle_group="piernas", equipment="gym", difficulty="intermediate", description="Lunges"),
-        Exercise(name="Extensiones de Cuádriceps", muscle_group="piernas", equipment="gym", difficulty="beginner", description="Leg extension"),
-        Exercise(name="Curl de Femoral", muscle_group="piernas", equipment="gym", difficulty="beginner", description="Leg curl"),
-        # Piernas - Peso Corporal/Casa
-        Exercise(name="Sentadillas al Aire", muscle_group="piernas", equipment="bodyweight", difficulty="beginner", description="Bodyweight squats"),
-        Exercise(name="Pistol Squats", muscle_group="piernas", equipment="bodyweight", difficulty="advanced", description="Single leg squats"),
-        Exercise(name="Sentadillas con Salto", muscle_group="piernas", equipment="bodyweight", difficulty="intermediate", description="Jump squats"),
-        Exercise(name="Zancadas al Aire", muscle_group="piernas", equipment="bodyweight", difficulty="beginner", description="Bodyweight lunges"),
-        Exercise(name="Sentadillas Búlgara al Aire", muscle_group="piernas", equipment="bodyweight", difficulty="intermediate", description="Bulgarian split squat sin peso"),
-        Exercise(name="Sentadillas Sumo", muscle_group="piernas", equipment="bodyweight", difficulty="beginner", description="Sumo squats"),
-        Exercise(name="Elevación de Talones", muscle_group="piernas", equipment="bodyweight", difficulty="beginner", description="Calf raises"),
-        Exercise(name="Curl Nórdico", muscle_group="piernas", equipment="bodyweight", difficulty="advanced", description="Nordic curl"),
-        Exercise(name="Wall Sit", muscle_group="piernas", equipment="bodyweight", difficulty="intermediate", description="Isometric wall sit"),
-        
-        # Hombros - Gym
-        Exercise(name="Press Militar", muscle_group="hombros", equipment="gym", difficulty="intermediate", description="Military press"),
-        Exercise(name="Elevaciones Laterales", muscle_group="hombros", equipment="gym", difficulty="beginner", description="Lateral raises"),
-        Exercise(name="Press con Mancuernas", muscle_group="hombros", equipment="gym", difficulty="beginner", description="Dumbbell press"),
-        Exercise(name="Face Pulls", muscle_group="hombros", equipment="gym", difficulty="beginner", description="Face pulls"),
-        Exercise(name="Elevaciones Frontales", muscle_group="hombros", equipment="gym", difficulty="beginner", description="Front raises"),
-        # Hombros - Peso Corporal/Casa
-        Exercise(name="Flexiones Pino", muscle_group="hombros", equipment="bodyweight", difficulty="advanced", description="Handstand push-ups"),
-        Exercise(name="Flexiones Pike", muscle_group="hombros", equipment="bodyweight", difficulty="intermediate", description="Pike push-ups"),
-        Exercise(name="Elevaciones Laterales con Botellas", muscle_group="hombros", equipment="home", difficulty="beginner", description="Lateral raises con peso casero"),
-        Exercise(name="Plancha Lateral", muscle_group="hombros", equipment="bodyweight", difficulty="intermediate", description="Side plank"),
-        
-        # Brazos - Gym
-        Exercise(name="Curl con Barra", muscle_group="brazos", equipment="gym", difficulty="beginner", description="Barbell curl"),
-        Exercise(name="Curl con Mancuernas", muscle_group="brazos", equipment="gym", difficulty="beginner", description="Dumbbell curl"),
-        Exercise(name="Extensiones de Tríceps", muscle_group="brazos", equipment="gym", difficulty="beginner", description="Tricep extensions"),
-        Exercise(name="Curl Martillo", muscle_group="brazos", equipment="gym", difficulty="beginner", description="Hammer curl"),
-        Exercise(name="Curl Concentrado", muscle_group="brazos", equipment="gym", difficulty="beginner", description="Concentration curl"),
-        # Brazos - Peso Corporal/Casa
-        Exercise(name="Fondos", muscle_group="brazos", equipment="bodyweight", difficulty="intermediate", description="Dips"),
-        Exercise(name="Fondos con Sillas", muscle_group="brazos", equipment="home", difficulty="intermediate", description="Chair dips"),
-        Exercise(name="Flexiones Cerradas", muscle_group="brazos", equipment="bodyweight", difficulty="intermediate", description="Close grip push-ups"),
-        Exercise(name="Curl con Toalla", muscle_group="brazos", equipment="home", difficulty="beginner", description="Towel curl"),
-        Exercise(name="Extensiones de Tríceps con Silla", muscle_group="brazos", equipment="home", difficulty="beginner", description="Tricep dips con silla"),
-        Exercise(name="Flexiones de Tríceps", muscle_group="brazos", equipment="bodyweight", difficulty="intermediate", description="Tricep push-ups"),
-        Exercise(name="Curl Isométrico", muscle_group="brazos", equipment="bodyweight", difficulty="intermediate", description="Isometric bicep hold"),
-        
-        # Core - Gym
-        Exercise(name="Rueda Abdominal", muscle_group="core", equipment="home", difficulty="advanced", description="Ab wheel"),
-        # Core - Peso Corporal/Casa
-        Exercise(name="Plancha", muscle_group="core", equipment="bodyweight", difficulty="beginner", description="Plank"),
-        Exercise(name="Plancha Lateral", muscle_group="core", equipment="bodyweight", difficulty="intermediate", description="Side plank"),
-        Exercise(name="Crunches", muscle_group="core", equipment="bodyweight", difficulty="beginner", description="Abdominales"),
-        Exercise(name="Elevación de Piernas", muscle_group="core", equipment="bodyweight", difficulty="intermediate", description="Leg raises"),
-        Exercise(name="Mountain Climbers", muscle_group="core", equipment="bodyweight", difficulty="intermediate", description="Escaladores"),
-        Exercise(name="Russian Twist", muscle_group="core", equipment="bodyweight", difficulty="intermediate", description="Giros rusos"),
-        Exercise(name="Bicicleta", muscle_group="core", equipment="bodyweight", difficulty="beginner", description="Bicycle crunches"),
-        Exercise(name="Plancha con Elevación de Pierna", muscle_group="core", equipment="bodyweight", difficulty="intermediate", description="Plank leg raise"),
-        Exercise(name="V-Ups", muscle_group="core", equipment="bodyweight", difficulty="advanced", description="V-sit ups"),
-        Exercise(name="L-Sit", muscle_group="core", equipment="bodyweight", difficulty="advanced", description="L-sit hold"),
-    ]
-    
-    db.add_all(exercises)
-    db.commit()
-    db.close()
+    # create_all no añade índices nuevos a tablas que ya existen
+    for index in Exercise.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
 
+def seed_exercises() -> int:
+    # Inserción masiva con Core (un solo executemany en una transacción);
+    # devuelve los ejercicios insertados, 0 si la tabla ya tenía datos
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        if conn.execute(select(Exercise.id).limit(1)).first() is not None:
+            return 0
+        rows = [dict(zip(EXERCISE_COLUMNS, exercise)) for exercise in EXERCISES]
+        conn.execute(insert(Exercise), rows)
+    logger.info("Sembrados %d ejercicios en %.1f ms", len(rows), (time.perf_counter() - start) * 1000)
+    return len(rows)
@@ -1,4 +1,41 @@
-from .clips_engine import ClipsEngine
-
-__all__ = ["ClipsEngine"]
+from .clips_engine import IO_CONSTRUCTS, RULES_PATH, ClipsEngine, canonical_key, plan_seed, regenerate_day
+from .catalog import ExerciseCatalog, ExerciseRecord, get_catalog, refresh_catalog
+from .rules_image import snapshot_rules
+from .pool import EnginePool, PoolTimeout
+from .executor import RecommendationExecutor
+from .admission import AdmissionController, AdmissionRejected
+from .cache import RecommendationCache
+from .profiler import RuleProfiler, rule_profiler
+from .programs import ProgramNotFound, ProgramStore, TrainingProgram
+from .sessions import RecommendationSession, SessionNotFound, SessionStore
+from .reload import ReloadError, RuntimeReloader
 
+__all__ = [
+    "IO_CONSTRUCTS",
+    "RULES_PATH",
+    "ClipsEngine",
+    "canonical_key",
+    "plan_seed",
+    "regenerate_day",
+    "ExerciseCatalog",
+    "ExerciseRecord",
+    "get_catalog",
+    "refresh_catalog",
+    "snapshot_rules",
+    "EnginePool",
+    "PoolTimeout",
+    "RecommendationExecutor",
+    "AdmissionController",
+    "AdmissionRejected",
+    "RecommendationCache",
+    "RuleProfiler",
+    "rule_profiler",
+    "ProgramNotFound",
+    "ProgramStore",
+    "TrainingProgram",
+    "RecommendationSession",
+    "SessionNotFound",
+    "SessionStore",
+    "ReloadError",
+    "RuntimeReloader",
+]
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+
+# Ejecuciones simultáneas del motor (0 = capacidad del ejecutor)
+MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "0"))
+# Peticiones que pueden esperar turno; el resto se rechaza con 429
+MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+# Espera máxima en cola antes de responder 503
+QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+# Valor de la cabecera Retry-After (segundos)
+RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, message: str, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Límite de concurrencia con cola acotada para el event loop.
+
+    Con la cola llena se rechaza al instante (429); si el turno no llega
+    dentro de queue_timeout se rechaza con 503.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int = MAX_QUEUE,
+                 queue_timeout: float = QUEUE_TIMEOUT, retry_after: int = RETRY_AFTER):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency debe ser al menos 1")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._active = 0
+        self._waiting = 0
+        self._max_waiting = 0
+        self._admitted = 0
+        self._rejected_full = 0
+        self._rejected_timeout = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked() or self._waiting:
+            if self._waiting >= self.max_queue:
+                self._rejected_full += 1
+                raise AdmissionRejected(429, "Demasiadas peticiones en cola", self.retry_after)
+            self._waiting += 1
+            self._max_waiting = max(self._max_waiting, self._waiting)
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._rejected_timeout += 1
+                raise AdmissionRejected(503, "Tiempo de espera en cola agotado", self.retry_after)
+            finally:
+                self._waiting -= 1
+                waited = time.perf_counter() - start
+                self._wait_time += waited
+                self._max_wait_time = max(self._max_wait_time, waited)
+        else:
+            await self._semaphore.acquire()
+
+        self._active += 1
+        self._admitted += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "queue_depth": self._waiting,
+            "max_queue_depth": self._max_waiting,
+            "admitted": self._admitted,
+            "rejected_queue_full": self._rejected_full,
+            "rejected_timeout": self._rejected_timeout,
+            "wait_time_total": round(self._wait_time, 6),
+            "wait_time_max": round(self._max_wait_time, 6),
+        }
@@ -0,0 +1,27 @@
+"""Genera la imagen binaria de las reglas: python -m engine.build_image [--check]"""
+import argparse
+import os
+import sys
+from .clips_engine import ClipsEngine, IO_CONSTRUCTS, RULES_PATH
+from .rules_image import image_path, save_image
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Imagen binaria de las reglas CLIPS")
+    parser.add_argument("--check", action="store_true",
+                        help="solo comprobar si la imagen existe y está al día (código 1 si no)")
+    args = parser.parse_args(argv)
+
+    path = image_path(RULES_PATH, IO_CONSTRUCTS)
+    if args.check:
+        current = os.path.exists(path)
+        print(f"{path}: {'al día' if current else 'no existe o está desactualizada'}")
+        return 0 if current else 1
+    engine = ClipsEngine(image_mode="off")
+    save_image(engine.env, path)
+    print(f"Imagen de reglas guardada en {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+# Entradas máximas (0 = caché desactivada) y vida de cada entrada en segundos
+CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.getenv("RECOMMENDATION_CACHE_TTL", "300"))
+
+
+class RecommendationCache:
+    """Caché LRU con TTL y coalescencia de peticiones idénticas.
+
+    Pensada para usarse desde el event loop: si una clave ya se está
+    calculando, las peticiones siguientes esperan ese mismo resultado. Si la
+    petición que lo calcula se cancela, las que esperaban no se cancelan con
+    ella: una vuelve a calcularlo y las demás esperan a esa.
+    """
+
+    def __init__(self, max_size: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            self._expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            value = self.get(key)
+            if value is not None:
+                self._hits += 1
+                return value
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            self._coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Si se canceló quien calculaba (y no esta petición), volver a
+                # empezar: la primera en llegar aquí pasa a calcularlo
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        self._misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Marcar la excepción como recuperada si nadie más esperaba
+            future.exception()
+            raise
+        else:
+            self.put(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "size": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self._hits,
+            "misses": self._misses,
+            "coalesced": self._coalesced,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+        }
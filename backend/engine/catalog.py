@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models import Exercise
+from db import ReadSessionLocal
+from .selection import SelectionPools
+
+# Qué ejercicios entran para cada acceso a equipamiento:
+# gym solo gym, bodyweight solo bodyweight, home incluye home y bodyweight
+EQUIPMENT_SOURCES = {
+    "gym": ("gym",),
+    "bodyweight": ("bodyweight",),
+    "home": ("home", "bodyweight"),
+}
+
+# Páginas de GET /api/exercises serializadas que se guardan por snapshot
+EXERCISE_PAGE_CACHE = int(os.getenv("EXERCISE_PAGE_CACHE", "256"))
+
+
+class ExerciseRecord(NamedTuple):
+    id: int
+    name: str
+    muscle_group: str
+    equipment: str
+    difficulty: str
+    description: Optional[str]
+
+
+class ExerciseCatalog:
+    """Snapshot inmutable de la tabla exercises, indexado por equipamiento y grupo."""
+
+    __slots__ = ("exercises", "version", "name_ids", "_index", "_by_id", "_pools", "_json",
+                 "_filters", "_pages", "_lock")
+
+    def __init__(self, exercises: Iterable[ExerciseRecord]):
+        self.exercises: Tuple[ExerciseRecord, ...] = tuple(exercises)
+        self._by_id = {ex.id: ex for ex in self.exercises}
+
+        index: Dict[str, Dict[str, Tuple[ExerciseRecord, ...]]] = {}
+        for equipment, sources in EQUIPMENT_SOURCES.items():
+            groups: Dict[str, list] = {}
+            for ex in self.exercises:
+                if ex.equipment in sources:
+                    groups.setdefault(ex.muscle_group, []).append(ex)
+            index[equipment] = {group: tuple(items) for group, items in groups.items()}
+        self._index = index
+
+        # Id entero por nombre para llevar los ejercicios usados en un conjunto
+        name_ids: Dict[str, int] = {}
+        for ex in self.exercises:
+            name_ids.setdefault(ex.name, len(name_ids))
+        self.name_ids = name_ids
+        self._pools = {equipment: SelectionPools(groups, name_ids) for equipment, groups in index.items()}
+
+        digest = hashlib.sha256()
+        for ex in self.exercises:
+            digest.update(repr(tuple(ex)).encode())
+        self.version = digest.hexdigest()[:16]
+        self._json: Optional[bytes] = None
+        self._filters: "OrderedDict[tuple, List[int]]" = OrderedDict()
+        self._pages: "OrderedDict[tuple, bytes]" = OrderedDict()
+        # GET /api/exercises se sirve desde el threadpool: el lock protege los
+        # LRU; filtrar y serializar se hace fuera (repetirlo es inofensivo)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_db(cls, db: Session) -> "ExerciseCatalog":
+        # Consulta Core sobre la conexión de la sesión: sin la carga de filas
+        # del ORM, que en catálogos grandes es la mayor parte del tiempo
+        rows = db.connection().execute(select(
+            Exercise.id,
+            Exercise.name,
+            Exercise.muscle_group,
+            Exercise.equipment,
+            Exercise.difficulty,
+            Exercise.description,
+        ).order_by(Exercise.id))
+        return cls(ExerciseRecord(*row) for row in rows)
+
+    def groups(self, equipment: str) -> Dict[str, Tuple[ExerciseRecord, ...]]:
+        return self._index.get(equipment, {})
+
+    def group(self, equipment: str, muscle_group: str) -> Tuple[ExerciseRecord, ...]:
+        return self.groups(equipment).get(muscle_group, ())
+
+    def selection_pools(self, equipment: str) -> SelectionPools:
+        pools = self._pools.get(equipment)
+        if pools is None:
+            pools = SelectionPools({}, self.name_ids)
+        return pools
+
+    def to_json(self) -> bytes:
+        # Catálogo para los clientes (resuelve los ids de las respuestas
+        # compactas); el snapshot es inmutable, así que se serializa una vez
+        if self._json is None:
+            self._json = json.dumps({
+                "version": self.version,
+                "columnas": list(ExerciseRecord._fields),
+                "ejercicios": [list(ex) for ex in self.exercises],
+            }, ensure_ascii=False, separators=(",", ":")).encode()
+        return self._json
+
+    def exercises_page(self, equipment: Optional[str], muscle_group: Optional[str],
+                       difficulty: Optional[str], offset: int, limit: int) -> bytes:
+        # Cuerpo de GET /api/exercises. Las páginas pedidas quedan serializadas
+        # en un LRU, así que repetir una consulta no cuesta nada; al refrescar
+        # el catálogo se descarta todo. Solo se serializan las filas de la página
+        key = (equipment, muscle_group, difficulty, offset, limit)
+        with self._lock:
+            body = self._pages.get(key)
+            if body is not None:
+                self._pages.move_to_end(key)
+                return body
+        matches = self._filter(equipment, muscle_group, difficulty)
+        body = json.dumps({
+            "version": self.version,
+            "total": len(matches),
+            "offset": offset,
+            "limit": limit,
+            "ejercicios": [self.exercises[i]._asdict() for i in matches[offset:offset + limit]],
+        }, ensure_ascii=False, separators=(",", ":")).encode()
+        with self._lock:
+            self._pages[key] = body
+            if len(self._pages) > EXERCISE_PAGE_CACHE:
+                self._pages.popitem(last=False)
+        return body
+
+    def _filter(self, equipment: Optional[str], muscle_group: Optional[str],
+                difficulty: Optional[str]) -> List[int]:
+        # Posiciones (en orden de id) de los ejercicios que cumplen los filtros
+        key = (equipment, muscle_group, difficulty)
+        with self._lock:
+            matches = self._filters.get(key)
+            if matches is not None:
+                self._filters.move_to_end(key)
+                return matches
+        matches = [
+            i for i, ex in enumerate(self.exercises)
+            if (equipment is None or ex.equipment == equipment)
+            and (muscle_group is None or ex.muscle_group == muscle_group)
+            and (difficulty is None or ex.difficulty == difficulty)
+        ]
+        with self._lock:
+            self._filters[key] = matches
+            if len(self._filters) > EXERCISE_PAGE_CACHE:
+                self._filters.popitem(last=False)
+        return matches
+
+    def get(self, exercise_id: int) -> Optional[ExerciseRecord]:
+        return self._by_id.get(exercise_id)
+
+    def __len__(self) -> int:
+        return len(self.exercises)
+
+
+_catalog: Optional[ExerciseCatalog] = None
+
+
+def load_catalog(db: Optional[Session] = None) -> ExerciseCatalog:
+    # Leer la tabla sin publicar el snapshot (la recarga lo valida antes)
+    if db is None:
+        session = ReadSessionLocal()
+        try:
+            return ExerciseCatalog.from_db(session)
+        finally:
+            session.close()
+    return ExerciseCatalog.from_db(db)
+
+
+def set_catalog(catalog: ExerciseCatalog) -> None:
+    # Reemplazar el snapshot de forma atómica
+    global _catalog
+    _catalog = catalog
+
+
+def refresh_catalog(db: Optional[Session] = None) -> ExerciseCatalog:
+    catalog = load_catalog(db)
+    set_catalog(catalog)
+    return catalog
+
+
+def get_catalog() -> ExerciseCatalog:
+    catalog = _catalog
+    if catalog is None:
+        catalog = refresh_catalog()
+    return catalog
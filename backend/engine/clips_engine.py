@@ -1,82 +1,268 @@
 import clips
+import hashlib
 import os
-from typing import List
-from schemas import UserInput, Recommendation, UserProfile, NutritionalPlan, DayWorkout, ExerciseRecommendation
-from sqlalchemy.orm import Session
-from models import Exercise
 import random
+import time
+from typing import Dict, List, Optional, Tuple
+from schemas import UserInput, Recommendation, UserProfile, NutritionalPlan, DayWorkout
+from .catalog import ExerciseCatalog
+from .rules_image import IMAGE_MODE, image_key, load_rules
+from .prescriptions import PlanPrescriptions, plan_prescriptions
+from .profiler import RuleProfiler, rule_profiler
+from .days import build_plan, exercise_rec, rebuild_day
+from .selection import ExerciseSelector
+
+# Reglas en la misma carpeta que el motor
+RULES_PATH = os.path.join(os.path.dirname(__file__), 'clips_rules.clp')
+
+def canonical_key(user_input: UserInput) -> str:
+    # Representación estable del input (orden de campos fijo, números normalizados)
+    return user_input.model_dump_json()
+
+def plan_seed(user_input: UserInput) -> int:
+    # Semilla explícita o derivada del perfil (sin el nombre): mismo perfil, mismo plan
+    if user_input.seed is not None:
+        return user_input.seed
+    profile = user_input.model_dump_json(exclude={"nombre", "seed"})
+    return int.from_bytes(hashlib.sha256(profile.encode()).digest()[:8], "big")
+
+# Construcciones de entrada/salida entre Python y las reglas:
+# - iniciar-evaluacion afirma usuario y resultados a partir de valores tipados
+#   (sin construir ni parsear texto)
+# - las reglas emitir-* (salience baja, se disparan al final) envían los
+#   resultados a Python a través de la función emitir, en una sola pasada
+# - actualizar-usuario, invalidar-resultados, retirar-consejos y retirar-plan
+#   permiten reevaluar sobre la memoria de trabajo de una evaluación anterior
+#   (sesiones, update_recommendations); las emitir-* envían entonces solo lo
+#   que cambia
+IO_CONSTRUCTS = (
+    """(deffunction iniciar-evaluacion (?nombre ?edad ?sexo ?peso ?altura ?nivel ?objetivo ?frecuencia ?equipamiento ?lesiones)
+       (assert (usuario (nombre ?nombre) (edad ?edad) (sexo ?sexo) (peso ?peso) (altura ?altura)
+                        (nivel ?nivel) (objetivo ?objetivo) (frecuencia ?frecuencia)
+                        (equipamiento ?equipamiento) (lesiones ?lesiones)))
+       (assert (resultados (imc 0.0) (tmb 0.0) (calorias 0) (proteinas 0) (carbohidratos 0)
+                           (grasas 0) (agua 0.0) (sueno 0) (comidas 0) (imc-categoria "")))
+       TRUE)""",
+    """(defrule emitir-resultados
+       (declare (salience -100))
+       (resultados (imc ?imc) (imc-categoria ?categoria) (calorias ?calorias) (proteinas ?proteinas)
+                   (carbohidratos ?carbohidratos) (grasas ?grasas) (agua ?agua) (sueno ?sueno) (comidas ?comidas))
+       =>
+       (emitir resultados ?imc ?categoria ?calorias ?proteinas ?carbohidratos ?grasas ?agua ?sueno ?comidas))""",
+    """(defrule emitir-consejo
+       (declare (salience -100))
+       ?f <- (consejo (mensaje ?mensaje) (fuente ?fuente))
+       =>
+       (emitir consejo (fact-index ?f) ?fuente ?mensaje))""",
+    """(defrule emitir-plan
+       (declare (salience -100))
+       (plan-entrenamiento (tipo-split ?split))
+       =>
+       (emitir plan ?split))""",
+    """(deffunction actualizar-usuario (?nombre ?edad ?sexo ?peso ?altura ?nivel ?objetivo ?frecuencia ?equipamiento ?lesiones)
+       (do-for-fact ((?u usuario)) TRUE
+          (modify ?u (nombre ?nombre) (edad ?edad) (sexo ?sexo) (peso ?peso) (altura ?altura)
+                     (nivel ?nivel) (objetivo ?objetivo) (frecuencia ?frecuencia)
+                     (equipamiento ?equipamiento) (lesiones ?lesiones))))""",
+    # Vuelve a 0 los resultados indicados para que sus reglas se disparen otra vez
+    """(deffunction invalidar-resultados (?imc ?tmb ?calorias ?macros ?agua ?comidas)
+       (do-for-fact ((?r resultados)) TRUE
+          (modify ?r (imc (if ?imc then 0.0 else ?r:imc))
+                     (imc-categoria (if ?imc then "" else ?r:imc-categoria))
+                     (tmb (if ?tmb then 0.0 else ?r:tmb))
+                     (calorias (if ?calorias then 0 else ?r:calorias))
+                     (proteinas (if ?macros then 0 else ?r:proteinas))
+                     (carbohidratos (if ?macros then 0 else ?r:carbohidratos))
+                     (grasas (if ?macros then 0 else ?r:grasas))
+                     (agua (if ?agua then 0.0 else ?r:agua))
+                     (sueno (if ?agua then 0 else ?r:sueno))
+                     (comidas (if ?comidas then 0 else ?r:comidas)))))""",
+    """(deffunction retirar-consejos ($?fuentes)
+       (do-for-all-facts ((?c consejo)) (member$ ?c:fuente ?fuentes) (retract ?c)))""",
+    """(deffunction retirar-plan ()
+       (do-for-all-facts ((?p plan-entrenamiento)) TRUE (retract ?p)))""",
+)
+
+# Orden de los consejos en la respuesta: por fuente y, dentro de cada una, por
+# índice de hecho (el mismo que da una evaluación completa)
+CONSEJO_FUENTES = ("imc", "objetivo", "nivel", "edad", "general")
+_FUENTE_RANK = {fuente: rank for rank, fuente in enumerate(CONSEJO_FUENTES)}
+
+# Reevaluación incremental (refleja clips_rules.clp): campos de UserInput de los
+# que depende cada grupo de resultados y cada fuente de consejos. Las reglas de
+# resultados solo se disparan con el valor a 0; invalidar tmb arrastra calorías
+# y estas los macros.
+RESULT_DEPENDENCIES = {
+    "imc": ("peso", "altura"),
+    "tmb": ("sexo", "peso", "altura", "edad"),
+    "calorias": ("objetivo", "frecuencia_semanal"),
+    "macros": ("objetivo", "peso"),
+    "agua": ("peso", "frecuencia_semanal"),
+    "comidas": ("objetivo",),
+}
+CONSEJO_DEPENDENCIES = {
+    "objetivo": ("objetivo",),
+    "nivel": ("nivel_fitness",),
+    "edad": ("edad",),
+}
+# Campos que cambian el plan de entrenamiento (el split sale de la frecuencia)
+# y los que solo cambian las prescripciones de los ejercicios ya elegidos
+PLAN_FIELDS = ("frecuencia_semanal", "acceso_equipamiento", "seed")
+# Campos que leen las reglas (el resto no hace falta pasarlo a CLIPS)
+RULE_FIELDS = frozenset(
+    field for fields in (*RESULT_DEPENDENCIES.values(), *CONSEJO_DEPENDENCIES.values()) for field in fields
+)
+PRESCRIPTION_FIELDS = ("nivel_fitness", "lesion")
+
+EQUIPMENT_MAP = {
+    "gimnasio_completo": "gym",
+    "peso_corporal": "bodyweight",
+    "entrenamiento_casa": "home",
+}
+
+
+def changed_fields(previous: UserInput, user_input: UserInput) -> frozenset:
+    return frozenset(name for name in UserInput.model_fields
+                     if getattr(previous, name) != getattr(user_input, name))
+
+
+def lesion_info(user_input: UserInput) -> Optional[dict]:
+    if user_input.lesion and user_input.lesion.tipo and user_input.lesion.tipo != "ninguna":
+        return {
+            'tipo': user_input.lesion.tipo,
+            'zona': user_input.lesion.zona
+        }
+    return None
+
+
+def regenerate_day(user_input: UserInput, plan: List[DayWorkout], index: int,
+                   catalog: ExerciseCatalog) -> DayWorkout:
+    # Sustituye plan[index] sin reglas ni base de datos: solo los pools del
+    # catálogo en memoria y la tabla de prescripciones (engine/days.py)
+    equipment = EQUIPMENT_MAP.get(user_input.acceso_equipamiento, "gym")
+    return rebuild_day(
+        plan,
+        index,
+        catalog.selection_pools(equipment),
+        catalog.name_ids,
+        plan_prescriptions(user_input.nivel_fitness, lesion_info(user_input)),
+        plan_seed(user_input),
+    )
 
 class ClipsEngine:
-    def __init__(self):
-        self.env = clips.Environment()
-        # Cargar reglas desde la misma carpeta
-        rules_path = os.path.join(os.path.dirname(__file__), 'clips_rules.clp')
-        self.env.load(rules_path)
+    def __init__(self, rules_path: str = RULES_PATH, image_mode: str = IMAGE_MODE,
+                 profiler: RuleProfiler = rule_profiler):
+        # La función solo referencia la lista de salida: clipspy guarda las
+        # funciones en un registro global y no debe retener al motor
+        self._output: List[tuple] = []
+        output = self._output
+        def emitir(*values):
+            output.append(values)
+        def new_environment():
+            env = clips.Environment()
+            env.define_function(emitir, 'emitir')
+            return env
+        start = time.perf_counter()
+        # Imagen binaria de las reglas si está al día; si no, el .clp como texto
+        self.env, self.rules_source = load_rules(new_environment, rules_path, IO_CONSTRUCTS, image_mode)
+        self.load_time = time.perf_counter() - start
+        # Versión de las reglas con que se evalúa (la misma clave que la imagen)
+        self.rules_path = rules_path
+        self.rules_version = image_key(rules_path, IO_CONSTRUCTS)
+        self._iniciar = self.env.find_function('iniciar-evaluacion')
+        self._actualizar = self.env.find_function('actualizar-usuario')
+        self._invalidar = self.env.find_function('invalidar-resultados')
+        self._retirar_consejos = self.env.find_function('retirar-consejos')
+        self._retirar_plan = self.env.find_function('retirar-plan')
+        # Perfil cuya evaluación está en la memoria de trabajo y lo emitido
+        # por las reglas para ella (consejos por índice de hecho)
+        self._evaluated: Optional[UserInput] = None
+        self._resultados = None
+        self._consejos: Dict[int, tuple] = {}
+        self._split = None
+        self.runs = 0
+        # Estadísticas por regla (engine/profiler.py), solo si está activado
+        self.profiler = profiler
     
-    def get_recommendations(self, user_input: UserInput, db: Session) -> Recommendation:
-        # Reset environment
-        self.env.reset()
-        
-        # Assert user facts
-        lesion_tipo = user_input.lesion.tipo if user_input.lesion else "ninguna"
-        lesion_zona = user_input.lesion.zona if user_input.lesion else "ninguna"
-        
-        user_fact = f"""(usuario 
-            (nombre "{user_input.nombre}")
-            (edad {user_input.edad})
-            (sexo {user_input.sexo})
-            (peso {user_input.peso})
-            (altura {user_input.altura})
-            (nivel {user_input.nivel_fitness})
-            (objetivo {user_input.objetivo})
-            (frecuencia {user_input.frecuencia_semanal})
-            (equipamiento {user_input.acceso_equipamiento})
-            (lesiones "{lesion_tipo}:{lesion_zona}"))"""
-        
-        # Initialize results
-        results_fact = """(resultados 
-            (imc 0.0) 
-            (tmb 0.0) 
-            (calorias 0) 
-            (proteinas 0) 
-            (carbohidratos 0) 
-            (grasas 0) 
-            (agua 0.0) 
-            (sueno 0) 
-            (comidas 0) 
-            (imc-categoria ""))"""
-        
-        self.env.assert_string(user_fact)
-        self.env.assert_string(results_fact)
-        
-        # Run rules
-        self.env.run()
-        
-        # Extract results
-        resultados = None
-        for fact in self.env.facts():
-            if fact.template.name == 'resultados':
-                resultados = fact
-                break
+    def get_recommendations(self, user_input: UserInput, catalog: ExerciseCatalog,
+                            timings: Optional[Dict] = None) -> Recommendation:
+        # timings (opcional) recibe la duración de cada etapa y el split
+        start = time.perf_counter()
+        resultados, consejos, split_type = self.evaluate_rules(user_input)
         
-        # Extract consejos
-        consejos = []
-        for fact in self.env.facts():
-            if fact.template.name == 'consejo':
-                consejos.append(fact['mensaje'])
+        # Build workout plan
+        rules_done = time.perf_counter()
+        plan_entrenamiento = self._generate_workout_plan(
+            user_input, 
+            split_type,
+            catalog,
+            lesion_info(user_input),
+            random.Random(plan_seed(user_input))
+        )
+        if timings is not None:
+            timings["split"] = split_type
+            timings["engine_run"] = rules_done - start
+            timings["plan_generation"] = time.perf_counter() - rules_done
         
-        # Extract plan info
-        plan_info = None
-        for fact in self.env.facts():
-            if fact.template.name == 'plan-entrenamiento':
-                plan_info = fact
-                break
+        return self._build_recommendation(user_input, resultados, consejos, plan_entrenamiento)
+    
+    def evaluate_rules(self, user_input: UserInput) -> Tuple[list, List[str], str]:
+        # Solo las reglas, sin plan de entrenamiento: resultados, consejos y
+        # split (lo que reproduce python -m engine.profiler)
+        self._run_rules(user_input)
+        return self._collect_output()
+
+    def update_recommendations(self, user_input: UserInput, plan: Optional[List[DayWorkout]],
+                               catalog: ExerciseCatalog, timings: Optional[Dict] = None) -> Tuple[Recommendation, str]:
+        """Reevalúa sobre la memoria de trabajo de la última evaluación de este motor.
+
+        Solo se modifican los campos de usuario que cambian y se vuelven a
+        disparar las reglas de los resultados y consejos que dependen de ellos.
+        plan (el de la evaluación anterior) se conserva salvo que cambie la
+        frecuencia (y con ella el split), el equipamiento o la semilla; si
+        solo cambian el nivel o la lesión se recalculan sus prescripciones.
+        Devuelve la recomendación y qué se hizo con el plan: "kept",
+        "represcribed" o "regenerated".
+        """
+        start = time.perf_counter()
+        previous = self._evaluated
+        if previous is None:
+            self._run_rules(user_input)
+            changed = frozenset(UserInput.model_fields)
+        else:
+            changed = changed_fields(previous, user_input)
+            self._update_rules(user_input, changed)
+        resultados, consejos, split_type = self._collect_output(incremental=previous is not None)
+
+        rules_done = time.perf_counter()
+        lesion = lesion_info(user_input)
+        action = "kept"
+        if changed.intersection(PLAN_FIELDS):
+            plan = None
+        elif plan is not None and changed.intersection(PRESCRIPTION_FIELDS):
+            plan = self._represcribe(plan, catalog, plan_prescriptions(user_input.nivel_fitness, lesion))
+            action = "represcribed"
+        if plan is None:
+            plan = self._generate_workout_plan(
+                user_input, split_type, catalog, lesion, random.Random(plan_seed(user_input))
+            )
+            action = "regenerated"
+        if timings is not None:
+            timings["split"] = split_type
+            timings["engine_run"] = rules_done - start
+            timings["plan_generation"] = time.perf_counter() - rules_done
+
+        return self._build_recommendation(user_input, resultados, consejos, plan), action
+    
+    def _build_recommendation(self, user_input: UserInput, resultados, consejos: List[str],
+                              plan_entrenamiento: List[DayWorkout]) -> Recommendation:
+        imc, imc_categoria, calorias, proteinas, carbohidratos, grasas, agua, sueno, comidas = resultados
         
         # Build user profile
         perfil = UserProfile(
             nombre=user_input.nombre,
-            imc=round(float(resultados['imc']), 1),
-            imc_categoria=resultados['imc-categoria'],
+            imc=round(float(imc), 1),
+            imc_categoria=imc_categoria,
             nivel=user_input.nivel_fitness.capitalize(),
             frecuencia=f"{user_input.frecuencia_semanal}x",
             objetivo=self._format_objetivo(user_input.objetivo)
@@ -84,28 +270,13 @@ class ClipsEngine:
         
         # Build nutritional plan
         plan_nutricional = NutritionalPlan(
-            calorias_diarias=int(resultados['calorias']),
-            agua_diaria=round(float(resultados['agua']), 1),
-            horas_sueno=int(resultados['sueno']),
-            comidas=int(resultados['comidas']),
-            proteinas=int(resultados['proteinas']),
-            carbohidratos=int(resultados['carbohidratos']),
-            grasas=int(resultados['grasas'])
-        )
-        
-        # Build workout plan
-        lesion_info = None
-        if user_input.lesion and user_input.lesion.tipo and user_input.lesion.tipo != "ninguna":
-            lesion_info = {
-                'tipo': user_input.lesion.tipo,
-                'zona': user_input.lesion.zona
-            }
-        
-        plan_entrenamiento = self._generate_workout_plan(
-            user_input, 
-            plan_info['tipo-split'] if plan_info else "Full Body",
-            db,
-            lesion_info
+            calorias_diarias=int(calorias),
+            agua_diaria=round(float(agua), 1),
+            horas_sueno=int(sueno),
+            comidas=int(comidas),
+            proteinas=int(proteinas),
+            carbohidratos=int(carbohidratos),
+            grasas=int(grasas)
         )
         
         return Recommendation(
@@ -115,6 +286,104 @@ class ClipsEngine:
             consejos=consejos
         )
     
+    def _usuario_values(self, user_input: UserInput) -> tuple:
+        # Slots de usuario en el orden de iniciar-evaluacion/actualizar-usuario
+        # (valores ya validados por UserInput)
+        lesion_tipo = (user_input.lesion.tipo if user_input.lesion else None) or "ninguna"
+        lesion_zona = (user_input.lesion.zona if user_input.lesion else None) or "ninguna"
+        return (
+            user_input.nombre,
+            user_input.edad,
+            clips.Symbol(user_input.sexo),
+            float(user_input.peso),
+            float(user_input.altura),
+            clips.Symbol(user_input.nivel_fitness),
+            clips.Symbol(user_input.objetivo),
+            user_input.frecuencia_semanal,
+            clips.Symbol(user_input.acceso_equipamiento),
+            f"{lesion_tipo}:{lesion_zona}"
+        )
+    
+    def _run_rules(self, user_input: UserInput) -> None:
+        # Reset environment
+        self.env.reset()
+        self.runs += 1
+        self._output.clear()
+        
+        # Assert user facts
+        self._iniciar(*self._usuario_values(user_input))
+        self._evaluated = user_input
+        
+        # Run rules
+        self._run()
+    
+    def _update_rules(self, user_input: UserInput, changed: frozenset) -> None:
+        # Sin reset: invalidar lo que depende de los campos cambiados, modificar
+        # el hecho usuario y dejar que las reglas recalculen solo eso
+        self._output.clear()
+        self._evaluated = user_input
+        if changed.isdisjoint(RULE_FIELDS):
+            return
+        self.runs += 1
+        invalid = {group: not changed.isdisjoint(fields) for group, fields in RESULT_DEPENDENCIES.items()}
+        invalid["calorias"] = invalid["calorias"] or invalid["tmb"]
+        invalid["macros"] = invalid["macros"] or invalid["calorias"]
+        if any(invalid.values()):
+            self._invalidar(*invalid.values())
+        fuentes = [clips.Symbol(fuente) for fuente, fields in CONSEJO_DEPENDENCIES.items()
+                   if not changed.isdisjoint(fields)]
+        if invalid["imc"]:
+            fuentes.append(clips.Symbol("imc"))
+        if fuentes:
+            self._retirar_consejos(*fuentes)
+            retired = {_FUENTE_RANK[fuente] for fuente in fuentes}
+            self._consejos = {index: c for index, c in self._consejos.items() if c[0] not in retired}
+        if "frecuencia_semanal" in changed:
+            self._retirar_plan()
+        self._actualizar(*self._usuario_values(user_input))
+        self._run()
+
+    def _run(self) -> None:
+        if self.profiler.enabled:
+            self.profiler.run(self.env)
+        else:
+            self.env.run()
+    
+    def _collect_output(self, incremental: bool = False):
+        # Collect results emitted by the emitir-* rules. Tras _update_rules
+        # solo llega lo que ha cambiado y se combina con lo anterior
+        if not incremental:
+            self._resultados = None
+            self._consejos = {}
+            self._split = "Full Body"
+        for kind, *values in self._output:
+            if kind == 'resultados':
+                self._resultados = values
+            elif kind == 'consejo':
+                index, fuente, mensaje = values
+                self._consejos[index] = (_FUENTE_RANK[fuente], index, mensaje)
+            elif kind == 'plan':
+                self._split = values[0]
+        if self._resultados is None:
+            raise RuntimeError("Las reglas no produjeron resultados")
+        consejos = [mensaje for _, _, mensaje in sorted(self._consejos.values())]
+        return self._resultados, consejos, self._split
+    
+    def _represcribe(self, plan: List[DayWorkout], catalog: ExerciseCatalog,
+                     table: PlanPrescriptions) -> Optional[List[DayWorkout]]:
+        # Mismos ejercicios con las prescripciones de otra tabla; None si alguno
+        # ya no está en el catálogo. El grupo de cada ejercicio es su grupo muscular
+        days = []
+        for day in plan:
+            exercises = []
+            for ex in day.ejercicios:
+                record = catalog.get(ex.ejercicio_id) if ex.ejercicio_id is not None else None
+                if record is None:
+                    return None
+                exercises.append(exercise_rec(record, record.muscle_group, table))
+            days.append(DayWorkout(dia=day.dia, tipo=day.tipo, ejercicios=exercises))
+        return days
+    
     def _format_objetivo(self, objetivo: str) -> str:
         mapping = {
             "ganar_musculo": "Ganar Músculo",
@@ -123,438 +392,15 @@ class ClipsEngine:
         }
         return mapping.get(objetivo, objetivo)
     
-    def _generate_workout_plan(self, user_input: UserInput, split_type: str, db: Session, lesion_info: dict = None) -> List[DayWorkout]:
-        equipment_map = {
-            "gimnasio_completo": "gym",
-            "peso_corporal": "bodyweight",
-            "entrenamiento_casa": "home"
-        }
-        equipment = equipment_map.get(user_input.acceso_equipamiento, "gym")
+    def _generate_workout_plan(self, user_input: UserInput, split_type: str, catalog: ExerciseCatalog, lesion_info: dict = None, rng=None) -> List[DayWorkout]:
+        equipment = EQUIPMENT_MAP.get(user_input.acceso_equipamiento, "gym")
         
-        # Get exercises from database
-        # Para entrenamiento_casa, incluir tanto "home" como "bodyweight"
+        # Pools del catálogo ya agrupados por grupo muscular
+        # Para entrenamiento_casa, incluye tanto "home" como "bodyweight"
         # Para gimnasio_completo, solo ejercicios de gym (sin bodyweight)
         # Para peso_corporal, solo ejercicios de bodyweight
-        if equipment == "home":
-            exercises = db.query(Exercise).filter(
-                Exercise.equipment.in_(["home", "bodyweight"])
-            ).all()
-        elif equipment == "gym":
-            exercises = db.query(Exercise).filter(
-                Exercise.equipment == "gym"
-            ).all()
-        else:  # bodyweight
-            exercises = db.query(Exercise).filter(
-                Exercise.equipment == "bodyweight"
-            ).all()
-        
-        if split_type == "Full Body":
-            return self._generate_full_body(exercises, user_input.frecuencia_semanal, user_input.nivel_fitness, lesion_info, equipment)
-        elif split_type == "Upper/Lower":
-            return self._generate_upper_lower(exercises, user_input.nivel_fitness, lesion_info, equipment)
-        else:  # Push/Pull/Legs
-            return self._generate_ppl(exercises, user_input.frecuencia_semanal, user_input.nivel_fitness, lesion_info, equipment)
-    
-    def _generate_full_body(self, exercises: List[Exercise], freq: int, nivel: str, lesion_info: dict = None, equipment: str = "gym") -> List[DayWorkout]:
-        workouts = []
-        muscle_groups = ["pecho", "espalda", "piernas", "hombros", "brazos", "core"]
-        global_used_exercises = set()
-        
-        for i in range(min(freq, 3)):
-            selected = []
-            day_used = set()
-            
-            # Para cada grupo muscular, seleccionar 1 ejercicio
-            for group in muscle_groups:
-                group_exercises = [e for e in exercises if e.muscle_group == group and e.name not in global_used_exercises and e.name not in day_used]
-                
-                if group_exercises:
-                    # Mezclar aleatoriamente para mayor variedad
-                    random.shuffle(group_exercises)
-                    # Seleccionar 1 ejercicio
-                    ex = group_exercises.pop(0)
-                    day_used.add(ex.name)
-                    global_used_exercises.add(ex.name)
-                    selected.append(self._create_exercise_rec(ex, nivel, group, lesion_info, equipment))
-            
-            workouts.append(DayWorkout(
-                dia=f"Día {i+1}",
-                tipo="Full Body - Fuerza",
-                ejercicios=selected
-            ))
-        
-        return workouts
-    
-    def _generate_upper_lower(self, exercises: List[Exercise], nivel: str, lesion_info: dict = None, equipment: str = "gym") -> List[DayWorkout]:
-        workouts = []
-        used_exercises = set()
-        
-        # Upper 1
-        upper_groups = ["pecho", "espalda", "hombros", "brazos"]
-        upper1 = []
-        for group in upper_groups:
-            group_exercises = [e for e in exercises if e.muscle_group == group and e.name not in used_exercises]
-            if group_exercises:
-                # Mezclar aleatoriamente para mayor variedad
-                random.shuffle(group_exercises)
-                # Seleccionar 1-2 ejercicios (aleatorio entre 1 y 2)
-                num_exercises = random.randint(1, min(2, len(group_exercises)))
-                for _ in range(num_exercises):
-                    if group_exercises:
-                        ex = group_exercises.pop(0)
-                        used_exercises.add(ex.name)
-                        upper1.append(self._create_exercise_rec(ex, nivel, group, lesion_info, equipment))
-        
-        workouts.append(DayWorkout(
-            dia="Día 1",
-            tipo="Upper Body - Fuerza",
-            ejercicios=upper1
-        ))
-        
-        # Lower 1
-        lower1 = []
-        # Para piernas, asegurar al menos 2 ejercicios
-        piernas_exercises = [e for e in exercises if e.muscle_group == "piernas" and e.name not in used_exercises]
-        if piernas_exercises:
-            random.shuffle(piernas_exercises)
-            num_piernas = min(4, len(piernas_exercises))
-            for i in range(num_piernas):
-                ex = piernas_exercises[i]
-                used_exercises.add(ex.name)
-                lower1.append(self._create_exercise_rec(ex, nivel, "piernas", lesion_info, equipment))
-        
-        # Core para Lower 1
-        core_exercises = [e for e in exercises if e.muscle_group == "core" and e.name not in used_exercises]
-        if core_exercises:
-            random.shuffle(core_exercises)
-            if core_exercises:
-                ex = core_exercises.pop(0)
-                used_exercises.add(ex.name)
-                lower1.append(self._create_exercise_rec(ex, nivel, "core", lesion_info, equipment))
-        
-        workouts.append(DayWorkout(
-            dia="Día 2",
-            tipo="Lower Body - Fuerza",
-            ejercicios=lower1
-        ))
+        selector = ExerciseSelector(catalog.selection_pools(equipment), rng)
+        # Series, reps, descanso y notas para el nivel y la lesión del usuario
+        table = plan_prescriptions(user_input.nivel_fitness, lesion_info)
         
-        # Upper 2
-        upper2 = []
-        for group in upper_groups:
-            group_exercises = [e for e in exercises if e.muscle_group == group and e.name not in used_exercises]
-            if group_exercises:
-                # Mezclar aleatoriamente
-                random.shuffle(group_exercises)
-                # Seleccionar 1-2 ejercicios
-                num_exercises = random.randint(1, min(2, len(group_exercises)))
-                for _ in range(num_exercises):
-                    if group_exercises:
-                        ex = group_exercises.pop(0)
-                        used_exercises.add(ex.name)
-                        upper2.append(self._create_exercise_rec(ex, nivel, group, lesion_info, equipment))
-        
-        workouts.append(DayWorkout(
-            dia="Día 3",
-            tipo="Upper Body - Hipertrofia",
-            ejercicios=upper2
-        ))
-        
-        # Lower 2
-        lower2 = []
-        # Para piernas, asegurar al menos 2 ejercicios si hay disponibles
-        # Si no hay suficientes sin usar, permitir reutilizar algunos
-        piernas_exercises = [e for e in exercises if e.muscle_group == "piernas"]
-        piernas_available = [e for e in piernas_exercises if e.name not in used_exercises]
-        
-        if piernas_available:
-            random.shuffle(piernas_available)
-            num_piernas = min(2, len(piernas_available))
-            for i in range(num_piernas):
-                ex = piernas_available[i]
-                used_exercises.add(ex.name)
-                lower2.append(self._create_exercise_rec(ex, nivel, "piernas", lesion_info, equipment))
-        elif piernas_exercises:
-            # Si no hay disponibles sin usar, reutilizar algunos
-            random.shuffle(piernas_exercises)
-            num_piernas = min(2, len(piernas_exercises))
-            for i in range(num_piernas):
-                ex = piernas_exercises[i]
-                lower2.append(self._create_exercise_rec(ex, nivel, "piernas", lesion_info, equipment))
-        
-        # Core para Lower 2
-        core_exercises = [e for e in exercises if e.muscle_group == "core" and e.name not in used_exercises]
-        if core_exercises:
-            random.shuffle(core_exercises)
-            if core_exercises:
-                ex = core_exercises.pop(0)
-                used_exercises.add(ex.name)
-                lower2.append(self._create_exercise_rec(ex, nivel, "core", lesion_info, equipment))
-        
-        workouts.append(DayWorkout(
-            dia="Día 4",
-            tipo="Lower Body - Hipertrofia",
-            ejercicios=lower2
-        ))
-        
-        return workouts
-    
-    def _generate_ppl(self, exercises: List[Exercise], freq: int, nivel: str, lesion_info: dict = None, equipment: str = "gym") -> List[DayWorkout]:
-        workouts = []
-        global_used_exercises = set()
-        
-        # Función auxiliar para generar Push
-        def generate_push(day_used_set):
-            push = []
-            day_used = day_used_set.copy()
-            
-            # 2-3 ejercicios de pecho
-            pecho_exercises = [e for e in exercises if e.muscle_group == "pecho" and e.name not in global_used_exercises and e.name not in day_used]
-            if pecho_exercises:
-                random.shuffle(pecho_exercises)
-                max_pecho = min(3, len(pecho_exercises))
-                min_pecho = min(2, max_pecho)
-                num_pecho = random.randint(min_pecho, max_pecho) if max_pecho >= min_pecho else len(pecho_exercises)
-                for _ in range(num_pecho):
-                    if pecho_exercises:
-                        ex = pecho_exercises.pop(0)
-                        day_used.add(ex.name)
-                        global_used_exercises.add(ex.name)
-                        push.append(self._create_exercise_rec(ex, nivel, "pecho", lesion_info, equipment))
-            
-            # 1-2 ejercicios de hombros
-            hombros_exercises = [e for e in exercises if e.muscle_group == "hombros" and e.name not in global_used_exercises and e.name not in day_used]
-            if hombros_exercises:
-                random.shuffle(hombros_exercises)
-                max_hombros = min(2, len(hombros_exercises))
-                num_hombros = random.randint(1, max_hombros) if max_hombros >= 1 else len(hombros_exercises)
-                for _ in range(num_hombros):
-                    if hombros_exercises:
-                        ex = hombros_exercises.pop(0)
-                        day_used.add(ex.name)
-                        global_used_exercises.add(ex.name)
-                        push.append(self._create_exercise_rec(ex, nivel, "hombros", lesion_info, equipment))
-            
-            # 1-2 ejercicios de tríceps
-            tricep_exercises = [e for e in exercises if e.muscle_group == "brazos" and e.name not in global_used_exercises and e.name not in day_used and ("tricep" in e.name.lower() or "fond" in e.name.lower() or "cerrad" in e.name.lower() or "extensión" in e.name.lower())]
-            if not tricep_exercises:
-                tricep_exercises = [e for e in exercises if e.muscle_group == "brazos" and e.name not in global_used_exercises and e.name not in day_used]
-            if tricep_exercises:
-                random.shuffle(tricep_exercises)
-                max_tricep = min(2, len(tricep_exercises))
-                num_tricep = random.randint(1, max_tricep) if max_tricep >= 1 else len(tricep_exercises)
-                for _ in range(num_tricep):
-                    if tricep_exercises:
-                        ex = tricep_exercises.pop(0)
-                        day_used.add(ex.name)
-                        global_used_exercises.add(ex.name)
-                        push.append(self._create_exercise_rec(ex, nivel, "brazos", lesion_info, equipment))
-            return push
-        
-        # Función auxiliar para generar Pull
-        def generate_pull(day_used_set):
-            pull = []
-            day_used = day_used_set.copy()
-            
-            # 2-3 ejercicios de espalda
-            pull_exercises = [e for e in exercises if e.muscle_group == "espalda" and e.name not in global_used_exercises and e.name not in day_used]
-            if pull_exercises:
-                random.shuffle(pull_exercises)
-                max_espalda = min(3, len(pull_exercises))
-                min_espalda = min(2, max_espalda)
-                num_espalda = random.randint(min_espalda, max_espalda) if max_espalda >= min_espalda else len(pull_exercises)
-                for _ in range(num_espalda):
-                    if pull_exercises:
-                        ex = pull_exercises.pop(0)
-                        day_used.add(ex.name)
-                        global_used_exercises.add(ex.name)
-                        pull.append(self._create_exercise_rec(ex, nivel, "espalda", lesion_info, equipment))
-            
-            # 1-2 ejercicios de bíceps
-            biceps_exercises = [e for e in exercises if e.muscle_group == "brazos" and e.name not in global_used_exercises and e.name not in day_used and ("curl" in e.name.lower() or "bíceps" in e.name.lower() or "biceps" in e.name.lower())]
-            if not biceps_exercises:
-                biceps_exercises = [e for e in exercises if e.muscle_group == "brazos" and e.name not in global_used_exercises and e.name not in day_used]
-            if biceps_exercises:
-                random.shuffle(biceps_exercises)
-                max_biceps = min(2, len(biceps_exercises))
-                num_biceps = random.randint(1, max_biceps) if max_biceps >= 1 else len(biceps_exercises)
-                for _ in range(num_biceps):
-                    if biceps_exercises:
-                        ex = biceps_exercises.pop(0)
-                        day_used.add(ex.name)
-                        global_used_exercises.add(ex.name)
-                        pull.append(self._create_exercise_rec(ex, nivel, "brazos", lesion_info, equipment))
-            return pull
-        
-        # Función auxiliar para generar Legs
-        def generate_legs(day_used_set):
-            legs = []
-            day_used = day_used_set.copy()
-            
-            leg_exercises = [e for e in exercises if e.muscle_group == "piernas" and e.name not in day_used]
-            core_exercises = [e for e in exercises if e.muscle_group == "core" and e.name not in day_used]
-            
-            # 2-3 ejercicios de piernas
-            if leg_exercises:
-                random.shuffle(leg_exercises)
-                max_piernas = min(3, len(leg_exercises))
-                min_piernas = min(2, max_piernas)
-                num_piernas = random.randint(min_piernas, max_piernas) if max_piernas >= min_piernas else len(leg_exercises)
-                for _ in range(num_piernas):
-                    if leg_exercises:
-                        ex = leg_exercises.pop(0)
-                        day_used.add(ex.name)
-                        legs.append(self._create_exercise_rec(ex, nivel, "piernas", lesion_info, equipment))
-            
-            # 1 ejercicio de core
-            if core_exercises:
-                random.shuffle(core_exercises)
-                if core_exercises:
-                    ex = core_exercises.pop(0)
-                    day_used.add(ex.name)
-                    legs.append(self._create_exercise_rec(ex, nivel, "core", lesion_info, equipment))
-            return legs
-        
-        # Función auxiliar para generar Torso (hombros y pecho)
-        def generate_torso(day_used_set):
-            torso = []
-            day_used = day_used_set.copy()
-            
-            # 2 ejercicios de hombros
-            hombros_exercises = [e for e in exercises if e.muscle_group == "hombros" and e.name not in global_used_exercises and e.name not in day_used]
-            if hombros_exercises:
-                random.shuffle(hombros_exercises)
-                num_hombros = min(2, len(hombros_exercises))
-                for i in range(num_hombros):
-                    ex = hombros_exercises[i]
-                    day_used.add(ex.name)
-                    global_used_exercises.add(ex.name)
-                    torso.append(self._create_exercise_rec(ex, nivel, "hombros", lesion_info, equipment))
-            
-            # 2 ejercicios de pecho
-            pecho_exercises = [e for e in exercises if e.muscle_group == "pecho" and e.name not in global_used_exercises and e.name not in day_used]
-            if pecho_exercises:
-                random.shuffle(pecho_exercises)
-                num_pecho = min(2, len(pecho_exercises))
-                for i in range(num_pecho):
-                    ex = pecho_exercises[i]
-                    day_used.add(ex.name)
-                    global_used_exercises.add(ex.name)
-                    torso.append(self._create_exercise_rec(ex, nivel, "pecho", lesion_info, equipment))
-            return torso
-        
-        # Función auxiliar para generar Pierna (solo piernas, sin core)
-        def generate_pierna(day_used_set):
-            pierna = []
-            day_used = day_used_set.copy()
-            
-            leg_exercises = [e for e in exercises if e.muscle_group == "piernas" and e.name not in day_used]
-            
-            # 3-4 ejercicios de piernas
-            if leg_exercises:
-                random.shuffle(leg_exercises)
-                num_piernas = min(4, len(leg_exercises))
-                for i in range(num_piernas):
-                    ex = leg_exercises[i]
-                    day_used.add(ex.name)
-                    pierna.append(self._create_exercise_rec(ex, nivel, "piernas", lesion_info, equipment))
-            return pierna
-        
-        if freq == 5:
-            # 5 días: Push, Pull, Legs, Torso, Pierna
-            workouts.append(DayWorkout(dia="Día 1", tipo="Push - Empuje", ejercicios=generate_push(set())))
-            workouts.append(DayWorkout(dia="Día 2", tipo="Pull - Tirón", ejercicios=generate_pull(set())))
-            workouts.append(DayWorkout(dia="Día 3", tipo="Legs - Piernas", ejercicios=generate_legs(set())))
-            workouts.append(DayWorkout(dia="Día 4", tipo="Torso - Hombros y Pecho", ejercicios=generate_torso(set())))
-            workouts.append(DayWorkout(dia="Día 5", tipo="Pierna - Solo Piernas", ejercicios=generate_pierna(set())))
-        elif freq == 6:
-            # 6 días: Push, Pull, Legs x2 (dos ciclos completos)
-            workouts.append(DayWorkout(dia="Día 1", tipo="Push - Empuje", ejercicios=generate_push(set())))
-            workouts.append(DayWorkout(dia="Día 2", tipo="Pull - Tirón", ejercicios=generate_pull(set())))
-            workouts.append(DayWorkout(dia="Día 3", tipo="Legs - Piernas", ejercicios=generate_legs(set())))
-            workouts.append(DayWorkout(dia="Día 4", tipo="Push - Empuje", ejercicios=generate_push(set())))
-            workouts.append(DayWorkout(dia="Día 5", tipo="Pull - Tirón", ejercicios=generate_pull(set())))
-            workouts.append(DayWorkout(dia="Día 6", tipo="Legs - Piernas", ejercicios=generate_legs(set())))
-        else:
-            # Para otras frecuencias, usar lógica anterior
-            num_cycles = (freq + 2) // 3
-            for cycle in range(num_cycles):
-                if len(workouts) < freq:
-                    workouts.append(DayWorkout(dia=f"Día {len(workouts) + 1}", tipo="Push - Empuje", ejercicios=generate_push(set())))
-                if len(workouts) < freq:
-                    workouts.append(DayWorkout(dia=f"Día {len(workouts) + 1}", tipo="Pull - Tirón", ejercicios=generate_pull(set())))
-                if len(workouts) < freq:
-                    workouts.append(DayWorkout(dia=f"Día {len(workouts) + 1}", tipo="Legs - Piernas", ejercicios=generate_legs(set())))
-        
-        return workouts
-    
-    def _create_exercise_rec(self, exercise: Exercise, nivel: str, group: str, lesion_info: dict = None, equipment: str = "gym") -> ExerciseRecommendation:
-        # Determine sets and reps based on level
-        is_bodyweight = exercise.equipment in ["bodyweight", "home"]
-        
-        if nivel == "novato":
-            sets = 3
-            reps = "12-15" if is_bodyweight else "8-12"
-            rest = "90 seg" if is_bodyweight else "2 min"
-        elif nivel == "intermedio":
-            if is_bodyweight:
-                sets = 4
-                reps = "18-25" if group not in ["pecho", "espalda", "piernas"] else "15-22"
-                rest = "90 seg"
-            else:
-                sets = 4
-                reps = "6-10" if group in ["pecho", "espalda", "piernas"] else "8-12"
-                rest = "2 min"
-        else:  # avanzado
-            if is_bodyweight:
-                sets = 5
-                reps = "25-35" if group not in ["pecho", "espalda", "piernas"] else "20-30"
-                rest = "60-90 seg"
-            else:
-                sets = 4
-                reps = "5-8" if group in ["pecho", "espalda", "piernas"] else "8-12"
-                rest = "2-3 min"
-        
-        # Handle injury notes
-        notas = None
-        if lesion_info and lesion_info.get('zona'):
-            zona = lesion_info['zona']
-            tipo = lesion_info['tipo']
-            
-            # Mapeo de zonas a grupos musculares afectados
-            zona_grupos = {
-                # Músculos específicos
-                'biceps': ['brazos'],
-                'triceps': ['brazos', 'pecho'],
-                'pectoral': ['pecho'],
-                'dorsales': ['espalda'],
-                'deltoides': ['hombros', 'pecho'],
-                'cuadriceps': ['piernas'],
-                'femorales': ['piernas'],
-                'gemelos': ['piernas'],
-                # Articulaciones
-                'hombro': ['pecho', 'hombros', 'brazos'],
-                'rodilla': ['piernas'],
-                'espalda_baja': ['espalda', 'piernas', 'core'],
-                'codo': ['brazos', 'pecho', 'espalda'],
-                'muneca': ['brazos', 'pecho'],
-                'tobillo': ['piernas'],
-                'cadera': ['piernas', 'core']
-            }
-            
-            affected_groups = zona_grupos.get(zona, [])
-            if group in affected_groups:
-                if tipo in ['lesion', 'quiebre', 'fisura', 'desgarro']:
-                    notas = f"⚠️ EVITAR - {tipo.upper()} en {zona.replace('_', ' ')}. Omitir este ejercicio"
-                elif tipo == 'molestia':
-                    notas = f"⚠️ Reducir peso significativamente - molestia en {zona.replace('_', ' ')}"
-                elif tipo == 'dolor':
-                    notas = f"⚠️ Peso nulo o muy ligero - recuperación activa por dolor en {zona.replace('_', ' ')}"
-        
-        return ExerciseRecommendation(
-            ejercicio=exercise.name,
-            series=sets,
-            reps=reps,
-            descanso=rest,
-            notas=notas
-        )
-
+        return build_plan(selector, table, split_type, user_input.frecuencia_semanal)
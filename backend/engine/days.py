@@ -0,0 +1,184 @@
+"""Días de entrenamiento por tipo.
+
+Cada tipo de día (DayWorkout.tipo) tiene su constructor en DAY_BUILDERS y
+cada split su secuencia de tipos (day_schedule). build_plan() los encadena
+con un mismo ExerciseSelector, que acumula los ejercicios usados en la
+semana; rebuild_day() reconstruye un solo día con lo usado en el resto.
+"""
+import random
+from typing import AbstractSet, Callable, Dict, List, Mapping
+from schemas.schemas import DayWorkout, ExerciseRecommendation
+from .catalog import ExerciseRecord
+from .prescriptions import GROUPS, PlanPrescriptions
+from .selection import NO_EXCLUSIONS, ExerciseSelector, SelectionPools
+
+FULL_BODY = "Full Body - Fuerza"
+UPPER_FUERZA = "Upper Body - Fuerza"
+LOWER_FUERZA = "Lower Body - Fuerza"
+UPPER_HIPERTROFIA = "Upper Body - Hipertrofia"
+LOWER_HIPERTROFIA = "Lower Body - Hipertrofia"
+PUSH = "Push - Empuje"
+PULL = "Pull - Tirón"
+LEGS = "Legs - Piernas"
+TORSO = "Torso - Hombros y Pecho"
+PIERNA = "Pierna - Solo Piernas"
+
+DayBuilder = Callable[[ExerciseSelector, PlanPrescriptions], List[ExerciseRecommendation]]
+
+
+def exercise_rec(exercise: ExerciseRecord, group: str, table: PlanPrescriptions) -> ExerciseRecommendation:
+    # Prescripción precalculada (engine/prescriptions.py)
+    series, reps, descanso, notas = table[(exercise.equipment, group)]
+    return ExerciseRecommendation(
+        ejercicio=exercise.name,
+        ejercicio_id=exercise.id,
+        series=series,
+        reps=reps,
+        descanso=descanso,
+        notas=notas
+    )
+
+
+def full_body(selector: ExerciseSelector, table: PlanPrescriptions) -> List[ExerciseRecommendation]:
+    # Para cada grupo muscular, 1 ejercicio no usado en la semana
+    return [exercise_rec(ex, group, table) for group in GROUPS for ex in selector.pick(group, 1)]
+
+
+def upper(selector: ExerciseSelector, table: PlanPrescriptions) -> List[ExerciseRecommendation]:
+    # 1-2 ejercicios por grupo (aleatorio entre 1 y 2)
+    return [
+        exercise_rec(ex, group, table)
+        for group in ("pecho", "espalda", "hombros", "brazos")
+        for ex in selector.pick(group, 1, 2)
+    ]
+
+
+def _lower(selector: ExerciseSelector, table: PlanPrescriptions, num_piernas: int,
+           allow_reuse: bool) -> List[ExerciseRecommendation]:
+    piernas = selector.pick("piernas", num_piernas)
+    if not piernas and allow_reuse:
+        # Si no hay disponibles sin usar, reutilizar algunos
+        piernas = selector.pick("piernas", num_piernas, exclude=NO_EXCLUSIONS, mark=False)
+    lower = [exercise_rec(ex, "piernas", table) for ex in piernas]
+    # Core
+    lower.extend(exercise_rec(ex, "core", table) for ex in selector.pick("core", 1))
+    return lower
+
+
+def lower_fuerza(selector: ExerciseSelector, table: PlanPrescriptions) -> List[ExerciseRecommendation]:
+    return _lower(selector, table, 4, False)
+
+
+def lower_hipertrofia(selector: ExerciseSelector, table: PlanPrescriptions) -> List[ExerciseRecommendation]:
+    return _lower(selector, table, 2, True)
+
+
+def push(selector: ExerciseSelector, table: PlanPrescriptions) -> List[ExerciseRecommendation]:
+    # 2-3 ejercicios de pecho
+    exercises = [exercise_rec(ex, "pecho", table) for ex in selector.pick("pecho", 2, 3)]
+    # 1-2 ejercicios de hombros
+    exercises.extend(exercise_rec(ex, "hombros", table) for ex in selector.pick("hombros", 1, 2))
+    # 1-2 ejercicios de tríceps (o de brazos si no quedan de tríceps)
+    tricep_pool = "triceps" if selector.available("triceps") else "brazos"
+    exercises.extend(exercise_rec(ex, "brazos", table) for ex in selector.pick(tricep_pool, 1, 2))
+    return exercises
+
+
+def pull(selector: ExerciseSelector, table: PlanPrescriptions) -> List[ExerciseRecommendation]:
+    # 2-3 ejercicios de espalda
+    exercises = [exercise_rec(ex, "espalda", table) for ex in selector.pick("espalda", 2, 3)]
+    # 1-2 ejercicios de bíceps (o de brazos si no quedan de bíceps)
+    biceps_pool = "biceps" if selector.available("biceps") else "brazos"
+    exercises.extend(exercise_rec(ex, "brazos", table) for ex in selector.pick(biceps_pool, 1, 2))
+    return exercises
+
+
+def legs(selector: ExerciseSelector, table: PlanPrescriptions) -> List[ExerciseRecommendation]:
+    # Las piernas pueden repetirse entre días: 2-3 de piernas y 1 de core
+    exercises = [
+        exercise_rec(ex, "piernas", table)
+        for ex in selector.pick("piernas", 2, 3, exclude=NO_EXCLUSIONS, mark=False)
+    ]
+    exercises.extend(
+        exercise_rec(ex, "core", table) for ex in selector.pick("core", 1, exclude=NO_EXCLUSIONS, mark=False)
+    )
+    return exercises
+
+
+def torso(selector: ExerciseSelector, table: PlanPrescriptions) -> List[ExerciseRecommendation]:
+    # 2 ejercicios de hombros y 2 de pecho
+    exercises = [exercise_rec(ex, "hombros", table) for ex in selector.pick("hombros", 2)]
+    exercises.extend(exercise_rec(ex, "pecho", table) for ex in selector.pick("pecho", 2))
+    return exercises
+
+
+def pierna(selector: ExerciseSelector, table: PlanPrescriptions) -> List[ExerciseRecommendation]:
+    # Solo piernas, sin core
+    return [
+        exercise_rec(ex, "piernas", table)
+        for ex in selector.pick("piernas", 4, exclude=NO_EXCLUSIONS, mark=False)
+    ]
+
+
+DAY_BUILDERS: Dict[str, DayBuilder] = {
+    FULL_BODY: full_body,
+    UPPER_FUERZA: upper,
+    LOWER_FUERZA: lower_fuerza,
+    UPPER_HIPERTROFIA: upper,
+    LOWER_HIPERTROFIA: lower_hipertrofia,
+    PUSH: push,
+    PULL: pull,
+    LEGS: legs,
+    TORSO: torso,
+    PIERNA: pierna,
+}
+
+
+def day_schedule(split_type: str, freq: int) -> List[str]:
+    if split_type == "Full Body":
+        return [FULL_BODY] * min(freq, 3)
+    if split_type == "Upper/Lower":
+        return [UPPER_FUERZA, LOWER_FUERZA, UPPER_HIPERTROFIA, LOWER_HIPERTROFIA]
+    # Push/Pull/Legs
+    if freq == 5:
+        return [PUSH, PULL, LEGS, TORSO, PIERNA]
+    # 6 días: dos ciclos completos; otras frecuencias, ciclos incompletos
+    return [(PUSH, PULL, LEGS)[i % 3] for i in range(freq)]
+
+
+def build_plan(selector: ExerciseSelector, table: PlanPrescriptions, split_type: str,
+               freq: int) -> List[DayWorkout]:
+    return [
+        DayWorkout(dia=f"Día {i + 1}", tipo=tipo, ejercicios=DAY_BUILDERS[tipo](selector, table))
+        for i, tipo in enumerate(day_schedule(split_type, freq))
+    ]
+
+
+def _name_ids(exercises: List[ExerciseRecommendation], name_ids: Mapping[str, int]) -> AbstractSet[int]:
+    return {name_ids[ex.ejercicio] for ex in exercises if ex.ejercicio in name_ids}
+
+
+def rebuild_day(plan: List[DayWorkout], index: int, pools: SelectionPools, name_ids: Mapping[str, int],
+                table: PlanPrescriptions, seed: int) -> DayWorkout:
+    """Nuevo día para plan[index], del mismo tipo y sin tocar los demás.
+
+    Los ejercicios del resto de la semana cuentan como usados, como si el día
+    se hubiera generado el último. Los del día que se sustituye se evitan en
+    todos los grupos (también en los días de piernas, que admiten repetir
+    entre días) y solo completan los huecos que no se pueden cubrir con otros.
+    El resultado es determinista: depende de seed, del índice y del día actual.
+    ValueError si el índice o el tipo de día no son válidos.
+    """
+    if not 0 <= index < len(plan):
+        raise ValueError(f"dia: el plan tiene {len(plan)} días (índices 0 a {len(plan) - 1})")
+    day = plan[index]
+    builder = DAY_BUILDERS.get(day.tipo)
+    if builder is None:
+        raise ValueError(f"Tipo de día desconocido: {day.tipo}")
+
+    rng = random.Random(f"{seed}:{index}:{','.join(ex.ejercicio for ex in day.ejercicios)}")
+    others = [ex for i, other in enumerate(plan) if i != index for ex in other.ejercicios]
+    selector = ExerciseSelector(pools, rng)
+    selector.used = set(_name_ids(others, name_ids))
+    selector.avoid = _name_ids(day.ejercicios, name_ids)
+    return DayWorkout(dia=day.dia, tipo=day.tipo, ejercicios=builder(selector, table))
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Sequence, Tuple
+from starlette.concurrency import run_in_threadpool
+from schemas import UserInput, Recommendation
+from .catalog import ExerciseCatalog, ExerciseRecord, get_catalog, refresh_catalog, set_catalog
+from .clips_engine import RULES_PATH, ClipsEngine
+from .pool import EnginePool, POOL_MAX_RUNS
+
+logger = logging.getLogger(__name__)
+
+# "thread": motores del pool en el threadpool del proceso (por defecto)
+# "process": reglas y generación del plan en procesos worker, uno por núcleo
+EXECUTION_MODE = os.getenv("ENGINE_EXECUTION_MODE", "thread")
+PROCESS_WORKERS = int(os.getenv("ENGINE_PROCESS_WORKERS", str(os.cpu_count() or 1)))
+# 0 = los workers no se reciclan
+MAX_TASKS_PER_CHILD = int(os.getenv("ENGINE_MAX_TASKS_PER_CHILD", "0"))
+
+# Estado propio de cada proceso worker
+_worker_engine: Optional[ClipsEngine] = None
+
+
+def init_worker(rules_path: str = RULES_PATH, exercises: Optional[Sequence[ExerciseRecord]] = None) -> None:
+    # Initializer de los procesos worker (RecommendationExecutor en modo
+    # process y bulk.py): un motor propio por proceso. Con exercises, el worker usa exactamente el catálogo publicado por el
+    # proceso principal (misma versión) en lugar de volver a leer la tabla
+    global _worker_engine
+    _worker_engine = ClipsEngine(rules_path)
+    if exercises is None:
+        refresh_catalog()
+    else:
+        set_catalog(ExerciseCatalog(exercises))
+
+
+def _evaluate(engine: ClipsEngine, user_input: UserInput,
+              catalog: Optional[ExerciseCatalog] = None) -> Tuple[Recommendation, Dict]:
+    # Devuelve también los tiempos por etapa: en modo process se miden en el
+    # worker y se registran en el proceso principal. Las versiones de reglas
+    # y catálogo usadas van con ellos (cabeceras X-Rules-Version y X-Catalog-Version)
+    timings = {}
+    start = time.perf_counter()
+    if catalog is None:
+        catalog = get_catalog()
+    timings["catalog_fetch"] = time.perf_counter() - start
+    recommendation = engine.get_recommendations(user_input, catalog, timings)
+    timings["rules_version"] = engine.rules_version
+    timings["catalog_version"] = catalog.version
+    return recommendation, timings
+
+
+def run_in_worker(user_input: UserInput) -> Tuple[Recommendation, Dict]:
+    # En un proceso iniciado con init_worker
+    global _worker_engine
+    # Mismo reciclaje de entornos que EnginePool, con la misma copia de las reglas
+    if POOL_MAX_RUNS and _worker_engine.runs >= POOL_MAX_RUNS:
+        _worker_engine = ClipsEngine(_worker_engine.rules_path)
+    return _evaluate(_worker_engine, user_input)
+
+
+class RecommendationExecutor:
+    """Ejecuta get_recommendations en el pool de hilos o en un pool de procesos.
+
+    El pool de motores y el catálogo se publican juntos (swap): cada ejecución
+    toma ambos al empezar, así que las que están en marcha durante una
+    recarga terminan con la versión anterior.
+    """
+
+    def __init__(self, engine_pool: EnginePool, mode: str = EXECUTION_MODE,
+                 workers: int = PROCESS_WORKERS, max_tasks_per_child: int = MAX_TASKS_PER_CHILD):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Modo de ejecución desconocido: {mode}")
+        # Sin catálogo propio se usa el global (get_catalog)
+        self._runtime: Tuple[EnginePool, Optional[ExerciseCatalog]] = (engine_pool, None)
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.max_tasks_per_child = max_tasks_per_child or None
+        self._processes: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def engine_pool(self) -> EnginePool:
+        return self._runtime[0]
+
+    @property
+    def runtime(self) -> Tuple[EnginePool, ExerciseCatalog]:
+        # Pool y catálogo publicados juntos, para quien evalúa por su cuenta
+        engine_pool, catalog = self._runtime
+        return engine_pool, catalog or get_catalog()
+
+    @property
+    def versions(self) -> Tuple[str, str]:
+        # (reglas, catálogo) con que se evalúan ahora las peticiones nuevas
+        engine_pool, catalog = self.runtime
+        return engine_pool.rules_version, catalog.version
+
+    def swap(self, engine_pool: EnginePool, catalog: ExerciseCatalog) -> None:
+        # Una sola asignación: nadie ve reglas nuevas con el catálogo anterior
+        self._runtime = (engine_pool, catalog)
+        self.restart()
+
+    def start(self) -> None:
+        if self.mode != "process" or self._processes is not None:
+            return
+        self._processes = self._start_processes()
+
+    def _start_processes(self) -> Optional[ProcessPoolExecutor]:
+        engine_pool, catalog = self.runtime
+        try:
+            processes = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(engine_pool.rules_path, catalog.exercises),
+                max_tasks_per_child=self.max_tasks_per_child,
+            )
+            # Arrancar y precalentar todos los workers antes de aceptar tráfico
+            for future in [processes.submit(os.getpid) for _ in range(self.workers)]:
+                future.result()
+        except Exception:
+            logger.exception("No se pudo iniciar el pool de procesos; se usa ejecución en proceso")
+            return None
+        return processes
+
+    def shutdown(self) -> None:
+        processes, self._processes = self._processes, None
+        if processes is not None:
+            processes.shutdown(wait=False, cancel_futures=True)
+
+    def restart(self) -> None:
+        # Los workers reciben las reglas y el catálogo al arrancar; recrearlos
+        # tras una recarga. Los nuevos se arrancan antes de retirar los anteriores, que
+        # terminan lo que ya tenían en marcha o en cola
+        if self.mode != "process":
+            return
+        processes = self._start_processes()
+        previous, self._processes = self._processes, processes
+        if previous is not None:
+            previous.shutdown(wait=False)
+
+    @property
+    def capacity(self) -> int:
+        # Ejecuciones que pueden avanzar en paralelo sin esperar motor
+        return self.workers if self.mode == "process" else self.engine_pool.size
+
+    @property
+    def active_mode(self) -> str:
+        return "process" if self._processes is not None else "thread"
+
+    def run_local(self, user_input: UserInput) -> Tuple[Recommendation, Dict]:
+        engine_pool, catalog = self._runtime
+        with engine_pool.acquire() as engine:
+            return _evaluate(engine, user_input, catalog)
+
+    async def run(self, user_input: UserInput) -> Tuple[Recommendation, Dict]:
+        processes = self._processes
+        if processes is not None:
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(processes, run_in_worker, user_input)
+            except BrokenProcessPool:
+                logger.exception("Pool de procesos roto; se vuelve a ejecución en proceso")
+                if self._processes is processes:
+                    self._processes = None
+        return await run_in_threadpool(self.run_local, user_input)
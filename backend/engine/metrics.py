@@ -0,0 +1,219 @@
+"""Métricas en formato de texto de Prometheus (sin dependencias externas).
+
+Contadores, gauges e histogramas con etiquetas, seguros entre hilos, y un
+middleware ASGI para las métricas HTTP. GET /metrics devuelve render().
+"""
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Starlette añade "; charset=utf-8"
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Buckets en segundos: las etapas del motor van de decenas de µs a pocos ms
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [cuentas por bucket (+ desbordamiento), suma]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def _samples(self):
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(float(bound))}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "Peticiones HTTP atendidas", ("method", "path", "status")))
+HTTP_ERRORS = REGISTRY.register(Counter(
+    "http_request_errors_total", "Peticiones HTTP con estado >= 400", ("method", "path", "status")))
+HTTP_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP", ("method", "path")))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Peticiones HTTP en curso"))
+
+RECOMMENDATIONS = REGISTRY.register(Counter(
+    "recommendations_total", "Recomendaciones servidas por tipo de split", ("split",)))
+RECOMMENDATION_DURATION = REGISTRY.register(Histogram(
+    "recommendation_duration_seconds", "Latencia de /api/recommendations por tipo de split", ("split",)))
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "recommendation_stage_duration_seconds",
+    "Duración de cada etapa (engine_run, catalog_fetch, plan_generation, serialization)",
+    ("split", "stage")))
+ENGINE_IN_FLIGHT = REGISTRY.register(Gauge(
+    "recommendation_engine_in_flight", "Ejecuciones del motor en curso"))
+# Copia de /api/stats, actualizada en cada lectura de /metrics
+ENGINE_POOL = REGISTRY.register(Gauge(
+    "engine_pool", "Estado del pool de motores CLIPS", ("stat",)))
+ADMISSION = REGISTRY.register(Gauge(
+    "admission", "Estado del control de admisión", ("stat",)))
+CACHE = REGISTRY.register(Gauge(
+    "recommendation_cache", "Estado de la caché de recomendaciones", ("stat",)))
+
+# Etapas que get_recommendations/el ejecutor dejan en el dict de tiempos
+ENGINE_STAGES = ("catalog_fetch", "engine_run", "plan_generation")
+
+
+def observe_stages(timings: Dict) -> None:
+    split = timings.get("split", "")
+    for stage in ENGINE_STAGES:
+        if stage in timings:
+            STAGE_DURATION.observe(timings[stage], split=split, stage=stage)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: recuento, errores y latencia por método, ruta y estado."""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Dict[object, str] = {}
+
+    def _route_path(self, scope) -> str:
+        # Plantilla de la ruta y no la URL concreta, para acotar las series
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "<unmatched>"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            for route in getattr(scope.get("app"), "routes", ()):
+                if getattr(route, "endpoint", None) is endpoint:
+                    path = self._route_paths[endpoint] = route.path
+                    break
+            else:
+                return "<unmatched>"
+        return path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            method = scope["method"]
+            path = self._route_path(scope)
+            HTTP_DURATION.observe(time.perf_counter() - start, method=method, path=path)
+            HTTP_REQUESTS.inc(method=method, path=path, status=str(status))
+            if status >= 400:
+                HTTP_ERRORS.inc(method=method, path=path, status=str(status))
@@ -0,0 +1,194 @@
+"""Versión vectorizada (NumPy) de las reglas nutricionales de clips_rules.clp.
+
+Reproduce calcular-imc, calcular-tmb-*, calcular-calorias-*, calcular-macros-*,
+calcular-agua-sueno y comidas-* sobre columnas completas, para cohortes grandes
+sin pasar por el motor de reglas. Cualquier cambio en esas reglas debe
+reflejarse aquí; tests/test_nutrition.py comprueba que coinciden y
+`python -m engine.nutrition --verify N` los compara sobre N perfiles aleatorios.
+"""
+import argparse
+import random
+import sys
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+SEXOS = ("masculino", "femenino")
+OBJETIVOS = ("ganar_musculo", "perder_grasa", "mantenimiento")
+
+# (factor, factor con frecuencia >= 5, ajuste kcal) por objetivo
+CALORIAS = {
+    "ganar_musculo": (1.5, 1.7, 300),
+    "perder_grasa": (1.4, 1.6, -500),
+    "mantenimiento": (1.5, 1.65, 0),
+}
+# (g proteína/kg, g grasa/kg) por objetivo
+MACROS = {
+    "ganar_musculo": (2.2, 1.0),
+    "perder_grasa": (2.4, 0.8),
+    "mantenimiento": (2.0, 1.0),
+}
+COMIDAS = {"ganar_musculo": 5, "perder_grasa": 4, "mantenimiento": 4}
+
+IMC_CATEGORIAS = np.array(["Bajo Peso", "Peso Normal", "Sobrepeso", "Obesidad"])
+
+
+def _clips_round(x: np.ndarray) -> np.ndarray:
+    # round de CLIPS: mitades alejándose de cero (no redondeo bancario)
+    return np.where(x < 0, np.ceil(x - 0.5), np.floor(x + 0.5)).astype(np.int64)
+
+
+def _round_1(x: np.ndarray) -> np.ndarray:
+    # Igual que round(x, 1) de Python (redondeo decimal exacto, mitades al par)
+    # para valores positivos; np.round(x, 1) difiere en casos como 0.35.
+    # 10*x se representa exacto como s + e (x*8 y x*2 son exactos, TwoSum).
+    a = x * 8
+    b = x * 2
+    s = a + b
+    bb = s - a
+    e = (a - (s - bb)) + (b - bb)
+    k = np.floor(s)
+    k = np.where((s == k) & (e < 0), k - 1, k)
+    # Signo de 10*x - (k + 0.5), sin error de redondeo cerca de la mitad
+    d = ((s - k) - 0.5) + e
+    up = (d > 0) | ((d == 0) & (k % 2 == 1))
+    return (k + up) / 10
+
+
+def _check_values(name: str, values: np.ndarray, allowed: Sequence[str]) -> None:
+    invalid = np.setdiff1d(np.unique(values), np.array(allowed))
+    if invalid.size:
+        raise ValueError(f"Valores no permitidos en {name}: {', '.join(map(str, invalid))}")
+
+
+def compute_nutrition(edad, sexo, peso, altura, objetivo, frecuencia) -> Dict[str, np.ndarray]:
+    """Calcula el plan nutricional para columnas de usuarios.
+
+    Devuelve un array por campo: imc e imc_categoria (UserProfile) y los
+    campos de NutritionalPlan, con el mismo redondeo que la API.
+    """
+    edad = np.asarray(edad, dtype=np.int64)
+    peso = np.asarray(peso, dtype=np.float64)
+    altura = np.asarray(altura, dtype=np.float64)
+    frecuencia = np.asarray(frecuencia, dtype=np.int64)
+    sexo = np.asarray(sexo).astype(str)
+    objetivo = np.asarray(objetivo).astype(str)
+    _check_values("sexo", sexo, SEXOS)
+    _check_values("objetivo", objetivo, OBJETIVOS)
+
+    # IMC (mismo orden de operaciones que la regla para obtener los mismos floats)
+    altura_m = altura / 100
+    imc = peso / (altura_m * altura_m)
+    imc_categoria = IMC_CATEGORIAS[np.searchsorted([18.5, 25.0, 30.0], imc, side="right")]
+
+    # TMB (Mifflin-St Jeor)
+    ajuste_sexo = np.where(sexo == "masculino", 5, 161)
+    tmb = (10 * peso + 6.25 * altura) + (5 * edad - ajuste_sexo)
+
+    alta = frecuencia >= 5
+    factor = np.empty_like(peso)
+    kcal_extra = np.empty_like(edad)
+    prot_kg = np.empty_like(peso)
+    grasa_kg = np.empty_like(peso)
+    comidas = np.empty_like(edad)
+    for nombre, (base, alto, extra) in CALORIAS.items():
+        mask = objetivo == nombre
+        factor[mask] = np.where(alta[mask], alto, base)
+        kcal_extra[mask] = extra
+        prot_kg[mask], grasa_kg[mask] = MACROS[nombre]
+        comidas[mask] = COMIDAS[nombre]
+
+    # Las calorías solo se calculan con TMB positiva y los macros con calorías positivas
+    calorias = np.where(tmb > 0, _clips_round(tmb * factor) + kcal_extra, 0)
+    con_macros = calorias > 0
+    proteinas = _clips_round(peso * prot_kg)
+    grasas = _clips_round(peso * grasa_kg)
+    carbohidratos = _clips_round((calorias - proteinas * 4 - grasas * 9) / 4)
+    proteinas = np.where(con_macros, proteinas, 0)
+    grasas = np.where(con_macros, grasas, 0)
+    carbohidratos = np.where(con_macros, carbohidratos, 0)
+
+    agua = peso * 35 / 1000 + np.where(alta, 0.5, 0.0)
+    sueno = np.where(frecuencia >= 6, 9, 8)
+
+    return {
+        "imc": _round_1(imc),
+        "imc_categoria": imc_categoria,
+        "calorias_diarias": calorias,
+        "agua_diaria": _round_1(agua),
+        "horas_sueno": sueno,
+        "comidas": comidas,
+        "proteinas": proteinas,
+        "carbohidratos": carbohidratos,
+        "grasas": grasas,
+    }
+
+
+def compute_nutrition_for(users: List) -> Dict[str, np.ndarray]:
+    # Atajo para listas de UserInput
+    return compute_nutrition(
+        [u.edad for u in users],
+        [u.sexo for u in users],
+        [u.peso for u in users],
+        [u.altura for u in users],
+        [u.objetivo for u in users],
+        [u.frecuencia_semanal for u in users],
+    )
+
+
+def _random_users(count: int, seed: int) -> List:
+    from schemas import UserInput
+    rng = random.Random(seed)
+    users = []
+    for i in range(count):
+        users.append(UserInput(
+            nombre=f"u{i}",
+            edad=rng.randint(1, 119),
+            sexo=rng.choice(SEXOS),
+            # Incluye pesos/alturas extremos y con decimales
+            peso=round(rng.uniform(1, 250), rng.choice((0, 1, 2))) or 1.0,
+            altura=round(rng.uniform(50, 230), rng.choice((0, 1))),
+            nivel_fitness=rng.choice(("novato", "intermedio", "avanzado")),
+            objetivo=rng.choice(OBJETIVOS),
+            frecuencia_semanal=rng.randint(1, 7),
+            acceso_equipamiento="gimnasio_completo",
+        ))
+    return users
+
+
+def verify_against_clips(count: int = 1000, seed: int = 0, users: Optional[List] = None) -> List[str]:
+    """Compara el kernel con ClipsEngine sobre perfiles aleatorios (o users); devuelve las diferencias."""
+    from .catalog import ExerciseCatalog
+    from .pool import EnginePool
+
+    if users is None:
+        users = _random_users(count, seed)
+    vectorized = compute_nutrition_for(users)
+    pool = EnginePool(size=1)
+    empty_catalog = ExerciseCatalog(())
+    mismatches = []
+    for i, user in enumerate(users):
+        with pool.acquire() as engine:
+            rec = engine.get_recommendations(user, empty_catalog)
+        expected = dict(rec.plan_nutricional.model_dump(), imc=rec.perfil.imc, imc_categoria=rec.perfil.imc_categoria)
+        for field, value in expected.items():
+            got = vectorized[field][i].item()
+            if got != value:
+                mismatches.append(f"#{i} {field}: clips={value!r} numpy={got!r} ({user.model_dump_json()})")
+    return mismatches
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Kernel nutricional vectorizado")
+    parser.add_argument("--verify", type=int, metavar="N", default=1000,
+                        help="perfiles aleatorios a comparar contra las reglas CLIPS")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    mismatches = verify_against_clips(args.verify, args.seed)
+    for line in mismatches[:50]:
+        print(line)
+    print(f"{args.verify} perfiles comparados, {len(mismatches)} diferencias")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
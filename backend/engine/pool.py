@@ -0,0 +1,194 @@
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from .clips_engine import IO_CONSTRUCTS, RULES_PATH, ClipsEngine
+from .rules_image import image_key
+
+logger = logging.getLogger(__name__)
+
+# Tamaño del pool y tiempo máximo de espera por un entorno libre (segundos)
+POOL_SIZE = int(os.getenv("CLIPS_POOL_SIZE", "4"))
+POOL_TIMEOUT = float(os.getenv("CLIPS_POOL_TIMEOUT", "5"))
+# Ejecuciones tras las que se recrea un entorno (0 = nunca). Cada objeto Fact
+# que clipspy expone a Python deja memoria retenida en el entorno CLIPS, que
+# crece y se vuelve más lento con el uso; get_recommendations ya no crea
+# ninguno, pero se mantiene como salvaguarda.
+POOL_MAX_RUNS = int(os.getenv("CLIPS_POOL_MAX_RUNS", "2000"))
+
+
+# Marca en la cola de libres: un entorno se descartó sin reemplazo y hay un
+# hueco para crear otro. Despierta a quien espera para que lo cree
+_FREE_SLOT = None
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class EnginePool:
+    """Pool acotado de ClipsEngine con las reglas ya cargadas.
+
+    Cada motor se usa por un solo hilo a la vez; get_recommendations hace
+    reset() del entorno al empezar, así que no queda estado entre usos.
+    Todos los motores se crean con rules_path: para fijar una versión de las
+    reglas, pasar una copia (rules_image.snapshot_rules).
+    """
+
+    def __init__(self, size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT, max_runs: int = POOL_MAX_RUNS,
+                 rules_path: str = RULES_PATH):
+        if size < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1")
+        self.size = size
+        self.rules_path = rules_path
+        self.rules_version = image_key(rules_path, IO_CONSTRUCTS)
+        self.timeout = timeout
+        self.max_runs = max_runs
+        # LIFO: reutilizar primero el entorno usado más recientemente. Sin
+        # límite: además de los entornos puede llevar marcas _FREE_SLOT
+        self._idle: "queue.LifoQueue[Optional[ClipsEngine]]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_time = 0.0
+        self._recycled = 0
+        self._recycle_failures = 0
+        self._free_slots = 0
+        self._load_time = 0.0
+        self._binary_loads = 0
+
+    def warm(self) -> None:
+        # Crear todos los entornos de antemano (se llama en el startup)
+        while True:
+            engine = self._create_if_possible()
+            if engine is None:
+                return
+            self._idle.put_nowait(engine)
+
+    def _create_if_possible(self) -> Optional[ClipsEngine]:
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        try:
+            return self._new_engine()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _new_engine(self) -> ClipsEngine:
+        engine = ClipsEngine(self.rules_path)
+        with self._lock:
+            self._load_time += engine.load_time
+            self._binary_loads += engine.rules_source == "binary"
+        return engine
+
+    def _checkout(self, timeout: Optional[float]) -> ClipsEngine:
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            engine = self._idle.get_nowait()
+        except queue.Empty:
+            engine = self._create_if_possible()
+        else:
+            if engine is _FREE_SLOT:
+                engine = self._claim_free_slot()
+        if engine is None:
+            engine = self._wait(timeout)
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+        return engine
+
+    def _wait(self, timeout: float) -> ClipsEngine:
+        start = time.perf_counter()
+        deadline = start + timeout
+        with self._lock:
+            self._waits += 1
+        try:
+            while True:
+                try:
+                    engine = self._idle.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise PoolTimeout(f"No hay motores CLIPS libres tras {timeout}s")
+                if engine is not _FREE_SLOT:
+                    return engine
+                engine = self._claim_free_slot()
+                if engine is not None:
+                    return engine
+        finally:
+            with self._lock:
+                self._wait_time += time.perf_counter() - start
+
+    def _claim_free_slot(self) -> Optional[ClipsEngine]:
+        # Crear el entorno del hueco que anunciaba una marca _FREE_SLOT; None
+        # si otro checkout ya lo ocupó. Si la creación falla, la marca vuelve
+        # a la cola para el siguiente que espere
+        with self._lock:
+            self._free_slots -= 1
+        try:
+            return self._create_if_possible()
+        except Exception:
+            self._signal_free_slot()
+            raise
+
+    def _signal_free_slot(self) -> None:
+        with self._lock:
+            self._free_slots += 1
+        self._idle.put_nowait(_FREE_SLOT)
+
+    def _release(self, engine: ClipsEngine) -> None:
+        if self.max_runs and engine.runs >= self.max_runs:
+            try:
+                engine = self._new_engine()
+            except Exception:
+                # Se llama desde el finally de acquire: no propagar, o el error
+                # sustituiría al resultado (o a la excepción) de quien usó el
+                # motor. El entorno gastado se descarta y el hueco queda libre;
+                # la marca despierta a quien espera para que lo cree
+                logger.exception("No se pudo recrear el motor CLIPS tras %d ejecuciones", engine.runs)
+                with self._lock:
+                    self._in_use -= 1
+                    self._created -= 1
+                    self._recycle_failures += 1
+                self._signal_free_slot()
+                return
+            with self._lock:
+                self._recycled += 1
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put_nowait(engine)
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None):
+        engine = self._checkout(timeout)
+        try:
+            yield engine
+        finally:
+            self._release(engine)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "created": self._created,
+                "idle": max(self._idle.qsize() - self._free_slots, 0),
+                "in_use": self._in_use,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "recycled": self._recycled,
+                "recycle_failures": self._recycle_failures,
+                "wait_time_total": round(self._wait_time, 6),
+                # Carga de reglas de todos los entornos creados (imagen binaria o texto)
+                "rules_load_time_total": round(self._load_time, 6),
+                "rules_binary_loads": self._binary_loads,
+            }
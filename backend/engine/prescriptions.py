@@ -0,0 +1,138 @@
+"""Tabla de prescripciones de ejercicios.
+
+(nivel, peso corporal, grupo, tipo de lesión, zona) -> (series, reps, descanso,
+notas), precalculada al importar el módulo a partir de prescribe(). La
+generación de planes solo consulta la tabla: PRESCRIPTIONS se puede
+inspeccionar y comprobar como datos.
+"""
+from typing import Dict, NamedTuple, Optional, Tuple, get_args
+from schemas.schemas import NivelFitness, TipoLesion, ZonaLesion
+
+# Grupos musculares con los que se prescriben ejercicios en los planes
+GROUPS = ("pecho", "espalda", "piernas", "hombros", "brazos", "core")
+# Equipamiento del catálogo que cuenta como ejercicio con peso corporal
+BODYWEIGHT_EQUIPMENT = ("bodyweight", "home")
+EQUIPMENT = ("gym",) + BODYWEIGHT_EQUIPMENT
+
+# Grupos grandes: menos repeticiones con carga y más con peso corporal
+HEAVY_GROUPS = ("pecho", "espalda", "piernas")
+
+# Mapeo de zonas a grupos musculares afectados
+ZONA_GRUPOS = {
+    # Músculos específicos
+    'biceps': ('brazos',),
+    'triceps': ('brazos', 'pecho'),
+    'pectoral': ('pecho',),
+    'dorsales': ('espalda',),
+    'deltoides': ('hombros', 'pecho'),
+    'cuadriceps': ('piernas',),
+    'femorales': ('piernas',),
+    'gemelos': ('piernas',),
+    # Articulaciones
+    'hombro': ('pecho', 'hombros', 'brazos'),
+    'rodilla': ('piernas',),
+    'espalda_baja': ('espalda', 'piernas', 'core'),
+    'codo': ('brazos', 'pecho', 'espalda'),
+    'muneca': ('brazos', 'pecho'),
+    'tobillo': ('piernas',),
+    'cadera': ('piernas', 'core'),
+}
+SEVERE_INJURIES = ('lesion', 'quiebre', 'fisura', 'desgarro')
+
+LesionKey = Tuple[Optional[str], Optional[str]]  # (tipo, zona); (None, None) sin lesión
+PrescriptionKey = Tuple[str, bool, str, Optional[str], Optional[str]]
+
+
+class Prescription(NamedTuple):
+    series: int
+    reps: str
+    descanso: str
+    notas: Optional[str]
+
+
+def prescribe(nivel: str, is_bodyweight: bool, group: str,
+              tipo: Optional[str] = None, zona: Optional[str] = None) -> Prescription:
+    # Determine sets and reps based on level
+    heavy = group in HEAVY_GROUPS
+    if nivel == "novato":
+        sets = 3
+        reps = "12-15" if is_bodyweight else "8-12"
+        rest = "90 seg" if is_bodyweight else "2 min"
+    elif nivel == "intermedio":
+        if is_bodyweight:
+            sets, reps, rest = 4, "15-22" if heavy else "18-25", "90 seg"
+        else:
+            sets, reps, rest = 4, "6-10" if heavy else "8-12", "2 min"
+    else:  # avanzado
+        if is_bodyweight:
+            sets, reps, rest = 5, "20-30" if heavy else "25-35", "60-90 seg"
+        else:
+            sets, reps, rest = 4, "5-8" if heavy else "8-12", "2-3 min"
+
+    # Handle injury notes
+    notas = None
+    if zona and group in ZONA_GRUPOS.get(zona, ()):
+        lugar = zona.replace('_', ' ')
+        if tipo in SEVERE_INJURIES:
+            notas = f"⚠️ EVITAR - {tipo.upper()} en {lugar}. Omitir este ejercicio"
+        elif tipo == 'molestia':
+            notas = f"⚠️ Reducir peso significativamente - molestia en {lugar}"
+        elif tipo == 'dolor':
+            notas = f"⚠️ Peso nulo o muy ligero - recuperación activa por dolor en {lugar}"
+    return Prescription(sets, reps, rest, notas)
+
+
+def lesion_key(lesion_info: Optional[dict]) -> LesionKey:
+    if not lesion_info:
+        return None, None
+    return lesion_info.get('tipo'), lesion_info.get('zona')
+
+
+def _build_table() -> Dict[PrescriptionKey, Prescription]:
+    lesiones = [(None, None)] + [(tipo, zona) for tipo in get_args(TipoLesion) for zona in get_args(ZonaLesion)]
+    return {
+        (nivel, is_bodyweight, group, tipo, zona): prescribe(nivel, is_bodyweight, group, tipo, zona)
+        for nivel in get_args(NivelFitness)
+        for is_bodyweight in (False, True)
+        for group in GROUPS
+        for tipo, zona in lesiones
+    }
+
+
+PRESCRIPTIONS: Dict[PrescriptionKey, Prescription] = _build_table()
+
+
+class PlanPrescriptions(dict):
+    """Vista de PRESCRIPTIONS para un nivel y una lesión: (equipamiento, grupo) -> Prescription.
+
+    Lo que no esté en la tabla (un equipamiento escrito a mano en la base, p.
+    ej.) se calcula con prescribe() la primera vez que se pide.
+    """
+
+    def __init__(self, nivel: str, lesion: LesionKey):
+        super().__init__()
+        tipo, zona = lesion
+        for equipment in EQUIPMENT:
+            for group in GROUPS:
+                prescription = PRESCRIPTIONS.get((nivel, equipment in BODYWEIGHT_EQUIPMENT, group, tipo, zona))
+                if prescription is not None:
+                    self[(equipment, group)] = prescription
+        self.nivel = nivel
+        self.lesion = lesion
+
+    def __missing__(self, key: Tuple[str, str]) -> Prescription:
+        equipment, group = key
+        prescription = self[key] = prescribe(self.nivel, equipment in BODYWEIGHT_EQUIPMENT, group, *self.lesion)
+        return prescription
+
+
+_plan_tables: Dict[Tuple[str, LesionKey], PlanPrescriptions] = {}
+
+
+def plan_prescriptions(nivel: str, lesion_info: Optional[dict] = None) -> PlanPrescriptions:
+    # Las vistas se comparten entre planes (una por nivel y lesión posibles)
+    lesion = lesion_key(lesion_info)
+    table = _plan_tables.get((nivel, lesion))
+    if table is None:
+        table = _plan_tables[(nivel, lesion)] = PlanPrescriptions(nivel, lesion)
+    return table
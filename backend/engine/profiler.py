@@ -0,0 +1,200 @@
+"""Profiler por regla de clips_rules.clp.
+
+Con el profiler activo, ClipsEngine ejecuta el agenda regla a regla
+(env.run(1)) y acumula, por regla, cuántas veces se dispara y el tiempo de
+cada disparo (acciones del RHS más el matching que provocan). Por ejecución
+se guarda el tamaño del agenda al empezar y su máximo tras cualquier disparo
+(la cadena de modify sobre resultados lo hace crecer), y las reglas
+disparadas. Está desactivado por defecto: medir cada disparo hace la
+ejecución varias veces más lenta.
+
+    python -m engine.profiler perfiles.jsonl [--repeat 10] [--sort time|fired] [--json salida.json]
+
+reproduce un fichero de perfiles (JSONL o CSV, como la subida) y muestra el
+coste de cada regla. Con el servidor en marcha: GET /api/debug/rules.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List
+
+# Activar el profiler al arrancar (también con PUT /api/debug/rules?enabled=true,
+# que exige X-Admin-Token)
+PROFILE_RULES = os.getenv("CLIPS_PROFILE_RULES", "0") == "1"
+
+
+class RuleProfiler:
+    """Estadísticas por regla acumuladas entre ejecuciones (y motores)."""
+
+    def __init__(self, enabled: bool = PROFILE_RULES):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._rules: Dict[str, List[float]] = {}  # regla -> [disparos, tiempo total, tiempo máximo]
+            self._runs = 0
+            self._fired = 0
+            self._max_fired = 0
+            self._initial_agenda = 0
+            self._peak_agenda = 0
+            self._max_agenda = 0
+            self._run_time = 0.0
+
+    def run(self, env) -> int:
+        # Equivalente a env.run() disparando una activación cada vez. Tras
+        # cada disparo se recorre el agenda (unas decenas de activaciones) para
+        # su tamaño y la siguiente activación; fuera del tiempo de la regla
+        fired: Dict[str, List[float]] = {}
+        total = 0
+        start = time.perf_counter()
+        activation, initial_agenda = _agenda(env)
+        peak_agenda = initial_agenda
+        while activation is not None:
+            rule = activation.name
+            step = time.perf_counter()
+            if env.run(1) == 0:
+                break
+            elapsed = time.perf_counter() - step
+            entry = fired.get(rule)
+            if entry is None:
+                fired[rule] = [1, elapsed, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] = max(entry[2], elapsed)
+            total += 1
+            activation, size = _agenda(env)
+            peak_agenda = max(peak_agenda, size)
+        run_time = time.perf_counter() - start
+
+        with self._lock:
+            for rule, (count, elapsed, slowest) in fired.items():
+                entry = self._rules.get(rule)
+                if entry is None:
+                    self._rules[rule] = [count, elapsed, slowest]
+                else:
+                    entry[0] += count
+                    entry[1] += elapsed
+                    entry[2] = max(entry[2], slowest)
+            self._runs += 1
+            self._fired += total
+            self._max_fired = max(self._max_fired, total)
+            self._initial_agenda += initial_agenda
+            self._peak_agenda += peak_agenda
+            self._max_agenda = max(self._max_agenda, peak_agenda)
+            self._run_time += run_time
+        return total
+
+    def stats(self) -> Dict:
+        with self._lock:
+            runs = self._runs or 1
+            rule_time = sum(entry[1] for entry in self._rules.values()) or 1.0
+            rules = {
+                rule: {
+                    "fired": int(count),
+                    "fired_per_run": round(count / runs, 3),
+                    "time_total": round(elapsed, 6),
+                    "time_mean_us": round(elapsed / count * 1e6, 2),
+                    "time_max_us": round(slowest * 1e6, 2),
+                    "time_share": round(elapsed / rule_time, 4),
+                }
+                for rule, (count, elapsed, slowest) in sorted(
+                    self._rules.items(), key=lambda item: item[1][1], reverse=True
+                )
+            }
+            return {
+                "enabled": self.enabled,
+                "runs": self._runs,
+                "fired_per_run": round(self._fired / runs, 3),
+                "max_fired": self._max_fired,
+                "initial_agenda_mean": round(self._initial_agenda / runs, 3),
+                "peak_agenda_mean": round(self._peak_agenda / runs, 3),
+                "max_agenda": self._max_agenda,
+                "run_time_mean_us": round(self._run_time / runs * 1e6, 2),
+                "rules": rules,
+            }
+
+
+def _agenda(env):
+    # Primera activación del agenda (None si está vacío) y número de activaciones
+    first = None
+    size = 0
+    for activation in env.activations():
+        if first is None:
+            first = activation
+        size += 1
+    return first, size
+
+
+# Compartido por todos los motores del proceso (pool, sesiones)
+rule_profiler = RuleProfiler()
+
+
+def format_report(stats: Dict, sort: str = "time") -> str:
+    key = "time_total" if sort == "time" else "fired"
+    rules = sorted(stats["rules"].items(), key=lambda item: item[1][key], reverse=True)
+    width = max([len("regla")] + [len(rule) for rule, _ in rules])
+    lines = [
+        f"{stats['runs']} ejecuciones: {stats['fired_per_run']} disparos por ejecución "
+        f"(máx. {stats['max_fired']}), agenda inicial {stats['initial_agenda_mean']}, "
+        f"pico {stats['peak_agenda_mean']} (máx. {stats['max_agenda']}), "
+        f"{stats['run_time_mean_us']} µs por ejecución",
+        "",
+        f"{'regla':<{width}}  {'disparos':>9}  {'por ejec.':>9}  {'total ms':>9}  {'media µs':>9}  {'máx. µs':>9}  {'%':>6}",
+    ]
+    for rule, entry in rules:
+        lines.append(
+            f"{rule:<{width}}  {entry['fired']:>9}  {entry['fired_per_run']:>9}  "
+            f"{entry['time_total'] * 1000:>9.3f}  {entry['time_mean_us']:>9}  "
+            f"{entry['time_max_us']:>9}  {entry['time_share'] * 100:>5.1f}%"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    from schemas.rows import RowParser, detect_format, parse_user_input
+    from .clips_engine import ClipsEngine
+
+    parser = argparse.ArgumentParser(description="Coste por regla de clips_rules.clp sobre un fichero de perfiles")
+    parser.add_argument("path", help="fichero JSONL (un UserInput por línea) o CSV")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="por defecto, según la extensión")
+    parser.add_argument("--repeat", type=int, default=1, help="veces que se reproduce el fichero")
+    parser.add_argument("--sort", choices=("time", "fired"), default="time")
+    parser.add_argument("--json", metavar="SALIDA", help="guardar las estadísticas en JSON")
+    args = parser.parse_args(argv)
+
+    row_format = args.format or detect_format(args.path) or "jsonl"
+    rows = RowParser(row_format)
+    with open(args.path, "rb") as f:
+        parsed = rows.feed(f.read()) + rows.close()
+    profiles, invalid = [], 0
+    for row in parsed:
+        try:
+            profiles.append(parse_user_input(row))
+        except ValueError as e:
+            invalid += 1
+            print(f"fila {row.index}: {e}", file=sys.stderr)
+    if not profiles:
+        parser.error("el fichero no tiene perfiles válidos")
+
+    profiler = RuleProfiler(enabled=True)
+    engine = ClipsEngine(profiler=profiler)
+    for _ in range(args.repeat):
+        for user_input in profiles:
+            engine.evaluate_rules(user_input)
+    stats = profiler.stats()
+    print(f"{len(profiles)} perfiles ({invalid} inválidos) x {args.repeat}")
+    print(format_report(stats, args.sort))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(stats, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
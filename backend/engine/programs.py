@@ -0,0 +1,186 @@
+"""Programas de varias semanas con progresión y semanas de descarga.
+
+Un programa solo guarda el perfil, el split, la semilla, la duración de los
+bloques y el catálogo con que se creó; cada semana se genera al pedirla. Las
+semanas se agrupan en bloques de `descarga_cada` semanas cuya última es de
+descarga. Los ejercicios de un bloque salen de la semilla (seed, bloque), así
+que cualquier semana se puede reconstruir sin generar las anteriores; el
+primer bloque usa la misma semilla que el plan de POST /api/recommendations
+y repite sus ejercicios.
+
+El catálogo es el snapshot publicado al crear el programa (inmutable y
+compartido con el resto de programas de esa versión): una recarga del
+catálogo no reescribe las semanas de los programas ya creados.
+
+ProgramStore vive en la memoria del proceso: con varios procesos de uvicorn
+(--workers) cada uno tiene el suyo y un id creado en otro responde 404.
+"""
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+from schemas.schemas import DayWorkout, ProgramInfo, ProgramWeek, UserInput
+from .catalog import ExerciseCatalog
+from .clips_engine import EQUIPMENT_MAP, lesion_info, plan_seed
+from .days import build_plan
+from .prescriptions import plan_prescriptions
+from .selection import ExerciseSelector
+
+# Programas guardados como máximo (LRU); cada uno ocupa poco: no guarda semanas
+# y el catálogo es el snapshot compartido de su versión
+PROGRAM_MAX = int(os.getenv("PROGRAM_MAX", "1024"))
+
+# Semanas por bloque (incluida la de descarga) si no se indican: lo que
+# recomiendan los consejos por edad (cada 6-8 semanas, o 4-6 a partir de 40 años)
+DELOAD_EVERY = 7
+DELOAD_EVERY_MAYOR = 5
+# Series añadidas como mucho durante la progresión de un bloque
+MAX_EXTRA_SERIES = 2
+
+INDICACION_INICIO = "Inicio del bloque {bloque}: cargas moderadas, dejando 2-3 repeticiones en reserva"
+INDICACION_PROGRESION = ("Progresión (semana {posicion} del bloque {bloque}): subir la carga un 2-5% "
+                         "o una repetición por serie respecto a la semana anterior")
+INDICACION_DESCARGA = "Descarga: la mitad de las series y cargas ligeras para recuperar antes del siguiente bloque"
+
+
+class ProgramNotFound(Exception):
+    pass
+
+
+def default_deload_every(user_input: UserInput) -> int:
+    return DELOAD_EVERY_MAYOR if user_input.edad > 39 else DELOAD_EVERY
+
+
+class TrainingProgram:
+    __slots__ = ("id", "user_input", "weeks", "deload_every", "split", "seed", "catalog", "created")
+
+    def __init__(self, program_id: str, user_input: UserInput, weeks: int, deload_every: int,
+                 split: str, catalog: ExerciseCatalog):
+        self.id = program_id
+        self.user_input = user_input
+        self.weeks = weeks
+        self.deload_every = deload_every
+        self.split = split
+        self.seed = plan_seed(user_input)
+        # Las semanas se generan siempre con este snapshot, no con el publicado
+        self.catalog = catalog
+        self.created = time.time()
+
+    def info(self) -> ProgramInfo:
+        return ProgramInfo(
+            program_id=self.id,
+            perfil=self.user_input,
+            semanas=self.weeks,
+            descarga_cada=self.deload_every,
+            split=self.split,
+            catalogo=self.catalog.version,
+        )
+
+    def week(self, number: int) -> ProgramWeek:
+        # number empieza en 1; ValueError si está fuera del programa
+        if not 1 <= number <= self.weeks:
+            raise ValueError(f"semana: el programa tiene {self.weeks} semanas (1 a {self.weeks})")
+        block, position = divmod(number - 1, self.deload_every)
+        block += 1
+        deload = position == self.deload_every - 1
+        base = self._block_plan(block)
+        if deload:
+            plan = _adjust_series(base, lambda series: (series + 1) // 2)
+            indicaciones = INDICACION_DESCARGA
+        else:
+            extra = min(position // 2, MAX_EXTRA_SERIES)
+            plan = _adjust_series(base, lambda series: series + extra) if extra else base
+            if position == 0:
+                indicaciones = INDICACION_INICIO.format(bloque=block)
+            else:
+                indicaciones = INDICACION_PROGRESION.format(posicion=position + 1, bloque=block)
+        return ProgramWeek(
+            semana=number,
+            bloque=block,
+            fase="descarga" if deload else "progresion",
+            indicaciones=indicaciones,
+            plan_entrenamiento=plan,
+        )
+
+    def iter_weeks(self, offset: int, limit: int) -> Iterator[ProgramWeek]:
+        # offset desde 0, como en GET /api/exercises
+        for number in range(offset + 1, min(offset + limit, self.weeks) + 1):
+            yield self.week(number)
+
+    def _block_plan(self, block: int) -> List[DayWorkout]:
+        user_input = self.user_input
+        rng = random.Random(self.seed if block == 1 else f"{self.seed}:{block}")
+        equipment = EQUIPMENT_MAP.get(user_input.acceso_equipamiento, "gym")
+        selector = ExerciseSelector(self.catalog.selection_pools(equipment), rng)
+        table = plan_prescriptions(user_input.nivel_fitness, lesion_info(user_input))
+        return build_plan(selector, table, self.split, user_input.frecuencia_semanal)
+
+
+def _adjust_series(plan: List[DayWorkout], adjust) -> List[DayWorkout]:
+    return [
+        DayWorkout(
+            dia=day.dia,
+            tipo=day.tipo,
+            ejercicios=[ex.model_copy(update={"series": adjust(ex.series)}) for ex in day.ejercicios],
+        )
+        for day in plan
+    ]
+
+
+class ProgramStore:
+    """Programas por id con tamaño acotado (LRU).
+
+    Un programa descartado se puede volver a crear con el mismo perfil: sus
+    semanas son las mismas mientras no cambie el catálogo. Solo vale para un
+    proceso: los programas no se comparten entre workers de uvicorn.
+    """
+
+    def __init__(self, max_size: int = PROGRAM_MAX):
+        self.max_size = max_size
+        self._programs: "OrderedDict[str, TrainingProgram]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._evictions = 0
+
+    def create(self, user_input: UserInput, weeks: int, deload_every: Optional[int], split: str,
+               catalog: ExerciseCatalog) -> TrainingProgram:
+        program = TrainingProgram(
+            uuid.uuid4().hex,
+            user_input,
+            weeks,
+            deload_every or default_deload_every(user_input),
+            split,
+            catalog,
+        )
+        with self._lock:
+            self._programs[program.id] = program
+            self._created += 1
+            while len(self._programs) > self.max_size:
+                self._programs.popitem(last=False)
+                self._evictions += 1
+        return program
+
+    def get(self, program_id: str) -> TrainingProgram:
+        with self._lock:
+            program = self._programs.get(program_id)
+            if program is None:
+                raise ProgramNotFound(f"Programa {program_id} no encontrado")
+            self._programs.move_to_end(program_id)
+            return program
+
+    def delete(self, program_id: str) -> None:
+        with self._lock:
+            if self._programs.pop(program_id, None) is None:
+                raise ProgramNotFound(f"Programa {program_id} no encontrado")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "active": len(self._programs),
+                "max_size": self.max_size,
+                "created": self._created,
+                "evictions": self._evictions,
+            }
@@ -0,0 +1,181 @@
+"""Recarga en caliente de clips_rules.clp y del catálogo de ejercicios.
+
+Una recarga construye en segundo plano lo que haya cambiado (un EnginePool
+nuevo con una copia fija de las reglas, un snapshot nuevo del catálogo), lo
+valida evaluando unos perfiles de prueba y solo entonces lo publica con
+RecommendationExecutor.swap. Las peticiones en curso terminan con el pool y
+el catálogo que tomaron al empezar; si la validación falla se sigue sirviendo
+la versión anterior.
+
+Se lanza con POST /api/admin/reload o, con HOT_RELOAD_INTERVAL > 0, desde un
+hilo que comprueba cada tantos segundos si el .clp o la tabla exercises han
+cambiado. Las sesiones abiertas conservan las reglas con que se crearon.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from schemas.schemas import UserInput
+from .catalog import ExerciseCatalog, get_catalog, load_catalog, set_catalog
+from .clips_engine import IO_CONSTRUCTS, RULES_PATH, ClipsEngine
+from .executor import RecommendationExecutor
+from .pool import EnginePool
+from .profiler import RuleProfiler
+from .rules_image import image_key, snapshot_rules
+
+logger = logging.getLogger(__name__)
+
+# Segundos entre comprobaciones de cambios (0 = solo recarga manual)
+HOT_RELOAD_INTERVAL = float(os.getenv("HOT_RELOAD_INTERVAL", "0"))
+
+# Perfiles de prueba: los tres splits, los tres equipamientos y lesiones
+VALIDATION_PROFILES = [
+    UserInput(nombre="validacion", edad=25, sexo="masculino", peso=75, altura=178,
+              nivel_fitness="novato", objetivo="perder_grasa", frecuencia_semanal=3,
+              acceso_equipamiento="gimnasio_completo"),
+    UserInput(nombre="validacion", edad=34, sexo="femenino", peso=62, altura=165,
+              nivel_fitness="intermedio", objetivo="ganar_musculo", frecuencia_semanal=4,
+              acceso_equipamiento="entrenamiento_casa", lesion={"tipo": "molestia", "zona": "rodilla"}),
+    UserInput(nombre="validacion", edad=48, sexo="masculino", peso=90, altura=182,
+              nivel_fitness="avanzado", objetivo="mantenimiento", frecuencia_semanal=6,
+              acceso_equipamiento="peso_corporal", lesion={"tipo": "desgarro", "zona": "hombro"}),
+]
+
+
+class ReloadError(Exception):
+    pass
+
+
+def validate_runtime(rules_path: str, catalog: ExerciseCatalog,
+                     profiles: List[UserInput] = VALIDATION_PROFILES) -> None:
+    # Motor propio (no compite con el tráfico por el pool ni cuenta para el
+    # profiler); ReloadError si las reglas no cargan, el catálogo está vacío
+    # o algún perfil falla
+    if not len(catalog):
+        raise ReloadError("El catálogo de ejercicios está vacío")
+    try:
+        engine = ClipsEngine(rules_path, profiler=RuleProfiler(enabled=False))
+    except Exception as e:
+        raise ReloadError(f"Las reglas no cargan: {e}") from e
+    for user_input in profiles:
+        try:
+            recommendation = engine.get_recommendations(user_input, catalog)
+        except Exception as e:
+            raise ReloadError(f"La evaluación de prueba falla: {e}") from e
+        if not recommendation.plan_entrenamiento or not recommendation.consejos:
+            raise ReloadError("La evaluación de prueba no genera plan o consejos")
+
+
+class RuntimeReloader:
+    """Detecta cambios en reglas y catálogo y publica versiones validadas."""
+
+    def __init__(self, executor: RecommendationExecutor, rules_path: str = RULES_PATH,
+                 interval: float = HOT_RELOAD_INTERVAL,
+                 on_swap: Optional[Callable[[], None]] = None):
+        self.executor = executor
+        self.rules_path = rules_path
+        self.interval = interval
+        self.on_swap = on_swap
+        # Una recarga a la vez (manual o del hilo de vigilancia)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._reloads = 0
+        self._failures = 0
+        self._last_error: Optional[str] = None
+        self._last_reload: Optional[float] = None
+
+    def rules_changed(self) -> bool:
+        # image_key se cachea por mtime y tamaño: comprobarlo es un stat
+        return image_key(self.rules_path, IO_CONSTRUCTS) != self.executor.engine_pool.rules_version
+
+    def reload(self, force: bool = False) -> Dict:
+        """Recarga lo que haya cambiado (todo con force); ReloadError si no valida."""
+        with self._lock:
+            try:
+                return self._reload(force)
+            except ReloadError as e:
+                self._failures += 1
+                self._last_error = str(e)
+                raise
+
+    def _reload(self, force: bool) -> Dict:
+        start = time.perf_counter()
+        current_pool = self.executor.engine_pool
+        current_catalog = get_catalog()
+        rules_changed = force or self.rules_changed()
+        try:
+            catalog = load_catalog()
+        except Exception as e:
+            raise ReloadError(f"No se pudo leer el catálogo: {e}") from e
+        catalog_changed = force or catalog.version != current_catalog.version
+        if not rules_changed and not catalog_changed:
+            return {"reloaded": False, **self.versions()}
+
+        rules_path = snapshot_rules(self.rules_path, IO_CONSTRUCTS) if rules_changed else current_pool.rules_path
+        validate_runtime(rules_path, catalog)
+        if rules_changed:
+            engine_pool = EnginePool(current_pool.size, current_pool.timeout, current_pool.max_runs, rules_path)
+            try:
+                engine_pool.warm()
+            except Exception as e:
+                raise ReloadError(f"Las reglas no cargan: {e}") from e
+        else:
+            engine_pool = current_pool
+
+        set_catalog(catalog)
+        self.executor.swap(engine_pool, catalog)
+        if self.on_swap is not None:
+            self.on_swap()
+        self._reloads += 1
+        self._last_error = None
+        self._last_reload = time.time()
+        elapsed = time.perf_counter() - start
+        logger.info("Recarga: reglas %s -> %s, catálogo %s -> %s (%.3f s)",
+                    current_pool.rules_version, engine_pool.rules_version,
+                    current_catalog.version, catalog.version, elapsed)
+        return {
+            "reloaded": True,
+            "rules_changed": engine_pool is not current_pool,
+            "catalog_changed": catalog.version != current_catalog.version,
+            "exercises": len(catalog),
+            "elapsed": round(elapsed, 6),
+            **self.versions(),
+        }
+
+    def versions(self) -> Dict[str, str]:
+        rules_version, catalog_version = self.executor.versions
+        return {"rules_version": rules_version, "catalog_version": catalog_version}
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="hot-reload", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.reload()
+            except ReloadError as e:
+                logger.error("Recarga descartada, se mantiene la versión anterior: %s", e)
+            except Exception:
+                logger.exception("Error en la comprobación de recarga")
+
+    def stats(self) -> Dict:
+        return {
+            **self.versions(),
+            "interval": self.interval,
+            "reloads": self._reloads,
+            "failures": self._failures,
+            "last_error": self._last_error,
+            "last_reload": self._last_reload,
+        }
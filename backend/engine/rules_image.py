@@ -0,0 +1,156 @@
+"""Imagen binaria de las reglas (bsave/bload) para arrancar entornos CLIPS más rápido.
+
+La imagen se nombra con el hash del .clp, de las construcciones de E/S y de
+la versión de clipspy, así que un cambio en cualquiera la invalida y se
+vuelve a la carga de texto. Se genera con `python -m engine.build_image`
+(engine/build_image.py) o, en modo auto, la primera vez que se cargan las
+reglas como texto.
+"""
+import atexit
+import glob
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from importlib import metadata
+from typing import Callable, Dict, Optional, Sequence, Tuple
+import clips
+
+logger = logging.getLogger(__name__)
+
+# auto: usar la imagen si es válida y generarla si no lo es
+# load: usar la imagen si es válida, sin escribirla nunca
+# off: cargar siempre el .clp como texto
+IMAGE_MODE = os.getenv("CLIPS_RULES_IMAGE", "auto")
+IMAGE_DIR = os.getenv("CLIPS_RULES_IMAGE_DIR", os.path.dirname(__file__))
+
+_keys: Dict[tuple, str] = {}
+_save_failed = False
+_snapshot_dir: Optional[str] = None
+
+
+def image_key(rules_path: str, constructs: Sequence[str]) -> str:
+    stat = os.stat(rules_path)
+    cache_key = (rules_path, stat.st_mtime_ns, stat.st_size, tuple(constructs))
+    key = _keys.get(cache_key)
+    if key is None:
+        digest = hashlib.sha256()
+        with open(rules_path, "rb") as f:
+            digest.update(f.read())
+        for construct in constructs:
+            digest.update(b"\0" + construct.encode())
+        digest.update(b"\0" + metadata.version("clipspy").encode())
+        key = _keys[cache_key] = digest.hexdigest()[:16]
+    return key
+
+
+def image_path(rules_path: str, constructs: Sequence[str], directory: str = IMAGE_DIR) -> str:
+    name = os.path.splitext(os.path.basename(rules_path))[0]
+    return os.path.join(directory, f"{name}.{image_key(rules_path, constructs)}.bin")
+
+
+def snapshot_rules(rules_path: str, constructs: Sequence[str]) -> str:
+    """Copia inmutable del .clp para crear todos los motores de una versión.
+
+    Los motores se crean también después del arranque (reciclaje, sesiones,
+    workers): con la copia, editar el .clp no cambia las reglas de los ya
+    publicados hasta que se recargan (engine/reload.py). El nombre del fichero
+    se conserva, así que la copia comparte la imagen binaria del original.
+    """
+    global _snapshot_dir
+    if _snapshot_dir is None:
+        _snapshot_dir = tempfile.mkdtemp(prefix="clips-rules-")
+        atexit.register(shutil.rmtree, _snapshot_dir, True)
+    with open(rules_path, "rb") as f:
+        source = f.read()
+    version = hashlib.sha256(source).hexdigest()[:16]
+    path = os.path.join(_snapshot_dir, version, os.path.basename(rules_path))
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(source)
+        os.replace(tmp, path)
+    return path
+
+
+class _WarningCapture(clips.Router):
+    """Recoge los avisos de CLIPS (stdwrn) mientras está activo."""
+
+    def __init__(self):
+        super().__init__("rules-image-warnings", 50)
+        self.active = True
+        self.message = ""
+
+    def query(self, name: str) -> bool:
+        return self.active and name == "stdwrn"
+
+    def write(self, name: str, message: str):
+        self.message += message
+
+
+def save_image(env: clips.Environment, path: str) -> None:
+    # Escritura atómica (varios procesos pueden generarla a la vez) y
+    # borrado de imágenes de versiones anteriores de las reglas
+    directory = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    # bsave avisa siempre de que las restricciones no se guardan (CSTRNBIN1):
+    # las reglas no usan comprobación dinámica de restricciones, así que el
+    # aviso va al log en nivel debug y no a la salida estándar. El router
+    # queda inactivo después: el entorno sigue usándose como motor
+    warnings = _WarningCapture()
+    env.add_router(warnings)
+    try:
+        env.save(tmp, binary=True)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    finally:
+        warnings.active = False
+        if warnings.message:
+            logger.debug("Avisos de CLIPS al guardar %s: %s", path, " ".join(warnings.message.split()))
+    prefix = os.path.basename(path).split(".")[0]
+    for stale in glob.glob(os.path.join(directory, f"{prefix}.*.bin")):
+        if stale != path:
+            try:
+                os.unlink(stale)
+            except OSError:
+                pass
+
+
+def load_rules(new_environment: Callable[[], clips.Environment], rules_path: str,
+               constructs: Sequence[str], mode: str = IMAGE_MODE) -> Tuple[clips.Environment, str]:
+    """Devuelve un entorno con las reglas cargadas y su origen ("binary" o "text").
+
+    new_environment crea el entorno con las funciones Python ya registradas:
+    bload las necesita definidas y un bload fallido las pierde, así que cada
+    intento usa un entorno nuevo.
+    """
+    global _save_failed
+    if mode not in ("auto", "load", "off"):
+        raise ValueError(f"Modo de imagen de reglas desconocido: {mode}")
+    path = image_path(rules_path, constructs) if mode != "off" else None
+    if path and os.path.exists(path):
+        env = new_environment()
+        try:
+            env.load(path, binary=True)
+            return env, "binary"
+        except clips.CLIPSError:
+            logger.warning("Imagen de reglas %s no válida; se carga %s como texto", path, rules_path)
+
+    env = new_environment()
+    env.load(rules_path)
+    for construct in constructs:
+        env.build(construct)
+    if mode == "auto" and not _save_failed:
+        try:
+            save_image(env, path)
+        except (OSError, clips.CLIPSError):
+            # Sin permisos de escritura, p. ej.: avisar una sola vez
+            _save_failed = True
+            logger.warning("No se pudo guardar la imagen de reglas en %s", path, exc_info=True)
+    return env, "text"
+
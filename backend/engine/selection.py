@@ -0,0 +1,119 @@
+import random
+from typing import AbstractSet, Dict, Iterable, List, Optional, Set, Tuple
+
+# Clasificación de ejercicios de brazos (se hace una sola vez al crear los pools)
+TRICEPS_MARKERS = ("tricep", "fond", "cerrad", "extensión")
+BICEPS_MARKERS = ("curl", "bíceps", "biceps")
+# exclude= para elegir sin tener en cuenta lo ya usado en el plan
+NO_EXCLUSIONS: AbstractSet[int] = frozenset()
+
+
+class GroupPool:
+    __slots__ = ("items", "ids", "name_ids")
+
+    def __init__(self, items: Iterable, name_ids: Dict[str, int]):
+        self.items = tuple(items)
+        self.ids = tuple(name_ids[ex.name] for ex in self.items)
+        # Nombres distintos del grupo (un nombre repetido cuenta una vez)
+        self.name_ids = frozenset(self.ids)
+
+
+class SelectionPools:
+    """Pools de ejercicios por grupo muscular para un tipo de equipamiento.
+
+    Cada nombre de ejercicio tiene un id entero en el catálogo, de modo que los
+    ejercicios usados se registran como un conjunto de ids.
+    """
+
+    __slots__ = ("pools",)
+
+    def __init__(self, groups: Dict[str, Tuple], name_ids: Dict[str, int]):
+        pools = {group: GroupPool(items, name_ids) for group, items in groups.items()}
+        brazos = groups.get("brazos", ())
+        pools["triceps"] = GroupPool(
+            (e for e in brazos if any(m in e.name.lower() for m in TRICEPS_MARKERS)), name_ids
+        )
+        pools["biceps"] = GroupPool(
+            (e for e in brazos if any(m in e.name.lower() for m in BICEPS_MARKERS)), name_ids
+        )
+        self.pools = pools
+
+    def get(self, name: str) -> Optional[GroupPool]:
+        return self.pools.get(name)
+
+
+class ExerciseSelector:
+    """Muestreo sin reemplazo sobre los pools de un plan.
+
+    `used` acumula los ejercicios elegidos en todo el plan; cada selección
+    cuesta O(elegidos + descartados + excluidos), sin recorrer ni mezclar el
+    grupo entero, así que no depende del tamaño del catálogo.
+    """
+
+    def __init__(self, pools: SelectionPools, rng=None):
+        self.pools = pools
+        self.rng = rng if rng is not None else random
+        self.used: Set[int] = set()
+        # Ejercicios que se evitan en cualquier pick (también con exclude=):
+        # solo se eligen para completar huecos si no hay otros (rebuild_day)
+        self.avoid: AbstractSet[int] = NO_EXCLUSIONS
+
+    def available(self, pool_name: str, exclude: Optional[AbstractSet[int]] = None) -> int:
+        pool = self.pools.get(pool_name)
+        if pool is None:
+            return 0
+        if exclude is None:
+            exclude = self.used
+        if self.avoid:
+            # Los evitados no cuentan: con otro pool con alternativas, mejor ese
+            exclude = exclude | self.avoid
+        # La intersección recorre el conjunto menor: los excluidos
+        return len(pool.name_ids) - len(pool.name_ids & exclude)
+
+    def pick(self, pool_name: str, lo: int, hi: Optional[int] = None,
+             exclude: Optional[AbstractSet[int]] = None, mark: bool = True) -> List:
+        # Elegir entre lo y hi ejercicios (acotado por los disponibles).
+        # exclude=None excluye los ya usados en el plan; mark los registra como usados.
+        pool = self.pools.get(pool_name)
+        if pool is None:
+            return []
+        if exclude is None:
+            exclude = self.used
+        available = len(pool.name_ids) - len(pool.name_ids & exclude)
+        if available == 0:
+            return []
+        hi = min(lo if hi is None else hi, available)
+        lo = min(lo, hi)
+        count = self.rng.randint(lo, hi) if lo < hi else hi
+
+        taken: Set[int] = set()
+        if self.avoid:
+            # Primero sin los evitados; los huecos que falten, con ellos
+            picked = self._sample(pool, count, exclude | self.avoid, taken)
+            if len(picked) < count:
+                picked += self._sample(pool, count - len(picked), exclude, taken)
+        else:
+            picked = self._sample(pool, count, exclude, taken)
+        if mark:
+            self.used |= taken
+        return picked
+
+    def _sample(self, pool: GroupPool, count: int, exclude: AbstractSet[int], taken: Set[int]) -> List:
+        # Fisher-Yates perezoso: solo se materializan las posiciones visitadas.
+        # Los elegidos se añaden a taken (y no se repiten entre llamadas)
+        items, ids = pool.items, pool.ids
+        n = len(items)
+        swaps: Dict[int, int] = {}
+        picked = []
+        i = 0
+        while len(picked) < count and i < n:
+            j = self.rng.randrange(i, n)
+            idx = swaps.get(j, j)
+            swaps[j] = swaps.get(i, i)
+            i += 1
+            name_id = ids[idx]
+            if name_id in exclude or name_id in taken:
+                continue
+            taken.add(name_id)
+            picked.append(items[idx])
+        return picked
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from schemas.schemas import DayWorkout, Recommendation, UserInput
+from .catalog import ExerciseCatalog
+from .clips_engine import RULES_PATH, ClipsEngine, regenerate_day
+
+# Sesiones abiertas como máximo (cada una retiene su propio entorno CLIPS) y
+# segundos sin uso tras los que una sesión caduca
+SESSION_MAX = int(os.getenv("SESSION_MAX", "64"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "900"))
+
+
+class SessionNotFound(Exception):
+    pass
+
+
+class RecommendationSession:
+    """Perfil en edición con la memoria de trabajo de CLIPS viva entre cambios.
+
+    El motor es exclusivo de la sesión: update() solo modifica los campos que
+    cambian (ClipsEngine.update_recommendations). Las llamadas de una misma
+    sesión se serializan con lock.
+    """
+
+    __slots__ = ("id", "engine", "user_input", "recommendation", "plan_action",
+                 "versions", "lock", "created", "last_used", "updates")
+
+    def __init__(self, session_id: str, engine: ClipsEngine):
+        self.id = session_id
+        self.engine = engine
+        self.user_input: Optional[UserInput] = None
+        self.recommendation: Optional[Recommendation] = None
+        self.plan_action = "regenerated"  # qué se hizo con el plan en la última evaluación
+        self.versions: Optional[Tuple[str, str]] = None  # (reglas, catálogo) de la última evaluación
+        self.lock = threading.Lock()
+        self.created = self.last_used = time.monotonic()
+        self.updates = 0
+
+    def update(self, user_input: UserInput, catalog: ExerciseCatalog,
+               timings: Optional[Dict] = None) -> Recommendation:
+        with self.lock:
+            plan = self.recommendation.plan_entrenamiento if self.recommendation is not None else None
+            recommendation, action = self.engine.update_recommendations(user_input, plan, catalog, timings)
+            if self.recommendation is not None:
+                self.updates += 1
+            self.user_input = user_input
+            self.recommendation = recommendation
+            self.plan_action = action
+            self.versions = (self.engine.rules_version, catalog.version)
+            return recommendation
+
+    def regenerate_day(self, index: int, catalog: ExerciseCatalog) -> DayWorkout:
+        # El día nuevo queda en el plan de la sesión: los PATCH siguientes lo conservan
+        with self.lock:
+            plan = list(self.recommendation.plan_entrenamiento)
+            plan[index] = day = regenerate_day(self.user_input, plan, index, catalog)
+            self.recommendation = self.recommendation.model_copy(update={"plan_entrenamiento": plan})
+            return day
+
+
+class SessionStore:
+    """Sesiones por id con tamaño acotado (LRU) y caducidad por inactividad."""
+
+    def __init__(self, max_size: int = SESSION_MAX, idle_ttl: float = SESSION_IDLE_TTL):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self._sessions: "OrderedDict[str, RecommendationSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def create(self, rules_path: str = RULES_PATH) -> RecommendationSession:
+        # El entorno se crea fuera del lock (carga las reglas) y conserva esa
+        # versión de las reglas aunque después se recarguen
+        session = RecommendationSession(uuid.uuid4().hex, ClipsEngine(rules_path))
+        with self._lock:
+            self._expire_locked()
+            self._sessions[session.id] = session
+            self._created += 1
+            while len(self._sessions) > self.max_size:
+                self._sessions.popitem(last=False)
+                self._evictions += 1
+        return session
+
+    def get(self, session_id: str) -> RecommendationSession:
+        with self._lock:
+            self._expire_locked()
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise SessionNotFound(f"Sesión {session_id} no encontrada o caducada")
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                raise SessionNotFound(f"Sesión {session_id} no encontrada o caducada")
+
+    def expire(self) -> int:
+        with self._lock:
+            return self._expire_locked()
+
+    def _expire_locked(self) -> int:
+        # Orden LRU: las caducadas están al principio
+        deadline = time.monotonic() - self.idle_ttl
+        expired = 0
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used >= deadline:
+                break
+            self._sessions.popitem(last=False)
+            expired += 1
+        self._expirations += expired
+        return expired
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "active": len(self._sessions),
+                "max_size": self.max_size,
+                "created": self._created,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
@@ -1,9 +1,72 @@
-from fastapi import FastAPI, Depends, HTTPException
+import time
+_import_start = time.perf_counter()
+import asyncio
+import hmac
+import logging
+import os
+import tempfile
+from collections import deque
+from contextlib import contextmanager, suppress
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from db import get_db, init_db
-from schemas import UserInput, Recommendation
-from engine import ClipsEngine
+from pydantic import ValidationError
+from db import init_db
+from schemas import (
+    UserInput,
+    Recommendation,
+    BatchItemResult,
+    DayWorkout,
+    DayRegenerationRequest,
+    ProgramRequest,
+    ProgramInfo,
+    ProgramWeek,
+    ProgramWeekPage,
+    UserInputPatch,
+    SessionResponse,
+    CompactRecommendation,
+    ROW_FORMATS,
+    ParsedRow,
+    RowParser,
+    detect_format,
+    format_validation_error,
+    parse_user_input,
+    to_compact,
+)
+from engine import (
+    EnginePool,
+    PoolTimeout,
+    RecommendationExecutor,
+    AdmissionController,
+    AdmissionRejected,
+    RecommendationCache,
+    RecommendationSession,
+    SessionNotFound,
+    SessionStore,
+    ProgramNotFound,
+    ProgramStore,
+    TrainingProgram,
+    rule_profiler,
+    canonical_key,
+    regenerate_day,
+    get_catalog,
+    refresh_catalog,
+    snapshot_rules,
+    IO_CONSTRUCTS,
+    RULES_PATH,
+    ReloadError,
+    RuntimeReloader,
+)
+from engine import metrics
+from engine.admission import MAX_CONCURRENCY
+
+# Tiempos del arranque en frío (segundos), también en /api/stats
+startup_timings = {"imports": time.perf_counter() - _import_start}
+# Logger de uvicorn: visible sin configurar logging
+logger = logging.getLogger("uvicorn.error")
 
 app = FastAPI(title="Fitness Expert System API")
 
@@ -15,28 +78,629 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Recuento, errores y latencia de cada petición (GET /metrics)
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Máximo de perfiles por petición a /api/recommendations/batch
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "500"))
+# Perfiles de un lote evaluados con una misma plaza de admisión y motor
+BATCH_CHUNK_SIZE = 8
+# Cache-Control de los datos del catálogo (GET /api/catalog y GET /api/exercises,
+# segundos); el ETag (versión del catálogo) permite revalidar
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "86400"))
+EXERCISES_MAX_LIMIT = 1000
+PROGRAM_MAX_WEEKS = 52
+# Filas de una subida que se evalúan a la vez (el resto espera su turno)
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "2"))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Espera máxima de una fila de subida por una plaza de admisión (segundos);
+# pasado ese tiempo la fila lleva un error con retry_after
+UPLOAD_ADMISSION_TIMEOUT = float(os.getenv("UPLOAD_ADMISSION_TIMEOUT", "60"))
+# Token de las rutas de administración (cabecera X-Admin-Token); sin él,
+# esas rutas responden 403
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Pool de entornos CLIPS con las reglas ya cargadas, desde una copia fija del
+# .clp: los cambios en el fichero solo se aplican al recargar
+engine_pool = EnginePool(rules_path=snapshot_rules(RULES_PATH, IO_CONSTRUCTS))
+# Ejecución en hilos (pool) o en procesos worker según ENGINE_EXECUTION_MODE
+recommendation_executor = RecommendationExecutor(engine_pool)
+# Control de admisión: concurrencia acotada y cola con rechazo rápido
+admission = AdmissionController(MAX_CONCURRENCY or recommendation_executor.capacity)
+# Recomendaciones ya calculadas por input canónico (LRU + TTL)
+recommendation_cache = RecommendationCache()
+# Perfiles en edición con su memoria de trabajo CLIPS (/api/sessions)
+session_store = SessionStore()
+# Programas de varias semanas (/api/programs); las semanas no se guardan.
+# Se guardan en este proceso: con varios workers de uvicorn no se comparten
+program_store = ProgramStore()
+# Recarga en caliente de reglas y catálogo (POST /api/admin/reload y, con
+# HOT_RELOAD_INTERVAL, comprobación periódica); la caché se vacía al publicar
+runtime_reloader = RuntimeReloader(recommendation_executor, on_swap=recommendation_cache.clear)
 
-# Initialize database on startup
+def require_admin(x_admin_token: str = Header("")):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Rutas de administración desactivadas: definir ADMIN_TOKEN")
+    if not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="X-Admin-Token no válido")
+
+@contextmanager
+def _startup_step(name: str):
+    start = time.perf_counter()
+    yield
+    startup_timings[name] = time.perf_counter() - start
+
+# Initialize database, load the exercise catalog and warm the engines on startup
 @app.on_event("startup")
 def startup_event():
-    init_db()
+    with _startup_step("init_db"):
+        seeded = init_db()
+    with _startup_step("catalog"):
+        refresh_catalog()
+    with _startup_step("engine_pool"):
+        engine_pool.warm()
+    with _startup_step("executor"):
+        recommendation_executor.start()
+    runtime_reloader.start()
+    pool_stats = engine_pool.stats()
+    logger.info(
+        "Arranque: %s; %d ejercicios sembrados; %d entornos CLIPS (%d desde imagen binaria), carga de reglas %.3fs",
+        ", ".join(f"{name} {seconds:.3f}s" for name, seconds in startup_timings.items()),
+        seeded,
+        pool_stats["created"],
+        pool_stats["rules_binary_loads"],
+        pool_stats["rules_load_time_total"],
+    )
+
+@app.on_event("shutdown")
+def shutdown_event():
+    runtime_reloader.stop()
+    recommendation_executor.shutdown()
 
 @app.get("/")
 def root():
     return {"message": "Fitness Expert System API"}
 
-@app.post("/api/recommendations", response_model=Recommendation)
-def get_recommendations(user_input: UserInput, db: Session = Depends(get_db)):
+# compact=true: ejercicios por id de catálogo y prescripciones/notas en
+# tablas por respuesta (CompactRecommendation); se resuelve con GET /api/catalog
+@app.post(
+    "/api/recommendations",
+    response_model=Recommendation,
+    responses={200: {"content": {"application/json": {"schema": {"anyOf": [
+        {"$ref": "#/components/schemas/Recommendation"},
+        {"$ref": "#/components/schemas/CompactRecommendation"},
+    ]}}}}},
+)
+async def get_recommendations(user_input: UserInput, compact: bool = False):
+    start = time.perf_counter()
+    recommendation, split, versions = await _cached_recommendation(user_input)
+
+    # Serializar aquí (en vez de dejarlo a FastAPI) para medir la etapa
+    serialize_start = time.perf_counter()
+    if compact:
+        body = to_compact(recommendation, versions[1]).model_dump_json()
+    else:
+        body = recommendation.model_dump_json()
+    done = time.perf_counter()
+    metrics.STAGE_DURATION.observe(done - serialize_start, split=split, stage="serialization")
+    metrics.RECOMMENDATION_DURATION.observe(done - start, split=split)
+    metrics.RECOMMENDATIONS.inc(split=split)
+    return Response(content=body, media_type="application/json", headers=_version_headers(versions))
+
+def _version_headers(versions) -> dict:
+    # Versiones de reglas y catálogo con que se calculó la respuesta
+    rules_version, catalog_version = versions
+    return {"X-Rules-Version": rules_version, "X-Catalog-Version": catalog_version}
+
+async def _cached_recommendation(user_input: UserInput):
+    # La clave incluye las versiones publicadas: tras una recarga no se
+    # sirve nada calculado con las anteriores
+    try:
+        return await recommendation_cache.get_or_compute(
+            (recommendation_executor.versions, canonical_key(user_input)),
+            lambda: _run_admitted(user_input)
+        )
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except PoolTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _run_admitted(user_input: UserInput):
+    # Se guarda en caché junto con el split (métricas de los aciertos) y las
+    # versiones de reglas y catálogo usadas
+    async with admission.slot():
+        metrics.ENGINE_IN_FLIGHT.inc()
+        try:
+            recommendation, timings = await recommendation_executor.run(user_input)
+        finally:
+            metrics.ENGINE_IN_FLIGHT.dec()
+    metrics.observe_stages(timings)
+    return recommendation, timings["split"], (timings["rules_version"], timings["catalog_version"])
+
+# Cada perfil se valida y evalúa por separado: un error no invalida el lote.
+# Todo el lote usa un único snapshot de reglas y catálogo. Se evalúa por
+# bloques de BATCH_CHUNK_SIZE perfiles, cada uno con su plaza de admisión y
+# su motor del pool, para no acaparar motores frente a las peticiones sueltas
+@app.post("/api/recommendations/batch", response_model=List[BatchItemResult])
+async def get_recommendations_batch(items: List[Any], response: Response):
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El lote tiene {len(items)} perfiles; el máximo es {MAX_BATCH_SIZE}"
+        )
+    engine_pool, catalog = recommendation_executor.runtime
+    results = []
+    for start in range(0, len(items), BATCH_CHUNK_SIZE):
+        chunk = items[start:start + BATCH_CHUNK_SIZE]
+        try:
+            async with admission.slot():
+                metrics.ENGINE_IN_FLIGHT.inc()
+                try:
+                    results.extend(await run_in_threadpool(_evaluate_batch_chunk, engine_pool, catalog, start, chunk))
+                finally:
+                    metrics.ENGINE_IN_FLIGHT.dec()
+        except (AdmissionRejected, PoolTimeout) as e:
+            if not results:
+                # Nada hecho todavía: rechazar el lote entero, como una petición suelta
+                if isinstance(e, AdmissionRejected):
+                    raise HTTPException(status_code=e.status_code, detail=str(e),
+                                        headers={"Retry-After": str(e.retry_after)})
+                raise HTTPException(status_code=503, detail=str(e))
+            results.extend(_rejected_item(start + i, e) for i in range(len(chunk)))
+    response.headers.update(_version_headers((engine_pool.rules_version, catalog.version)))
+    return results
+
+def _rejected_item(index: int, error: Exception) -> BatchItemResult:
+    # Perfil sin evaluar por saturación: error con el código y retry_after
+    if isinstance(error, AdmissionRejected):
+        return BatchItemResult(index=index, error=f"{error.status_code}: {error}", retry_after=error.retry_after)
+    return BatchItemResult(index=index, error=f"503: {error}", retry_after=admission.retry_after)
+
+def _evaluate_batch_chunk(engine_pool: EnginePool, catalog, start: int, chunk: List[Any]) -> List[BatchItemResult]:
+    results = []
+    with engine_pool.acquire() as engine:
+        for index, item in enumerate(chunk, start):
+            try:
+                user_input = UserInput.model_validate(item)
+                timings = {}
+                recommendation = engine.get_recommendations(user_input, catalog, timings)
+                metrics.observe_stages(timings)
+                results.append(BatchItemResult(index=index, recommendation=recommendation))
+            except ValidationError as e:
+                results.append(BatchItemResult(index=index, error=format_validation_error(e)))
+            except Exception as e:
+                results.append(BatchItemResult(index=index, error=str(e)))
+    return results
+
+class NDJSONStreamingResponse(StreamingResponse):
+    # El cuerpo de la petición puede seguir leyéndose mientras se responde:
+    # no escuchar desconexiones con receive() en paralelo (consumiría el cuerpo)
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+# Fichero CSV (con cabecera, columnas en schemas/rows.py) o JSONL de perfiles:
+# en multipart (campo file) o como cuerpo con Content-Type text/csv o
+# application/x-ndjson. Devuelve una línea NDJSON por fila, en orden, según
+# se van evaluando; una fila inválida solo produce su línea de error.
+@app.post(
+    "/api/recommendations/upload",
+    response_class=NDJSONStreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "multipart/form-data": {
+                    "schema": {"type": "object", "properties": {"file": {"type": "string", "format": "binary"}}}
+                },
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            }
+        }
+    },
+)
+async def upload_recommendations(request: Request, format: Optional[str] = None):
+    if format is not None and format not in ROW_FORMATS:
+        raise HTTPException(status_code=422, detail=f"format debe ser uno de {', '.join(ROW_FORMATS)}")
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        # python-multipart vuelca el fichero a disco a partir de 1 MB
+        form = await request.form()
+        upload = form.get("file")
+        if not isinstance(upload, UploadFile):
+            await form.close()
+            raise HTTPException(status_code=422, detail="Falta el fichero en el campo file")
+        row_format = format or detect_format(upload.filename, upload.content_type)
+        chunks = _upload_chunks(upload)
+        cleanup = form.close
+    else:
+        # Cuerpo leído según llega: las primeras filas se evalúan antes de
+        # terminar la subida
+        row_format = format or detect_format(content_type=content_type)
+        chunks = _spooled_body(request)
+        cleanup = None
+    if row_format is None:
+        if cleanup is not None:
+            await cleanup()
+        raise HTTPException(status_code=415, detail="Formato no reconocido; usar CSV o JSONL o indicar ?format=")
+    return NDJSONStreamingResponse(_stream_rows(chunks, RowParser(row_format), cleanup))
+
+async def _upload_chunks(upload: UploadFile) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+async def _spooled_body(request: Request) -> AsyncIterator[bytes]:
+    # El cuerpo se recibe en segundo plano a un fichero temporal (a disco a
+    # partir de 1 MB) aunque nadie lea aún la respuesta: muchos clientes
+    # envían todo el cuerpo antes de leer y ambos lados quedarían bloqueados
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    received = 0
+    finished = False
+    error: Optional[BaseException] = None
+    arrived = asyncio.Event()
+
+    async def receive_body():
+        nonlocal received, finished, error
+        try:
+            async for chunk in request.stream():
+                spool.seek(0, os.SEEK_END)
+                spool.write(chunk)
+                received += len(chunk)
+                arrived.set()
+        except Exception as e:
+            error = e
+        finally:
+            finished = True
+            arrived.set()
+
+    receiver = asyncio.ensure_future(receive_body())
+    position = 0
+    try:
+        while True:
+            if position < received:
+                spool.seek(position)
+                chunk = spool.read(min(received - position, UPLOAD_CHUNK_SIZE))
+                position += len(chunk)
+                yield chunk
+            elif finished:
+                if error is not None:
+                    raise error
+                return
+            else:
+                arrived.clear()
+                await arrived.wait()
+    finally:
+        receiver.cancel()
+        spool.close()
+
+async def _stream_rows(chunks: AsyncIterator[bytes], parser: RowParser,
+                       cleanup: Optional[Callable[[], Awaitable[None]]]) -> AsyncIterator[bytes]:
+    # Como mucho UPLOAD_CONCURRENCY filas en curso; la salida mantiene el orden
+    pending: "deque[asyncio.Task]" = deque()
+    try:
+        async for chunk in chunks:
+            for row in parser.feed(chunk):
+                if len(pending) >= UPLOAD_CONCURRENCY:
+                    yield await pending.popleft()
+                pending.append(asyncio.ensure_future(_evaluate_row(row)))
+            while pending and pending[0].done():
+                yield pending.popleft().result()
+        for row in parser.close():
+            if len(pending) >= UPLOAD_CONCURRENCY:
+                yield await pending.popleft()
+            pending.append(asyncio.ensure_future(_evaluate_row(row)))
+        while pending:
+            yield await pending.popleft()
+    finally:
+        # Cliente desconectado o error: no dejar filas evaluándose
+        for task in pending:
+            task.cancel()
+        if cleanup is not None:
+            await cleanup()
+
+async def _evaluate_row(row: ParsedRow) -> bytes:
+    # Cada fila pasa por la admisión como una petición suelta. Si se rechaza
+    # por saturación, la fila espera y lo vuelve a intentar (la subida frena
+    # en lugar de perder filas) hasta UPLOAD_ADMISSION_TIMEOUT; después lleva
+    # el error con retry_after
+    try:
+        user_input = parse_user_input(row)
+    except Exception as e:
+        return _row_line(BatchItemResult(index=row.index, error=str(e)))
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + UPLOAD_ADMISSION_TIMEOUT
+    while True:
+        try:
+            recommendation, _, _ = await _run_admitted(user_input)
+            result = BatchItemResult(index=row.index, recommendation=recommendation)
+        except (AdmissionRejected, PoolTimeout) as e:
+            delay = e.retry_after if isinstance(e, AdmissionRejected) else admission.retry_after
+            if loop.time() + delay < deadline:
+                await asyncio.sleep(delay)
+                continue
+            result = _rejected_item(row.index, e)
+        except Exception as e:
+            result = BatchItemResult(index=row.index, error=str(e))
+        return _row_line(result)
+
+def _row_line(result: BatchItemResult) -> bytes:
+    return result.model_dump_json().encode() + b"\n"
+
+# Sustituir un día del plan: sin reglas ni base de datos, mismo tipo de día y
+# sin repetir ejercicios de los demás días
+@app.post("/api/recommendations/day", response_model=DayWorkout)
+def regenerate_plan_day(request: DayRegenerationRequest):
+    try:
+        return regenerate_day(request.perfil, request.plan_entrenamiento, request.dia, get_catalog())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+# Programas: el perfil pasa una vez por las reglas (para el split) y cada
+# semana se genera al pedirla, por páginas o en streaming, con el catálogo
+# que había al crear el programa
+@app.post("/api/programs", response_model=ProgramInfo, status_code=201)
+async def create_program(request: ProgramRequest):
+    _, split, _ = await _cached_recommendation(request.perfil)
+    program = program_store.create(request.perfil, request.semanas, request.descarga_cada, split, get_catalog())
+    return program.info()
+
+@app.get("/api/programs/{program_id}", response_model=ProgramInfo)
+def get_program(program_id: str):
+    return _get_program(program_id).info()
+
+@app.delete("/api/programs/{program_id}", status_code=204)
+def delete_program(program_id: str):
+    try:
+        program_store.delete(program_id)
+    except ProgramNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return Response(status_code=204)
+
+@app.get("/api/programs/{program_id}/weeks", response_model=ProgramWeekPage)
+def program_weeks(
+    program_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(4, ge=1, le=PROGRAM_MAX_WEEKS),
+):
+    program = _get_program(program_id)
+    return ProgramWeekPage(
+        program_id=program.id,
+        semanas=program.weeks,
+        offset=offset,
+        limit=limit,
+        catalogo=program.catalog.version,
+        weeks=list(program.iter_weeks(offset, limit)),
+    )
+
+# Una línea NDJSON por semana, generada al enviarla
+@app.get("/api/programs/{program_id}/weeks/stream")
+def stream_program_weeks(
+    program_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(PROGRAM_MAX_WEEKS, ge=1, le=PROGRAM_MAX_WEEKS),
+):
+    program = _get_program(program_id)
+    weeks = program.iter_weeks(offset, limit)
+    return StreamingResponse(
+        (week.model_dump_json().encode() + b"\n" for week in weeks),
+        media_type="application/x-ndjson",
+    )
+
+@app.get("/api/programs/{program_id}/weeks/{number}", response_model=ProgramWeek)
+def program_week(program_id: str, number: int):
+    program = _get_program(program_id)
+    try:
+        return program.week(number)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+def _get_program(program_id: str) -> TrainingProgram:
+    try:
+        return program_store.get(program_id)
+    except ProgramNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+# Sesiones: el perfil se crea una vez y se edita campo a campo; cada PATCH
+# reevalúa solo las reglas afectadas y conserva el plan si sigue valiendo
+@app.post("/api/sessions", response_model=SessionResponse, status_code=201)
+async def create_session(user_input: UserInput, response: Response):
+    session = await run_in_threadpool(session_store.create, recommendation_executor.engine_pool.rules_path)
+    try:
+        await _run_session(session, user_input)
+    except HTTPException:
+        # Sin evaluación no hay sesión que devolver
+        with suppress(SessionNotFound):
+            session_store.delete(session.id)
+        raise
+    return _session_response(session, response)
+
+@app.get("/api/sessions/{session_id}", response_model=SessionResponse)
+def get_session(session_id: str, response: Response):
+    return _session_response(_get_session(session_id), response)
+
+@app.patch("/api/sessions/{session_id}", response_model=SessionResponse)
+async def update_session(session_id: str, patch: UserInputPatch, response: Response):
+    session = _get_session(session_id)
+    try:
+        user_input = UserInput.model_validate(
+            {**session.user_input.model_dump(), **patch.model_dump(exclude_unset=True)}
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=format_validation_error(e))
+    await _run_session(session, user_input)
+    return _session_response(session, response)
+
+@app.delete("/api/sessions/{session_id}", status_code=204)
+def delete_session(session_id: str):
+    try:
+        session_store.delete(session_id)
+    except SessionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return Response(status_code=204)
+
+# Igual que /api/recommendations/day con el plan de la sesión, que se actualiza
+@app.post("/api/sessions/{session_id}/days/{index}", response_model=DayWorkout)
+def regenerate_session_day(session_id: str, index: int):
+    session = _get_session(session_id)
     try:
-        engine = ClipsEngine()
-        recommendations = engine.get_recommendations(user_input, db)
-        return recommendations
+        return session.regenerate_day(index, get_catalog())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def _get_session(session_id: str) -> RecommendationSession:
+    try:
+        return session_store.get(session_id)
+    except SessionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+async def _run_session(session: RecommendationSession, user_input: UserInput) -> None:
+    # El motor de la sesión es propio, pero cuenta para la admisión como el resto
+    timings = {}
+    try:
+        async with admission.slot():
+            metrics.ENGINE_IN_FLIGHT.inc()
+            try:
+                await run_in_threadpool(session.update, user_input, get_catalog(), timings)
+            finally:
+                metrics.ENGINE_IN_FLIGHT.dec()
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    metrics.observe_stages(timings)
+    metrics.RECOMMENDATIONS.inc(split=timings["split"])
+
+def _session_response(session: RecommendationSession, response: Response) -> SessionResponse:
+    # Las cabeceras van en la respuesta inyectada: el status_code del endpoint se conserva
+    response.headers.update(_version_headers(session.versions))
+    return SessionResponse(
+        session_id=session.id,
+        perfil=session.user_input,
+        plan=session.plan_action,
+        recommendation=session.recommendation,
+    )
+
+@app.get("/api/catalog")
+def catalog_snapshot(request: Request):
+    # Cacheable por los clientes: revalidan con If-None-Match y reciben 304
+    # mientras la versión no cambie
+    catalog = get_catalog()
+    headers = _catalog_headers(catalog)
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=catalog.to_json(), media_type="application/json", headers=headers)
+
+# Síncrona (threadpool): sin la página en caché, filtrar y serializar recorre
+# el catálogo entero y no debe bloquear el bucle de eventos
+@app.get("/api/exercises")
+def list_exercises(
+    request: Request,
+    equipment: Optional[str] = None,
+    muscle_group: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=EXERCISES_MAX_LIMIT),
+):
+    # Servido desde el snapshot en memoria con el cuerpo ya serializado
+    # (ExerciseCatalog.exercises_page); el ETag es la versión del catálogo
+    catalog = get_catalog()
+    headers = _catalog_headers(catalog)
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    body = catalog.exercises_page(equipment, muscle_group, difficulty, offset, limit)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _catalog_headers(catalog) -> Dict[str, str]:
+    # Misma política para todos los datos del catálogo: ETag fuerte con la
+    # versión y Cache-Control largo; tras una recarga, el cliente que vea
+    # otra versión en "catalogo" revalida con Cache-Control: no-cache
+    return {"ETag": f'"{catalog.version}"', "Cache-Control": f"public, max-age={CATALOG_MAX_AGE}"}
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
 
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/api/stats")
+def stats():
+    return {
+        "engine_pool": recommendation_executor.engine_pool.stats(),
+        "runtime": runtime_reloader.stats(),
+        "execution_mode": recommendation_executor.active_mode,
+        "admission": admission.stats(),
+        "cache": recommendation_cache.stats(),
+        "sessions": session_store.stats(),
+        "programs": program_store.stats(),
+        "startup": {name: round(seconds, 6) for name, seconds in startup_timings.items()},
+    }
+
+# Profiler por regla de clips_rules.clp (engine/profiler.py). Solo ve las
+# ejecuciones de este proceso: en modo process los workers no se incluyen
+@app.get("/api/debug/rules")
+def rule_profile():
+    return rule_profiler.stats()
+
+@app.put("/api/debug/rules", dependencies=[Depends(require_admin)])
+def set_rule_profiling(enabled: bool):
+    rule_profiler.enabled = enabled
+    return rule_profiler.stats()
+
+@app.delete("/api/debug/rules", status_code=204, dependencies=[Depends(require_admin)])
+def reset_rule_profile():
+    rule_profiler.reset()
+    return Response(status_code=204)
+
+@app.get("/metrics")
+def metrics_endpoint():
+    # Estado actual del pool, la admisión y la caché como gauges
+    for name, value in recommendation_executor.engine_pool.stats().items():
+        metrics.ENGINE_POOL.set(value, stat=name)
+    for name, value in admission.stats().items():
+        metrics.ADMISSION.set(value, stat=name)
+    for name, value in recommendation_cache.stats().items():
+        metrics.CACHE.set(value, stat=name)
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+# Recargar el snapshot del catálogo tras cambios en la tabla exercises (y
+# las reglas si también han cambiado): es una recarga como la de /api/admin/reload
+@app.post("/api/catalog/refresh", dependencies=[Depends(require_admin)])
+def catalog_refresh():
+    result = _reload(force=False)
+    return {"version": result["catalog_version"], "exercises": len(get_catalog())}
+
+# Recarga en caliente (engine/reload.py): construye y valida las reglas y el
+# catálogo nuevos y los publica sin cortar las peticiones en curso; si no
+# validan, 409 y se sigue con la versión anterior
+@app.post("/api/admin/reload", dependencies=[Depends(require_admin)])
+def admin_reload(force: bool = False):
+    return _reload(force)
+
+def _reload(force: bool) -> dict:
+    try:
+        return runtime_reloader.reload(force)
+    except ReloadError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -13,3 +13,8 @@ class Exercise(Base):
     difficulty = Column(String, nullable=False)  # beginner, intermediate, advanced
     description = Column(String, nullable=True)
 
+    __table_args__ = (
+        # Consultas filtradas por equipamiento, grupo y dificultad
+        Index("ix_exercises_equipment_group_difficulty", "equipment", "muscle_group", "difficulty"),
+    )
+
@@ -5,7 +5,29 @@ from .schemas import (
     DayWorkout,
     NutritionalPlan,
     UserProfile,
-    Recommendation
+    Recommendation,
+    DayRegenerationRequest,
+    ProgramRequest,
+    ProgramInfo,
+    ProgramWeek,
+    ProgramWeekPage,
+    UserInputPatch,
+    SessionResponse,
+    BatchItemResult
+)
+from .compact import (
+    CompactDayWorkout,
+    CompactRecommendation,
+    to_compact,
+    from_compact
+)
+from .rows import (
+    ROW_FORMATS,
+    ParsedRow,
+    RowParser,
+    detect_format,
+    format_validation_error,
+    parse_user_input
 )
 
 __all__ = [
@@ -15,6 +37,24 @@ __all__ = [
     "DayWorkout",
     "NutritionalPlan",
     "UserProfile",
-    "Recommendation"
+    "Recommendation",
+    "DayRegenerationRequest",
+    "ProgramRequest",
+    "ProgramInfo",
+    "ProgramWeek",
+    "ProgramWeekPage",
+    "UserInputPatch",
+    "SessionResponse",
+    "BatchItemResult",
+    "CompactDayWorkout",
+    "CompactRecommendation",
+    "to_compact",
+    "from_compact",
+    "ROW_FORMATS",
+    "ParsedRow",
+    "RowParser",
+    "detect_format",
+    "format_validation_error",
+    "parse_user_input"
 ]
 
@@ -0,0 +1,72 @@
+from typing import Dict, List, Mapping, Optional, Tuple
+from pydantic import BaseModel
+from .schemas import DayWorkout, ExerciseRecommendation, NutritionalPlan, Recommendation, UserProfile
+
+# Representación compacta de Recommendation (POST /api/recommendations?compact=true).
+# Cada ejercicio es [ejercicio_id, índice en prescripciones, índice en notas o null];
+# los nombres salen del catálogo (GET /api/catalog) de la versión indicada.
+
+Prescription = Tuple[int, str, str]  # series, reps, descanso
+CompactExercise = Tuple[int, int, Optional[int]]
+
+class CompactDayWorkout(BaseModel):
+    dia: str
+    tipo: str
+    ejercicios: List[CompactExercise]
+
+class CompactRecommendation(BaseModel):
+    catalogo: str  # versión del catálogo con el que resolver los ids
+    perfil: UserProfile
+    plan_nutricional: NutritionalPlan
+    prescripciones: List[Prescription]
+    notas: List[str]
+    plan_entrenamiento: List[CompactDayWorkout]
+    consejos: List[str]
+
+
+def to_compact(recommendation: Recommendation, catalog_version: str) -> CompactRecommendation:
+    prescriptions: Dict[Prescription, int] = {}
+    notes: Dict[str, int] = {}
+    days = []
+    for day in recommendation.plan_entrenamiento:
+        exercises = []
+        for ex in day.ejercicios:
+            if ex.ejercicio_id is None:
+                raise ValueError(f"El ejercicio {ex.ejercicio} no tiene id de catálogo")
+            prescription = prescriptions.setdefault((ex.series, ex.reps, ex.descanso), len(prescriptions))
+            note = notes.setdefault(ex.notas, len(notes)) if ex.notas is not None else None
+            exercises.append((ex.ejercicio_id, prescription, note))
+        days.append(CompactDayWorkout(dia=day.dia, tipo=day.tipo, ejercicios=exercises))
+    return CompactRecommendation(
+        catalogo=catalog_version,
+        perfil=recommendation.perfil,
+        plan_nutricional=recommendation.plan_nutricional,
+        prescripciones=list(prescriptions),
+        notas=list(notes),
+        plan_entrenamiento=days,
+        consejos=recommendation.consejos,
+    )
+
+
+def from_compact(compact: CompactRecommendation, exercise_names: Mapping[int, str]) -> Recommendation:
+    # Lo mismo que hará el cliente con el catálogo: reconstruir la respuesta completa
+    days = []
+    for day in compact.plan_entrenamiento:
+        exercises = []
+        for exercise_id, prescription, note in day.ejercicios:
+            series, reps, descanso = compact.prescripciones[prescription]
+            exercises.append(ExerciseRecommendation(
+                ejercicio=exercise_names[exercise_id],
+                ejercicio_id=exercise_id,
+                series=series,
+                reps=reps,
+                descanso=descanso,
+                notas=compact.notas[note] if note is not None else None,
+            ))
+        days.append(DayWorkout(dia=day.dia, tipo=day.tipo, ejercicios=exercises))
+    return Recommendation(
+        perfil=compact.perfil,
+        plan_nutricional=compact.plan_nutricional,
+        plan_entrenamiento=days,
+        consejos=compact.consejos,
+    )
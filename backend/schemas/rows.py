@@ -0,0 +1,198 @@
+import codecs
+import csv
+import json
+import os
+from typing import Any, Dict, List, NamedTuple, Optional
+from pydantic import ValidationError
+from .schemas import UserInput
+
+# Formatos de fichero de perfiles aceptados (subida y procesado masivo)
+ROW_FORMATS = ("csv", "jsonl")
+# Columnas del CSV: los campos de UserInput, con la lesión en dos columnas
+CSV_COLUMNS = (
+    "nombre", "edad", "sexo", "peso", "altura", "nivel_fitness", "objetivo",
+    "frecuencia_semanal", "acceso_equipamiento", "lesion_tipo", "lesion_zona", "seed",
+)
+
+# Caracteres máximos de un registro (línea JSONL o registro CSV, con sus
+# saltos de línea entre comillas). Uno más largo se descarta con error hasta
+# el siguiente salto de línea: una línea sin fin no hace crecer la memoria
+MAX_RECORD_SIZE = int(os.getenv("UPLOAD_MAX_RECORD_SIZE", str(64 * 1024)))
+
+_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/x-jsonlines": "jsonl",
+}
+
+
+class ParsedRow(NamedTuple):
+    index: int  # posición del registro en el fichero (desde 0, sin cabecera ni líneas vacías)
+    record: Optional[Dict[str, Any]]
+    error: Optional[str]
+
+
+def detect_format(filename: Optional[str] = None, content_type: Optional[str] = None) -> Optional[str]:
+    if filename:
+        for extension, row_format in _EXTENSIONS.items():
+            if filename.lower().endswith(extension):
+                return row_format
+    if content_type:
+        return _CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+    return None
+
+
+def csv_record(row: Dict[str, str]) -> Dict[str, Any]:
+    # Celdas vacías = campo ausente; lesion_tipo/lesion_zona -> lesion
+    record: Dict[str, Any] = {}
+    for key, value in row.items():
+        value = value.strip() if value else ""
+        if key and value:
+            record[key] = value
+    tipo = record.pop("lesion_tipo", None)
+    zona = record.pop("lesion_zona", None)
+    if tipo or zona:
+        record["lesion"] = {"tipo": tipo, "zona": zona}
+    return record
+
+
+class RowParser:
+    """Parser incremental de perfiles en CSV (con cabecera) o JSONL.
+
+    feed() recibe los bytes según llegan y devuelve los registros ya
+    completos, así que la memoria no depende del tamaño del fichero: como
+    mucho se retiene un registro de max_record_size caracteres.
+    """
+
+    def __init__(self, row_format: str, max_record_size: int = MAX_RECORD_SIZE):
+        if row_format not in ROW_FORMATS:
+            raise ValueError(f"Formato no soportado: {row_format}")
+        self.row_format = row_format
+        self.max_record_size = max_record_size
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        # Trozos de la línea en curso (sin concatenar hasta que se completa)
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._discarding = False  # dentro de una línea demasiado larga
+        self._pending_csv = ""
+        self._header: Optional[List[str]] = None
+        self._index = 0
+
+    def feed(self, data: bytes) -> List[ParsedRow]:
+        return self._feed_text(self._decoder.decode(data))
+
+    def close(self) -> List[ParsedRow]:
+        rows = self._feed_text(self._decoder.decode(b"", final=True))
+        lines = []
+        if self._buffer and not self._discarding:
+            lines.append("".join(self._buffer))
+        self._buffer = []
+        self._buffered = 0
+        self._discarding = False
+        rows += self._parse_lines(lines)
+        if self._pending_csv:
+            # Comillas sin cerrar al final del fichero
+            rows.append(self._next(None, "CSV mal formado: comillas sin cerrar"))
+            self._pending_csv = ""
+        return rows
+
+    def _feed_text(self, text: str) -> List[ParsedRow]:
+        # Solo se busca el salto de línea en el texto nuevo
+        rows: List[ParsedRow] = []
+        lines = text.split("\n")
+        last = lines.pop()
+        if lines:
+            first = lines[0]
+            if self._discarding:
+                # Fin de la línea descartada: se sigue desde la siguiente
+                lines = lines[1:]
+            elif self._buffer:
+                lines[0] = "".join(self._buffer) + first
+            self._buffer = []
+            self._buffered = 0
+            self._discarding = False
+            rows += self._parse_lines(lines)
+        if last and not self._discarding:
+            self._buffer.append(last)
+            self._buffered += len(last)
+            if self._buffered + len(self._pending_csv) > self.max_record_size:
+                rows.append(self._too_long())
+        return rows
+
+    def _too_long(self) -> ParsedRow:
+        self._buffer = []
+        self._buffered = 0
+        self._discarding = True
+        self._pending_csv = ""
+        return self._next(None, f"Registro de más de {self.max_record_size} caracteres; se descarta hasta el siguiente salto de línea")
+
+    def _next(self, record: Optional[Dict[str, Any]], error: Optional[str] = None) -> ParsedRow:
+        row = ParsedRow(self._index, record, error)
+        self._index += 1
+        return row
+
+    def _parse_lines(self, lines: List[str]) -> List[ParsedRow]:
+        rows = []
+        for line in lines:
+            line = line.rstrip("\r")
+            if len(line) + len(self._pending_csv) > self.max_record_size:
+                # Línea completa pero demasiado larga (llegó en un solo trozo)
+                rows.append(self._too_long())
+                self._discarding = False
+                continue
+            row = self._parse_csv(line) if self.row_format == "csv" else self._parse_jsonl(line)
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    def _parse_jsonl(self, line: str) -> Optional[ParsedRow]:
+        if not line.strip():
+            return None
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            return self._next(None, f"JSON no válido: {e}")
+        if not isinstance(record, dict):
+            return self._next(None, "Cada línea debe ser un objeto JSON")
+        return self._next(record)
+
+    def _parse_csv(self, line: str) -> Optional[ParsedRow]:
+        # Un campo entre comillas puede ocupar varias líneas: el registro está
+        # completo cuando el número de comillas es par
+        text = self._pending_csv + line
+        if text.count('"') % 2:
+            self._pending_csv = text + "\n"
+            return None
+        self._pending_csv = ""
+        if not text.strip():
+            return None
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as e:
+            return self._next(None, f"CSV mal formado: {e}")
+        if self._header is None:
+            self._header = [name.strip().lower() for name in values]
+            return None
+        if len(values) > len(self._header):
+            return self._next(None, f"La fila tiene {len(values)} columnas y la cabecera {len(self._header)}")
+        return self._next(csv_record(dict(zip(self._header, values))))
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc']) or 'body'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+def parse_user_input(row: ParsedRow) -> UserInput:
+    # ValueError con el mensaje listo para devolver si la fila no es válida
+    if row.error is not None:
+        raise ValueError(row.error)
+    try:
+        return UserInput.model_validate(row.record)
+    except ValidationError as e:
+        raise ValueError(format_validation_error(e)) from None
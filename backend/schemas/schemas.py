@@ -1,24 +1,43 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import Literal, Optional, List
+
+# Valores aceptados por los slots SYMBOL de la plantilla usuario (clips_rules.clp)
+Sexo = Literal["masculino", "femenino"]
+NivelFitness = Literal["novato", "intermedio", "avanzado"]
+Objetivo = Literal["ganar_musculo", "perder_grasa", "mantenimiento"]
+Equipamiento = Literal["gimnasio_completo", "peso_corporal", "entrenamiento_casa"]
+TipoLesion = Literal["lesion", "quiebre", "fisura", "desgarro", "molestia", "dolor", "ninguna"]
+ZonaLesion = Literal[
+    "biceps", "triceps", "pectoral", "dorsales", "deltoides", "cuadriceps", "femorales", "gemelos",
+    "hombro", "rodilla", "espalda_baja", "codo", "muneca", "tobillo", "cadera", "ninguna",
+]
 
 class LesionInfo(BaseModel):
-    tipo: Optional[str] = None  # lesion, quiebre, fisura, desgarro, molestia, dolor, ninguna
-    zona: Optional[str] = None  # hombro, rodilla, espalda_baja, codo, muneca, tobillo, etc.
+    tipo: Optional[TipoLesion] = None
+    zona: Optional[ZonaLesion] = None
+
+    @field_validator("tipo", "zona", mode="before")
+    @classmethod
+    def _vacio_como_nulo(cls, value):
+        # Un select vacío del formulario llega como ""
+        return value or None
 
 class UserInput(BaseModel):
     nombre: str
     edad: int = Field(gt=0, lt=120)
-    sexo: str  # masculino, femenino
+    sexo: Sexo
     peso: float = Field(gt=0)  # kg
     altura: float = Field(gt=0)  # cm
-    nivel_fitness: str  # novato, intermedio, avanzado
-    objetivo: str  # ganar_musculo, perder_grasa, mantenimiento
+    nivel_fitness: NivelFitness
+    objetivo: Objetivo
     frecuencia_semanal: int = Field(gt=0, le=7)  # días por semana
-    acceso_equipamiento: str  # gimnasio_completo, peso_corporal, entrenamiento_casa
+    acceso_equipamiento: Equipamiento
     lesion: Optional[LesionInfo] = None
+    seed: Optional[int] = None  # semilla del plan; por defecto se deriva del perfil
 
 class ExerciseRecommendation(BaseModel):
     ejercicio: str
+    ejercicio_id: Optional[int] = None  # id en el catálogo (GET /api/catalog)
     series: int
     reps: str
     descanso: str
@@ -52,3 +71,73 @@ class Recommendation(BaseModel):
     plan_entrenamiento: List[DayWorkout]
     consejos: List[str]
 
+
+class DayRegenerationRequest(BaseModel):
+    # POST /api/recommendations/day: el perfil (equipamiento, nivel, lesión y
+    # semilla) y el plan del que se sustituye el día `dia` (índice desde 0)
+    perfil: UserInput
+    plan_entrenamiento: List[DayWorkout]
+    dia: int = Field(ge=0)
+
+class ProgramRequest(BaseModel):
+    # POST /api/programs. descarga_cada: semanas por bloque, la última de
+    # descarga; por defecto según la edad (engine/programs.py)
+    perfil: UserInput
+    semanas: int = Field(default=12, ge=1, le=52)
+    descarga_cada: Optional[int] = Field(default=None, ge=2, le=8)
+
+class ProgramInfo(BaseModel):
+    program_id: str
+    perfil: UserInput
+    semanas: int
+    descarga_cada: int
+    split: str
+    catalogo: str  # versión del catálogo al crear el programa
+
+class ProgramWeek(BaseModel):
+    semana: int  # desde 1
+    bloque: int
+    fase: Literal["progresion", "descarga"]
+    indicaciones: str
+    plan_entrenamiento: List[DayWorkout]
+
+class ProgramWeekPage(BaseModel):
+    program_id: str
+    semanas: int
+    offset: int
+    limit: int
+    catalogo: str  # versión del catálogo con el que se generaron estas semanas
+    weeks: List[ProgramWeek]
+
+class UserInputPatch(BaseModel):
+    # PATCH /api/sessions/{id}: solo los campos que cambian (se validan al
+    # combinarlos con el perfil de la sesión como UserInput)
+    model_config = ConfigDict(extra="forbid")
+
+    nombre: Optional[str] = None
+    edad: Optional[int] = None
+    sexo: Optional[Sexo] = None
+    peso: Optional[float] = None
+    altura: Optional[float] = None
+    nivel_fitness: Optional[NivelFitness] = None
+    objetivo: Optional[Objetivo] = None
+    frecuencia_semanal: Optional[int] = None
+    acceso_equipamiento: Optional[Equipamiento] = None
+    lesion: Optional[LesionInfo] = None
+    seed: Optional[int] = None
+
+class SessionResponse(BaseModel):
+    session_id: str
+    perfil: UserInput
+    # Qué se hizo con el plan en la última evaluación
+    plan: Literal["kept", "represcribed", "regenerated"]
+    recommendation: Recommendation
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    recommendation: Optional[Recommendation] = None
+    error: Optional[str] = None
+    # Solo en errores por saturación (admisión o pool): la fila no es inválida
+    # y se puede reintentar tras estos segundos (como la cabecera Retry-After)
+    retry_after: Optional[int] = None
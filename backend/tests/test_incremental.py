@@ -0,0 +1,83 @@
+"""La reevaluación incremental de las sesiones debe coincidir con una evaluación completa.
+
+Cada sesión aplica una serie de cambios de un solo campo con
+ClipsEngine.update_recommendations y, tras cada uno, se compara con
+get_recommendations sobre un motor nuevo: perfil, plan nutricional, consejos
+y tipos de día. Cubre RESULT_DEPENDENCIES y CONSEJO_DEPENDENCIES.
+"""
+import random
+import typing
+import pytest
+from schemas import UserInput
+from schemas.schemas import Equipamiento, NivelFitness, Objetivo, Sexo, TipoLesion, ZonaLesion
+from db.seed import EXERCISES
+from engine.catalog import ExerciseCatalog, ExerciseRecord
+from engine.clips_engine import ClipsEngine, RULE_FIELDS
+from engine.profiler import RuleProfiler
+
+SESSIONS = 60
+PATCHES_PER_SESSION = 6
+
+CATALOG = ExerciseCatalog(ExerciseRecord(index, *exercise) for index, exercise in enumerate(EXERCISES, 1))
+
+
+def _random_lesion(rng: random.Random):
+    if rng.random() < 0.5:
+        return None
+    return {"tipo": rng.choice(typing.get_args(TipoLesion)), "zona": rng.choice(typing.get_args(ZonaLesion))}
+
+
+# Un valor nuevo para cada campo de UserInput
+FIELD_VALUES = {
+    "nombre": lambda rng: f"usuario{rng.randrange(1000)}",
+    "edad": lambda rng: rng.randint(14, 80),
+    "sexo": lambda rng: rng.choice(typing.get_args(Sexo)),
+    "peso": lambda rng: round(rng.uniform(40, 140), 1),
+    "altura": lambda rng: round(rng.uniform(145, 205), 1),
+    "nivel_fitness": lambda rng: rng.choice(typing.get_args(NivelFitness)),
+    "objetivo": lambda rng: rng.choice(typing.get_args(Objetivo)),
+    "frecuencia_semanal": lambda rng: rng.randint(1, 7),
+    "acceso_equipamiento": lambda rng: rng.choice(typing.get_args(Equipamiento)),
+    "lesion": _random_lesion,
+    "seed": lambda rng: rng.choice([None, rng.randrange(1 << 16)]),
+}
+
+
+def _random_user(rng: random.Random) -> UserInput:
+    return UserInput(**{field: value(rng) for field, value in FIELD_VALUES.items()})
+
+
+def _summary(recommendation):
+    return (
+        recommendation.perfil,
+        recommendation.plan_nutricional,
+        recommendation.consejos,
+        [day.tipo for day in recommendation.plan_entrenamiento],
+    )
+
+
+def test_every_rule_field_has_a_patch():
+    assert RULE_FIELDS <= set(FIELD_VALUES) == set(UserInput.model_fields)
+
+
+@pytest.mark.parametrize("session", range(SESSIONS))
+def test_single_field_patches_match_full_evaluation(session):
+    rng = random.Random(session)
+    engine = ClipsEngine(profiler=RuleProfiler(enabled=False))
+    fresh = ClipsEngine(profiler=RuleProfiler(enabled=False))
+    user_input = _random_user(rng)
+    recommendation, action = engine.update_recommendations(user_input, None, CATALOG)
+    assert action == "regenerated"
+    assert recommendation == fresh.get_recommendations(user_input, CATALOG)
+
+    for _ in range(PATCHES_PER_SESSION):
+        field = rng.choice(list(FIELD_VALUES))
+        user_input = UserInput.model_validate({**user_input.model_dump(), field: FIELD_VALUES[field](rng)})
+        previous_plan = recommendation.plan_entrenamiento
+        recommendation, action = engine.update_recommendations(user_input, previous_plan, CATALOG)
+        expected = fresh.get_recommendations(user_input, CATALOG)
+        assert _summary(recommendation) == _summary(expected), f"campo {field}"
+        if action == "kept":
+            assert recommendation.plan_entrenamiento == previous_plan
+        elif action == "regenerated":
+            assert recommendation.plan_entrenamiento == expected.plan_entrenamiento
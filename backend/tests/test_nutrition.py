@@ -0,0 +1,67 @@
+"""El kernel vectorizado (engine/nutrition.py) debe coincidir con las reglas CLIPS."""
+import itertools
+import pytest
+from schemas import UserInput
+from engine.nutrition import OBJETIVOS, SEXOS, compute_nutrition_for, verify_against_clips
+
+
+def _user(edad=30, sexo="masculino", peso=70.0, altura=175.0, objetivo="mantenimiento", frecuencia=3):
+    return UserInput(
+        nombre="test",
+        edad=edad,
+        sexo=sexo,
+        peso=peso,
+        altura=altura,
+        nivel_fitness="intermedio",
+        objetivo=objetivo,
+        frecuencia_semanal=frecuencia,
+        acceso_equipamiento="gimnasio_completo",
+    )
+
+
+# Cada objetivo, frecuencia (umbrales 5 y 6) y sexo
+COMBINATIONS = [
+    _user(sexo=sexo, objetivo=objetivo, frecuencia=frecuencia)
+    for sexo, objetivo, frecuencia in itertools.product(SEXOS, OBJETIVOS, range(1, 8))
+]
+
+EDGE_CASES = {
+    # IMC justo en los límites de categoría (altura 2 m: peso / 4)
+    "imc_18_5": _user(peso=74, altura=200),
+    "imc_25": _user(peso=100, altura=200),
+    "imc_30": _user(peso=120, altura=200),
+    # Agua con mitades en el primer decimal (0.35, 1.05 l)
+    "agua_0_35": _user(peso=10),
+    "agua_1_05": _user(peso=30),
+    # TMB impar x 1.5: calorías en x.5 (round de CLIPS, no bancario)
+    "calorias_mitad": _user(peso=70, altura=176, edad=30, objetivo="ganar_musculo", frecuencia=3),
+    # Proteínas en x.5 (0.25 kg x 2.0 g/kg)
+    "proteinas_mitad": _user(peso=0.25, altura=50, edad=1, objetivo="mantenimiento"),
+    # Calorías negativas con déficit: sin macros
+    "calorias_negativas": _user(peso=1, altura=50, edad=1, sexo="femenino", objetivo="perder_grasa"),
+    "extremos": _user(peso=250, altura=230, edad=119, objetivo="ganar_musculo", frecuencia=7),
+}
+
+
+def test_combinations_match_clips():
+    assert verify_against_clips(users=COMBINATIONS) == []
+
+
+@pytest.mark.parametrize("user", EDGE_CASES.values(), ids=EDGE_CASES.keys())
+def test_edge_cases_match_clips(user):
+    assert verify_against_clips(users=[user]) == []
+
+
+def test_edge_cases_hit_boundaries():
+    # Los casos límite siguen siéndolo si cambian los redondeos
+    result = compute_nutrition_for(list(EDGE_CASES.values()))
+    names = list(EDGE_CASES)
+    assert result["imc"][names.index("imc_25")] == 25.0
+    # 0.35 en binario es 0.34999...: redondeo decimal exacto, como round() de Python
+    assert result["agua_diaria"][names.index("agua_0_35")] == 0.3
+    assert result["calorias_diarias"][names.index("calorias_negativas")] < 0
+    assert result["proteinas"][names.index("calorias_negativas")] == 0
+
+
+def test_random_sample_matches_clips():
+    assert verify_against_clips(count=500, seed=1234) == []
@@ -0,0 +1,123 @@
+"""Tabla de prescripciones (engine/prescriptions.py): valores fijados por nivel, equipamiento y tipo de día."""
+import itertools
+import random
+import typing
+import pytest
+from schemas.schemas import NivelFitness, TipoLesion, ZonaLesion
+from db.seed import EXERCISES
+from engine.catalog import ExerciseCatalog, ExerciseRecord
+from engine.days import DAY_BUILDERS, LEGS, LOWER_FUERZA, PIERNA, PULL, PUSH, TORSO, UPPER_FUERZA
+from engine.days import FULL_BODY, LOWER_HIPERTROFIA, UPPER_HIPERTROFIA
+from engine.prescriptions import (
+    EQUIPMENT, GROUPS, PRESCRIPTIONS, PlanPrescriptions, Prescription, plan_prescriptions, prescribe,
+)
+from engine.selection import ExerciseSelector
+
+NIVELES = typing.get_args(NivelFitness)
+
+# (nivel, peso corporal, grupo grande) -> (series, reps, descanso)
+EXPECTED = {
+    ("novato", False, True): (3, "8-12", "2 min"),
+    ("novato", False, False): (3, "8-12", "2 min"),
+    ("novato", True, True): (3, "12-15", "90 seg"),
+    ("novato", True, False): (3, "12-15", "90 seg"),
+    ("intermedio", False, True): (4, "6-10", "2 min"),
+    ("intermedio", False, False): (4, "8-12", "2 min"),
+    ("intermedio", True, True): (4, "15-22", "90 seg"),
+    ("intermedio", True, False): (4, "18-25", "90 seg"),
+    ("avanzado", False, True): (4, "5-8", "2-3 min"),
+    ("avanzado", False, False): (4, "8-12", "2-3 min"),
+    ("avanzado", True, True): (5, "20-30", "60-90 seg"),
+    ("avanzado", True, False): (5, "25-35", "60-90 seg"),
+}
+HEAVY = {"pecho", "espalda", "piernas"}
+
+# Grupos con los que prescribe cada tipo de día
+DAY_GROUPS = {
+    FULL_BODY: set(GROUPS),
+    UPPER_FUERZA: {"pecho", "espalda", "hombros", "brazos"},
+    UPPER_HIPERTROFIA: {"pecho", "espalda", "hombros", "brazos"},
+    LOWER_FUERZA: {"piernas", "core"},
+    LOWER_HIPERTROFIA: {"piernas", "core"},
+    PUSH: {"pecho", "hombros", "brazos"},
+    PULL: {"espalda", "brazos"},
+    LEGS: {"piernas", "core"},
+    TORSO: {"hombros", "pecho"},
+    PIERNA: {"piernas"},
+}
+
+CATALOG = ExerciseCatalog(ExerciseRecord(index, *exercise) for index, exercise in enumerate(EXERCISES, 1))
+
+
+@pytest.mark.parametrize("nivel,equipment,group", list(itertools.product(NIVELES, EQUIPMENT, GROUPS)))
+def test_prescription_without_injury(nivel, equipment, group):
+    is_bodyweight = equipment != "gym"
+    expected = Prescription(*EXPECTED[(nivel, is_bodyweight, group in HEAVY)], None)
+    assert prescribe(nivel, is_bodyweight, group) == expected
+    assert PRESCRIPTIONS[(nivel, is_bodyweight, group, None, None)] == expected
+    assert plan_prescriptions(nivel)[(equipment, group)] == expected
+
+
+@pytest.mark.parametrize("nivel,tipo_dia", list(itertools.product(NIVELES, DAY_BUILDERS)))
+def test_day_kind_prescriptions(nivel, tipo_dia):
+    # Cada tipo de día pide a la tabla sus grupos y cada ejercicio lleva la
+    # prescripción de su equipamiento y grupo
+    for equipment in ("gym", "bodyweight", "home"):
+        requested = []
+
+        class Recording(PlanPrescriptions):
+            def __getitem__(self, key):
+                requested.append(key)
+                return super().__getitem__(key)
+
+        table = Recording(nivel, (None, None))
+        selector = ExerciseSelector(CATALOG.selection_pools(equipment), random.Random(0))
+        exercises = DAY_BUILDERS[tipo_dia](selector, table)
+        groups = {group for _, group in requested}
+        # El catálogo inicial no tiene core con gym: solo home tiene todos los grupos
+        assert groups == DAY_GROUPS[tipo_dia] if equipment == "home" else groups <= DAY_GROUPS[tipo_dia]
+        for exercise, (exercise_equipment, group) in zip(exercises, requested):
+            expected = EXPECTED[(nivel, exercise_equipment != "gym", group in HEAVY)]
+            assert (exercise.series, exercise.reps, exercise.descanso) == expected
+            assert exercise.notas is None
+
+
+@pytest.mark.parametrize("tipo,expected", [
+    ("desgarro", "⚠️ EVITAR - DESGARRO en rodilla. Omitir este ejercicio"),
+    ("lesion", "⚠️ EVITAR - LESION en rodilla. Omitir este ejercicio"),
+    ("molestia", "⚠️ Reducir peso significativamente - molestia en rodilla"),
+    ("dolor", "⚠️ Peso nulo o muy ligero - recuperación activa por dolor en rodilla"),
+    ("ninguna", None),
+])
+def test_injury_notes(tipo, expected):
+    assert prescribe("intermedio", False, "piernas", tipo, "rodilla").notas == expected
+    # Un grupo que la zona no afecta no lleva nota
+    assert prescribe("intermedio", False, "pecho", tipo, "rodilla").notas is None
+
+
+def test_injury_zone_name_is_readable():
+    assert prescribe("novato", True, "core", "dolor", "espalda_baja").notas.endswith("en espalda baja")
+
+
+def test_table_covers_every_combination():
+    lesiones = 1 + len(typing.get_args(TipoLesion)) * len(typing.get_args(ZonaLesion))
+    assert len(PRESCRIPTIONS) == len(NIVELES) * 2 * len(GROUPS) * lesiones
+    for key, prescription in PRESCRIPTIONS.items():
+        assert prescribe(*key) == prescription
+
+
+def test_missing_falls_back_to_prescribe():
+    table = PlanPrescriptions("avanzado", ("molestia", "rodilla"))
+    assert ("cables", "piernas") not in table
+    prescription = table[("cables", "piernas")]
+    assert prescription == prescribe("avanzado", False, "piernas", "molestia", "rodilla")
+    # Se guarda en la vista tras calcularla
+    assert table[("cables", "piernas")] is prescription
+    # Equipamiento de peso corporal con un grupo fuera de GROUPS
+    assert table[("home", "antebrazos")] == prescribe("avanzado", True, "antebrazos", "molestia", "rodilla")
+
+
+def test_plan_prescriptions_are_shared():
+    lesion = {"tipo": "dolor", "zona": "hombro"}
+    assert plan_prescriptions("novato", lesion) is plan_prescriptions("novato", dict(lesion))
+    assert plan_prescriptions("novato") is plan_prescriptions("novato", None)
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { UserInput, Recommendation } from './types';
+import { UserInput, Recommendation, ExercisePage, DayWorkout } from './types';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
@@ -15,3 +15,30 @@ export const getRecommendations = async (userInput: UserInput): Promise<Recommen
   return response.data;
 };
 
+
+export interface ExerciseFilters {
+  equipment?: string;
+  muscle_group?: string;
+  difficulty?: string;
+  offset?: number;
+  limit?: number;
+}
+
+export const getExercises = async (filters: ExerciseFilters = {}): Promise<ExercisePage> => {
+  const response = await api.get<ExercisePage>('/api/exercises', { params: filters });
+  return response.data;
+};
+
+// Sustituye solo el día `dia` (índice desde 0) del plan; el resto no cambia
+export const regenerateDay = async (
+  perfil: UserInput,
+  plan: DayWorkout[],
+  dia: number,
+): Promise<DayWorkout> => {
+  const response = await api.post<DayWorkout>('/api/recommendations/day', {
+    perfil,
+    plan_entrenamiento: plan,
+    dia,
+  });
+  return response.data;
+};
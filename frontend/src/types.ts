@@ -14,10 +14,12 @@ export interface UserInput {
   frecuencia_semanal: number;
   acceso_equipamiento: string;
   lesion?: LesionInfo;
+  seed?: number;
 }
 
 export interface ExerciseRecommendation {
   ejercicio: string;
+  ejercicio_id?: number;
   series: number;
   reps: string;
   descanso: string;
@@ -56,3 +58,20 @@ export interface Recommendation {
   consejos: string[];
 }
 
+
+export interface Exercise {
+  id: number;
+  name: string;
+  muscle_group: string;
+  equipment: string;
+  difficulty: string;
+  description?: string;
+}
+
+export interface ExercisePage {
+  version: string;
+  total: number;
+  offset: number;
+  limit: number;
+  ejercicios: Exercise[];
+}